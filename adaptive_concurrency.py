@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency
+How many downloads may run at once against each platform, learned AIMD
+style (like TCP congestion control): every job that succeeds, with the
+platform's success rate and per-job time holding steady, adds 1/limit, so
+the limit grows by about one per round of jobs; a 429, 403, captcha or
+login wall halves it straight away. The limit starts at the registry's
+'concurrency' value and is kept between runs, so bulk runs settle near
+each platform's (or host's) real limit without manual tuning
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from download_errors import PERMANENT, classify_error
+from fragment_limits import throttle_signal
+from local_state import state_path
+from platform_registry import get_platform
+
+
+# What a platform says when it wants us to slow down without using 429/503
+PUSHBACK_PATTERNS = [
+    ('403', re.compile(r'HTTP Error 403|\b403\b.*Forbidden', re.IGNORECASE)),
+    ('captcha', re.compile(r'captcha|confirm you.re not a bot|unusual traffic', re.IGNORECASE)),
+    ('login', re.compile(r'login required|log ?in to|sign in to confirm|rate.?limit reached|'
+                         r'checkpoint_required', re.IGNORECASE))
+]
+
+# HTTP statuses that mean "too many requests" for direct downloads
+PUSHBACK_STATUSES = {429, 403, 503}
+
+# Starting limit of hosts that are not in the registry
+DEFAULT_LIMIT = 4
+
+# Limits never grow past this many times the starting value
+MAX_GROWTH = 4
+
+# Seconds after a cut during which the limit does not grow again
+COOLDOWN = 30
+
+# A job taking this many times longer than the recent average means the
+# platform is slowing down, so it does not count towards growth
+SLOWDOWN_FACTOR = 2.0
+
+
+def pushback_signal(message):
+    """Return '429', '503', '403', 'captcha' or 'login' if a message shows pushback, else None
+
+    Removed, private or unsupported content (a permanent failure) is not
+    pushback, whatever its wording.
+    """
+    if classify_error(message) == PERMANENT:
+        return None
+    signal = throttle_signal(message)
+    if signal:
+        return signal
+    for name, pattern in PUSHBACK_PATTERNS:
+        if pattern.search(message or ''):
+            return name
+    return None
+
+
+def limit_key(url, platform):
+    """Return the name a URL's limit is kept under: its platform, or its host for unknown sites"""
+    if platform != 'unknown':
+        return platform
+    # Unrelated sites do not share one limit
+    return urlparse(url).hostname or platform
+
+
+class AdaptiveConcurrency:
+    def __init__(self, path=None):
+        self.path = path or state_path('concurrency_limits.json')
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._state = {}
+        self._running = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for platform, limit in saved.items():
+            if isinstance(limit, (int, float)) and limit >= 1:
+                self._state[platform] = {'limit': float(limit), 'cut_at': 0.0,
+                                         'elapsed': None, 'success': 1.0}
+
+    def _save(self):
+        # Only limits that moved are worth keeping
+        data = {platform: round(state['limit'], 2) for platform, state in self._state.items()
+                if int(state['limit']) != self.default(platform)}
+        try:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def default(platform):
+        entry = get_platform(platform)
+        return entry['concurrency'] if entry else DEFAULT_LIMIT
+
+    def _entry(self, platform):
+        state = self._state.get(platform)
+        if state is None:
+            state = self._state[platform] = {'limit': float(self.default(platform)), 'cut_at': 0.0,
+                                             'elapsed': None, 'success': 1.0}
+        return state
+
+    def limit(self, platform):
+        """Return how many downloads of a platform may run at once right now"""
+        with self._lock:
+            return max(1, int(self._entry(platform)['limit']))
+
+    def record(self, platform, ok, elapsed=None, signal=None):
+        """Feed back the outcome of one download
+
+        signal is what pushback_signal() found in the job's output (or an
+        HTTP status); any signal cuts the limit in half, whether or not the
+        job itself got through.
+        """
+        with self._lock:
+            state = self._entry(platform)
+            before = state['limit']
+            now = time.monotonic()
+            state['success'] = state['success'] * 0.8 + (0.2 if ok else 0.0)
+
+            if signal:
+                # Several jobs failing from the same burst only count once
+                if now - state['cut_at'] >= 1:
+                    state['limit'] = max(1.0, before / 2)
+                    state['cut_at'] = now
+            elif ok:
+                average = state['elapsed']
+                slower = average is not None and elapsed is not None and elapsed > average * SLOWDOWN_FACTOR
+                if elapsed is not None:
+                    state['elapsed'] = elapsed if average is None else average * 0.8 + elapsed * 0.2
+                if not slower and state['success'] >= 0.5 and now - state['cut_at'] >= COOLDOWN:
+                    ceiling = self.default(platform) * MAX_GROWTH
+                    state['limit'] = min(float(ceiling), before + 1 / before)
+
+            changed = int(state['limit']) != int(before)
+            if changed:
+                self._save()
+                self._slots.notify_all()
+        if changed and signal:
+            print(f"🐢 {platform} is pushing back ({signal}); "
+                  f"concurrent downloads cut to {int(state['limit'])}")
+
+    def record_status(self, platform, status, elapsed=None):
+        """Feed back a direct HTTP download that ended with the given status code"""
+        ok = status is not None and status < 400
+        signal = str(status) if status in PUSHBACK_STATUSES else None
+        self.record(platform, ok, elapsed, signal)
+
+    @contextmanager
+    def slot(self, platform):
+        """Hold one of the platform's download slots, waiting for a free one"""
+        with self._slots:
+            while self._running.get(platform, 0) >= max(1, int(self._entry(platform)['limit'])):
+                self._slots.wait()
+            self._running[platform] = self._running.get(platform, 0) + 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._running[platform] -= 1
+                self._slots.notify_all()
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_concurrency():
+    """Return the process-wide adaptive concurrency controller"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdaptiveConcurrency()
+        return _controller
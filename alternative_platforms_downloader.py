@@ -7,19 +7,19 @@ Supports: Odysee, BitChute, Metacafe, Veoh, DTube, YouNow, Trovo, etc.
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class AlternativePlatformsDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -43,7 +43,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"🌊 Starting Odysee download...")
             print(f"🌐 Platform: Odysee (LBRY)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Odysee download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -66,7 +66,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"🎬 Starting BitChute download...")
             print(f"🌐 Platform: BitChute")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ BitChute download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -89,7 +89,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"🎥 Starting Metacafe download...")
             print(f"🌐 Platform: Metacafe")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Metacafe download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -112,7 +112,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"📹 Starting Veoh download...")
             print(f"🌐 Platform: Veoh")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Veoh download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -134,7 +134,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"⛓️ Starting DTube download...")
             print(f"🌐 Platform: DTube (Decentralized)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ DTube download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -157,7 +157,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"📡 Starting YouNow download...")
             print(f"🌐 Platform: YouNow (Live streaming)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ YouNow download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -180,7 +180,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"🎮 Starting Trovo download...")
             print(f"🌐 Platform: Trovo (Gaming)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Trovo download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -203,7 +203,7 @@ class AlternativePlatformsDownloader:
         try:
             print(f"🇷🇺 Starting VK Video download...")
             print(f"🌐 Platform: VKontakte")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ VK Video download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -259,7 +259,7 @@ class AlternativePlatformsDownloader:
         
         try:
             print(f"🌐 Generic download attempt...")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Generic download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -5,11 +5,16 @@ Supports: MX TakaTak, Moj, Chingari, Josh, Bilibili, Kuaishou, Weibo, Douyin, et
 """
 
 import os
+import re
 import sys
 import subprocess
-import json
+from html import unescape
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
+
+from platform_index import PLATFORM_DOMAINS, classify
+from strategy_registry import run_strategies
+from ytdlp_engine import get_engine, ytdlp_available
 
 # Optional import - fallback if not available
 try:
@@ -19,42 +24,51 @@ except ImportError:
     REQUESTS_AVAILABLE = False
 
 
+# Where a page names its own video file; HLS playlists need yt-dlp instead
+MEDIA_URL_PATTERNS = [
+    re.compile(r'<meta[^>]+property=["\']og:video(?::secure_url|:url)?["\'][^>]+content=["\']([^"\']+)', re.IGNORECASE),
+    re.compile(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]+property=["\']og:video(?::secure_url|:url)?["\']', re.IGNORECASE),
+    re.compile(r'<(?:video|source)\b[^>]+src=["\']([^"\']+)', re.IGNORECASE)
+]
+
+
+def find_media_url(html, page_url):
+    """Return the first direct video file URL a page names, or None"""
+    for pattern in MEDIA_URL_PATTERNS:
+        for match in pattern.finditer(html):
+            media_url = urljoin(page_url, unescape(match.group(1)).strip())
+            parsed = urlparse(media_url)
+            if parsed.scheme in ('http', 'https') and not parsed.path.endswith('.m3u8'):
+                return media_url
+    return None
+
+
 class AsianPlatformsDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Platform detection patterns
+        # Platform detection patterns (shared registry; this module calls
+        # MX TakaTak 'takatak')
         self.platform_patterns = {
-            'takatak': ['mxtakatak.com', 'takatak.tv'],
-            'moj': ['moj.tv', 'mojapp.in'],
-            'chingari': ['chingari.io', 'chingariapp.com'],
-            'josh': ['josh.in', 'joshapp.com'],
-            'bilibili': ['bilibili.com', 'b23.tv'],
-            'kuaishou': ['kuaishou.com', 'ks.com'],
-            'weibo': ['weibo.com', 'weibo.cn'],
-            'douyin': ['douyin.com', 'iesdouyin.com'],
-            'niconico': ['nicovideo.jp', 'nico.ms'],
-            'youku': ['youku.com', 'youku.cn']
+            ('takatak' if name == 'mxtakatak' else name): PLATFORM_DOMAINS[name]
+            for name in ['mxtakatak', 'moj', 'chingari', 'josh', 'bilibili',
+                         'kuaishou', 'weibo', 'douyin', 'niconico', 'youku']
         }
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
 
     def detect_platform(self, url):
         """Detect which platform the URL belongs to"""
-        url_lower = url.lower()
-        
-        for platform, patterns in self.platform_patterns.items():
-            for pattern in patterns:
-                if pattern in url_lower:
-                    return platform
-        return 'unknown'
+        platform = classify(url)
+        if platform == 'mxtakatak':
+            return 'takatak'
+        return platform if platform in self.platform_patterns else 'unknown'
 
     def download_bilibili(self, url, quality='best'):
         """Download Bilibili videos (Chinese YouTube)"""
@@ -76,7 +90,7 @@ class AsianPlatformsDownloader:
         try:
             print(f"📺 Starting Bilibili download...")
             print(f"🌏 Platform: Bilibili (哔哩哔哩)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Bilibili download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -100,7 +114,7 @@ class AsianPlatformsDownloader:
         try:
             print(f"🎌 Starting Niconico download...")
             print(f"🌏 Platform: Niconico (ニコニコ動画)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Niconico download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -125,7 +139,7 @@ class AsianPlatformsDownloader:
         try:
             print(f"🇨🇳 Starting Youku download...")
             print(f"🌏 Platform: Youku (优酷)")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Youku download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
@@ -147,36 +161,54 @@ class AsianPlatformsDownloader:
             url
         ]
         
-        try:
-            print(f"🇮🇳 Starting {platform_name} download...")
-            result = subprocess.run(cmd, check=True)
-            print(f"✅ {platform_name} download successful!")
-        except subprocess.CalledProcessError:
-            # Fallback to direct download if yt-dlp fails
-            print(f"⚠️ yt-dlp failed for {platform_name}, trying direct download...")
-            self.try_direct_download(url, platform_dir, platform_name)
+        def download_ytdlp():
+            try:
+                print(f"🇮🇳 Starting {platform_name} download...")
+                result = self.engine.run(cmd)
+                print(f"✅ {platform_name} download successful!")
+                return True
+            except subprocess.CalledProcessError:
+                print(f"⚠️ yt-dlp failed for {platform_name}")
+                return False
+
+        # Fallback to direct download if yt-dlp fails, or start with it
+        # when that is what has been working (see strategy_registry.py)
+        return run_strategies(url, [
+            ('yt-dlp', download_ytdlp),
+            ('direct', lambda: self.try_direct_download(url, platform_dir, platform_name))
+        ])
 
     def try_direct_download(self, url, platform_dir, platform_name):
-        """Try direct download for platforms not fully supported by yt-dlp"""
+        """Download the video file the page itself links to
+
+        For pages yt-dlp cannot extract: looks for an og:video tag or a
+        <video>/<source> file and fetches it. Returns True if a file was
+        downloaded.
+        """
+        if not REQUESTS_AVAILABLE:
+            print(f"⚠️ Direct download for {platform_name} requires 'requests': pip3 install requests")
+            return False
+        from http_downloader import HttpDownloader, format_bytes
+
+        http = HttpDownloader(pool_size=1)
         try:
             print(f"🔄 Attempting direct download for {platform_name}...")
-            
-            if REQUESTS_AVAILABLE:
-                # Basic video URL extraction (simplified)
-                response = requests.get(url, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                # This is a simplified approach - real implementation would need
-                # platform-specific API analysis
-                print(f"⚠️ {platform_name} requires specialized extraction")
-                print(f"💡 Platform may need manual analysis or API access")
-            else:
-                print(f"⚠️ {platform_name} requires specialized extraction")
-                print(f"💡 Install 'requests' module for enhanced functionality: pip3 install requests")
-                print(f"💡 Platform may need manual analysis or API access")
-            
-        except Exception as e:
+            page = http.session.get(url, timeout=http.timeout)
+            page.raise_for_status()
+            media_url = find_media_url(page.text, page.url)
+            if media_url is None:
+                print(f"⚠️ No direct video link on the {platform_name} page")
+                return False
+
+            name = os.path.basename(urlparse(media_url).path) or f"{platform_name.lower()}.mp4"
+            written = http.download(media_url, platform_dir / name)
+            print(f"✅ Direct download successful! ({format_bytes(written)})")
+            return True
+        except (requests.RequestException, OSError) as e:
             print(f"❌ Direct download failed: {e}")
+            return False
+        finally:
+            http.close()
 
     def download_with_platform_detection(self, url, quality='best'):
         """Auto-detect platform and download accordingly"""
@@ -211,7 +243,7 @@ class AsianPlatformsDownloader:
         
         try:
             print(f"🌐 Starting generic download...")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Generic download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Generic download failed: {e}")
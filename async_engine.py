@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Async Download Engine
+Library API on top of asyncio: drives yt-dlp subprocesses with
+asyncio.create_subprocess_exec so one event loop can run hundreds of jobs,
+and returns structured results instead of printing or exiting
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+
+from adaptive_concurrency import get_concurrency, limit_key, pushback_signal
+from bandwidth import get_bandwidth, option_rate, with_limit_rate
+from download_errors import TRANSIENT, backoff_delay, cacheable, classify_error, error_reason, get_negative_cache
+from format_catalog import generic_selector
+from fragment_limits import get_fragment_limits
+from job_watchdog import JobWatch, job_class, kill_job
+from platform_index import classify
+from progress_events import POSTPROCESS_PREFIX, PROGRESS_PREFIX, JobProgress, parse_progress_line
+
+
+FILE_PREFIX = 'smdl-file '
+
+
+class YtDlpNotFoundError(RuntimeError):
+    """Raised when the yt-dlp executable cannot be started"""
+
+
+def format_args(quality='best', format_type='video'):
+    """Return the yt-dlp format options for a quality/format pair
+
+    The selector is the format catalog's plain one (see format_catalog.py);
+    ranking a catalog would mean a blocking extraction per download.
+    """
+    if format_type == 'audio':
+        return [
+            '--extract-audio',
+            '--audio-format', 'mp3',
+            '--audio-quality', '192K',
+            '--format', generic_selector('audio')
+        ]
+    return ['--format', generic_selector(quality)]
+
+
+class AsyncDownloadEngine:
+    def __init__(self, download_path="./downloads", max_concurrent=100, ytdlp_binary='yt-dlp'):
+        self.download_path = Path(download_path)
+        self.max_concurrent = max(1, max_concurrent)
+        self.ytdlp_binary = ytdlp_binary
+        self.transient_retries = 2
+        # asyncio primitives belong to one event loop, so they are created
+        # for the running loop and again whenever the engine is used from
+        # another one (e.g. by a later asyncio.run())
+        self._loop = None
+        self._semaphore = None
+        self._platform_changed = None
+        self._platform_running = {}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._platform_changed = asyncio.Condition()
+            self._platform_running = {}
+
+    def _slots(self):
+        self._bind_loop()
+        return self._semaphore
+
+    @contextlib.asynccontextmanager
+    async def _platform_slot(self, platform):
+        """Wait until the platform is below its adaptive concurrency limit"""
+        self._bind_loop()
+        controller = get_concurrency()
+        async with self._platform_changed:
+            await self._platform_changed.wait_for(
+                lambda: self._platform_running.get(platform, 0) < controller.limit(platform))
+            self._platform_running[platform] = self._platform_running.get(platform, 0) + 1
+        try:
+            yield
+        finally:
+            async with self._platform_changed:
+                self._platform_running[platform] -= 1
+                self._platform_changed.notify_all()
+
+    async def _spawn(self, args):
+        try:
+            return await asyncio.create_subprocess_exec(
+                self.ytdlp_binary, *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                # Progress lines can carry long file names and URLs
+                limit=1024 * 1024,
+                # Its own process group, so a kill also takes down ffmpeg children
+                start_new_session=os.name == 'posix'
+            )
+        except FileNotFoundError:
+            raise YtDlpNotFoundError(
+                f"{self.ytdlp_binary} is not installed or not found in PATH "
+                "(install it with: pipx install yt-dlp)")
+
+    async def extract_info(self, url):
+        """Return the info dict for a URL, or raise RuntimeError with yt-dlp's error"""
+        deadline = JobWatch('extract').deadline
+        async with self._slots():
+            process = await self._spawn(['--dump-json', '--no-warnings', url])
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), deadline)
+            except asyncio.TimeoutError:
+                kill_job(process)
+                await process.wait()
+                raise RuntimeError(f"extract job exceeded its deadline of {deadline:.0f}s")
+
+        if process.returncode:
+            raise RuntimeError(stderr.decode(errors='replace').strip() or
+                               f"yt-dlp exited with code {process.returncode}")
+        return json.loads(stdout.decode().strip().split('\n')[0])
+
+    async def download(self, url, quality='best', format='video', on_progress=None, extra_args=None):
+        """Download a URL and return a result dict
+
+        on_progress(event) is called with a dict for every progress update;
+        the updates are also published as events on the shared progress bus
+        (see progress_events.py).
+        The result has: url, ok, returncode, files, error, category, elapsed.
+        category is the kind of failure (see download_errors.py): transient
+        failures are retried after a jittered exponential backoff, and URLs
+        known to fail for good are answered from the negative cache without
+        running yt-dlp. Downloads of one platform wait for a slot under its
+        adaptive concurrency limit (see adaptive_concurrency.py). A download
+        that stalls is killed and retried; one that runs past its deadline
+        fails (see job_watchdog.py).
+        """
+        failures = get_negative_cache()
+        known = failures.get(url, extra_args)
+        if known is not None:
+            category, reason, _ = known
+            return {'url': url, 'ok': False, 'returncode': None, 'files': [],
+                    'error': reason, 'category': category, 'elapsed': 0.0}
+
+        start = time.time()
+        events = JobProgress(url)
+        events.start()
+        attempt = 0
+        while True:
+            result = await self._download_once(url, quality, format, on_progress, extra_args, events)
+            if result['ok']:
+                break
+            category = result['category'] = classify_error(result['error'], result['returncode'])
+            if category == TRANSIENT and attempt < self.transient_retries:
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            if category not in (None, TRANSIENT) and cacheable(url, result['error'], result['returncode']):
+                failures.put(url, category, result['error'])
+            break
+        result['elapsed'] = time.time() - start
+        # Waiting for subscribers here would stall the event loop
+        events.finish(None if result['ok'] else result['error'] or 'failed', wait=False)
+        return result
+
+    async def _download_once(self, url, quality, format, on_progress, extra_args, events):
+        args = format_args(quality, format)
+        args.extend([
+            '--output', str(self.download_path / '%(extractor)s/%(uploader)s/%(title)s.%(ext)s'),
+            '--quiet',
+            '--progress',
+            '--newline',
+            '--progress-template', f'download:{PROGRESS_PREFIX}%(progress)j',
+            # Keeps the stall watchdog fed while long merges or conversions run
+            '--progress-template', f'postprocess:{POSTPROCESS_PREFIX}%(progress.{{status,postprocessor}})j',
+            '--print', f'after_move:{FILE_PREFIX}%(filepath)s',
+            '--no-simulate'
+        ])
+        args.extend(extra_args or [])
+        args.append(url)
+        # Same per-platform fragment concurrency as the synchronous engine
+        platform = classify(url)
+        args = get_fragment_limits().apply(['yt-dlp'] + args, platform)[1:]
+
+        start = time.time()
+        files = []
+        async with self._platform_slot(limit_key(url, platform)), self._slots():
+            started = time.time()
+            # The subprocess keeps the share the job has when it starts
+            bandwidth = get_bandwidth().job(platform, option_rate(['yt-dlp'] + args))
+            if bandwidth.rate is not None:
+                args = with_limit_rate(['yt-dlp'] + args, bandwidth.rate)[1:]
+            watch = JobWatch(job_class(['yt-dlp'] + args))
+            supervisor = None
+            try:
+                process = await self._spawn(args)
+                stderr_task = asyncio.ensure_future(process.stderr.read())
+                supervisor = asyncio.ensure_future(self._supervise(process, watch))
+
+                async for raw_line in process.stdout:
+                    line = raw_line.decode(errors='replace').rstrip('\n')
+                    parsed = parse_progress_line(line)
+                    if parsed is not None:
+                        kind, progress = parsed
+                        if kind == 'postprocess':
+                            watch.postprocessor_hook(progress)
+                            events.postprocessor_hook(progress)
+                            continue
+                        watch.progress_hook(progress)
+                        events.progress_hook(progress)
+                        if on_progress:
+                            progress['url'] = url
+                            on_progress(progress)
+                    elif line.startswith(FILE_PREFIX):
+                        files.append(line[len(FILE_PREFIX):])
+                    else:
+                        watch.on_line(line)
+
+                stderr = (await stderr_task).decode(errors='replace').strip()
+                returncode = await process.wait()
+            finally:
+                if supervisor is not None:
+                    supervisor.cancel()
+                bandwidth.close()
+            if returncode and watch.reason:
+                stderr = f"{stderr}\nERROR: {watch.reason}".strip()
+
+            # --print implies --quiet, so only errors (not fragment retries) show up
+            signals = [s for s in map(pushback_signal, stderr.splitlines()) if s]
+            throttled = [s for s in signals if s in ('429', '503')]
+            if returncode == 0 or throttled:
+                get_fragment_limits().report(platform, throttled)
+            # Recorded before the slot is given back, so waiting jobs see the new limit;
+            # 101 means yt-dlp stopped on purpose, which is no failure
+            get_concurrency().record(limit_key(url, platform), returncode in (0, 101), time.time() - started,
+                                     signals[0] if signals else None)
+
+        return {
+            'url': url,
+            'ok': returncode == 0,
+            'returncode': returncode,
+            'files': files,
+            'error': error_reason(stderr) if returncode else None,
+            'category': None,
+            'elapsed': time.time() - start
+        }
+
+    @staticmethod
+    async def _supervise(process, watch):
+        """Kill a download once its watch gives up on it (stalled or past its deadline)"""
+        while not watch.check():
+            await asyncio.sleep(1)
+        kill_job(process)
+
+    def submit(self, url, **kwargs):
+        """Schedule a download on the running loop and return its future"""
+        return asyncio.ensure_future(self.download(url, **kwargs))
+
+    async def download_many(self, urls, **kwargs):
+        """Download many URLs concurrently and return their results in order"""
+        # The tasks gather creates inherit the bulk mark
+        with get_bandwidth().bulk():
+            return await asyncio.gather(*(self.download(url, **kwargs) for url in urls))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Bandwidth Scheduler
+Token buckets shared by every transfer in the process: yt-dlp jobs (through
+a progress hook in-process, or --limit-rate for the command line and worker
+processes) and direct requests streams. A global rate and per-platform
+rates are split between the jobs running at that moment, weighted, and
+re-split whenever a job starts or finishes, so a bulk run cannot starve an
+interactive download. With no limits configured nothing is throttled.
+
+Limits come from the environment, e.g.
+    SMDL_RATE_LIMIT=8M
+    SMDL_PLATFORM_RATE_LIMITS=youtube=4M,vimeo=2M
+or from BandwidthScheduler.configure()
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Share of a transfer started on its own next to one entry of a bulk run
+INTERACTIVE_WEIGHT = 4
+
+# Set while a batch or playlist run starts its entries (per thread and per asyncio task)
+_bulk = ContextVar('bulk', default=False)
+
+
+def parse_rate(value):
+    """Parse a rate like '500K', '4M' or '1.5M' (bytes per second, 1024-based)"""
+    if value is None or value == '':
+        return None
+    match = re.fullmatch(r'\s*([\d.]+)\s*([kKmMgG]?)i?[bB]?\s*', str(value))
+    if match is None:
+        raise ValueError(f"invalid rate: {value!r}")
+    scale = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[match.group(2).lower()]
+    return int(float(match.group(1)) * scale) or None
+
+
+def _platform_rates_from_env(value):
+    rates = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            platform, rate = item.split('=', 1)
+            rates[platform.strip()] = parse_rate(rate)
+    return rates
+
+
+def option_rate(cmd):
+    """Return the --limit-rate of a command line in bytes/s, or None"""
+    for option in ('-r', '--limit-rate'):
+        if option in cmd[:-1]:
+            return parse_rate(cmd[cmd.index(option) + 1])
+    return None
+
+
+def with_limit_rate(cmd, rate):
+    """Return cmd with --limit-rate set so the whole job stays under rate bytes/s
+
+    yt-dlp applies the limit to every fragment stream on its own, so it is
+    divided between the concurrent fragments.
+    """
+    fragments = 1
+    for option in ('-N', '--concurrent-fragments'):
+        if option in cmd[:-1]:
+            fragments = max(1, int(cmd[cmd.index(option) + 1]))
+    cmd = list(cmd)
+    for option in ('-r', '--limit-rate'):
+        while option in cmd[:-1]:
+            index = cmd.index(option)
+            del cmd[index:index + 2]
+    return cmd[:1] + ['--limit-rate', str(max(1024, rate // fragments))] + cmd[1:]
+
+
+class TokenBucket:
+    """Rate limiter: consume(n) blocks until n bytes fit under the rate"""
+
+    def __init__(self, rate=None, burst_seconds=0.5):
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self.rate = None
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate or None
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            burst = self.rate * self.burst_seconds
+            self._tokens = min(burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def consume(self, nbytes):
+        """Take nbytes from the bucket, sleeping off any debt this leaves"""
+        with self._lock:
+            if not self.rate:
+                return
+            self._refill()
+            # Going into debt (instead of waiting for a full chunk's worth
+            # first) lets concurrent consumers share the rate smoothly
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BandwidthJob:
+    """One transfer's share of the bandwidth; use as a context manager"""
+
+    def __init__(self, scheduler, platform, cap=None, weight=1):
+        self.scheduler = scheduler
+        self.platform = platform
+        self.cap = cap
+        self.weight = max(0.01, weight)
+        self.bucket = TokenBucket()
+
+    @property
+    def rate(self):
+        """Bytes per second this job may currently use (None = unlimited)"""
+        return self.bucket.rate
+
+    def throttle(self, nbytes):
+        self.bucket.consume(nbytes)
+
+    def progress_hook(self):
+        """Return a yt-dlp progress hook that throttles the download it reports on"""
+        seen = {}
+
+        def hook(status):
+            if status.get('status') != 'downloading':
+                return
+            key = status.get('filename')
+            downloaded = status.get('downloaded_bytes') or 0
+            delta = downloaded - seen.get(key, 0)
+            seen[key] = downloaded
+            if delta > 0:
+                # Runs in the download thread, so sleeping here slows it down
+                self.throttle(delta)
+        return hook
+
+    def close(self):
+        self.scheduler._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BandwidthScheduler:
+    def __init__(self, global_rate=None, platform_rates=None):
+        self._lock = threading.Lock()
+        self._jobs = []
+        self.global_rate = None
+        self.platform_rates = {}
+        self.configure(global_rate, platform_rates)
+
+    @classmethod
+    def from_env(cls):
+        return cls(parse_rate(os.environ.get('SMDL_RATE_LIMIT')),
+                   _platform_rates_from_env(os.environ.get('SMDL_PLATFORM_RATE_LIMITS')))
+
+    def configure(self, global_rate=None, platform_rates=None):
+        """Set the global and per-platform limits (bytes/s, None = unlimited)"""
+        with self._lock:
+            self.global_rate = global_rate or None
+            self.platform_rates = {p: r for p, r in (platform_rates or {}).items() if r}
+            self._rebalance()
+
+    def job(self, platform='unknown', rate=None, weight=None):
+        """Register a transfer and return its BandwidthJob
+
+        rate caps this one job; weight sets its share of the global and
+        platform rates relative to the other running jobs. It defaults to 1
+        for the entries of a bulk run (see bulk()) and INTERACTIVE_WEIGHT
+        for anything else, so a download started on its own keeps most of
+        the bandwidth while a batch is running.
+        """
+        if weight is None:
+            weight = 1 if _bulk.get() else INTERACTIVE_WEIGHT
+        job = BandwidthJob(self, platform, rate, weight)
+        with self._lock:
+            self._jobs.append(job)
+            self._rebalance()
+        return job
+
+    @contextmanager
+    def bulk(self):
+        """Mark the transfers started inside the block as entries of a bulk run
+
+        Applies to the current thread, and to asyncio tasks created inside it.
+        """
+        token = _bulk.set(True)
+        try:
+            yield
+        finally:
+            _bulk.reset(token)
+
+    def _release(self, job):
+        with self._lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+                self._rebalance()
+
+    def _rebalance(self):
+        """Split the global and platform rates between the running jobs by weight"""
+        total = sum(job.weight for job in self._jobs)
+        per_platform = {}
+        for job in self._jobs:
+            per_platform[job.platform] = per_platform.get(job.platform, 0) + job.weight
+
+        for job in self._jobs:
+            limits = [job.cap]
+            if self.global_rate:
+                limits.append(self.global_rate * job.weight / total)
+            platform_rate = self.platform_rates.get(job.platform)
+            if platform_rate:
+                limits.append(platform_rate * job.weight / per_platform[job.platform])
+            limits = [int(limit) for limit in limits if limit]
+            job.bucket.set_rate(min(limits) if limits else None)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_bandwidth():
+    """Return the process-wide bandwidth scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BandwidthScheduler.from_env()
+        return _scheduler
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch Download Queue
+Runs a list of URLs through a bounded thread pool, with a concurrency cap
+per platform on top of the global cap. Unless a cap is given explicitly, it
+follows the platform's adaptive limit, which grows while downloads go
+through and is cut when the platform pushes back
+"""
+
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from adaptive_concurrency import get_concurrency
+from bandwidth import get_bandwidth
+from download_errors import PERMANENT, get_negative_cache
+from platform_registry import platform_limits
+from progress_events import ProgressMetrics, format_bytes, get_progress_bus
+
+
+# Conservative per-platform caps from the shared registry
+DEFAULT_PLATFORM_LIMITS = platform_limits()
+
+
+def read_url_file(urls_file):
+    """Read one URL per line, skipping blank lines and # comments"""
+    with open(urls_file, 'r') as f:
+        return [line.strip() for line in f
+                if line.strip() and not line.strip().startswith('#')]
+
+
+class BatchDownloader:
+    def __init__(self, detect_platform, max_workers=8, platform_limits=None, default_limit=2):
+        # detect_platform(url) may return a name or a (name, config) tuple
+        self.detect_platform = detect_platform
+        self.max_workers = max(1, max_workers)
+        self.platform_limits = dict(DEFAULT_PLATFORM_LIMITS)
+        # Caps given here stay fixed; the rest adapt (see adaptive_concurrency.py)
+        self.fixed_limits = dict(platform_limits or {})
+        self.platform_limits.update(self.fixed_limits)
+        self.default_limit = default_limit
+        self.concurrency = get_concurrency()
+        self.failures = get_negative_cache()
+
+    def platform_of(self, url):
+        """Return the platform name for a URL"""
+        platform = self.detect_platform(url)
+        if isinstance(platform, tuple):
+            platform = platform[0]
+        return platform
+
+    def limit_for(self, platform):
+        """Return how many jobs of a platform may run at once right now"""
+        if platform in self.fixed_limits:
+            limit = self.fixed_limits[platform]
+        elif platform in self.platform_limits:
+            limit = self.concurrency.limit(platform)
+        else:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_workers))
+
+    def _run_job(self, url, platform, download_func):
+        start = time.time()
+        try:
+            with get_bandwidth().bulk():
+                ok = download_func(url)
+            error = None
+        except Exception as e:
+            ok = False
+            error = str(e)
+        return {
+            'url': url,
+            'platform': platform,
+            'ok': bool(ok),
+            'error': error,
+            'elapsed': time.time() - start
+        }
+
+    def download_all(self, urls, download_func):
+        """Download every URL with download_func(url) and return one result dict per URL"""
+        # Pending jobs are bucketed per platform so one saturated platform
+        # never blocks URLs of other platforms queued behind it
+        pending = OrderedDict()
+        results = []
+        for url in urls:
+            platform = self.platform_of(url)
+            # Removed or unsupported last time: not worth a worker slot
+            known = self.failures.get(url)
+            if known is not None and known[0] == PERMANENT:
+                results.append({'url': url, 'platform': platform, 'ok': False,
+                                'error': f"known permanent failure: {known[1]}", 'elapsed': 0.0})
+                continue
+            pending.setdefault(platform, deque()).append(url)
+
+        running = {platform: 0 for platform in pending}
+        futures = {}
+
+        print(f"📋 Batch: {len(urls)} URLs across {len(pending)} platforms")
+        if results:
+            print(f"⏭️  Skipping {len(results)} URLs that failed for good before")
+        print(f"⚙️  Workers: {self.max_workers} total")
+        for platform, queue in pending.items():
+            print(f"   {platform:<12} {len(queue):>5} URLs, max {self.limit_for(platform)} at once")
+        print("-" * 50)
+
+        # Bytes moved by every job the engines ran for this batch
+        metrics = ProgressMetrics()
+        bus = get_progress_bus()
+        subscription = bus.subscribe(metrics)
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or futures:
+                # Fill free slots, taking platforms in turn
+                launched = True
+                while launched and len(futures) < self.max_workers:
+                    launched = False
+                    for platform in list(pending):
+                        if len(futures) >= self.max_workers:
+                            break
+                        if running[platform] >= self.limit_for(platform):
+                            continue
+                        url = pending[platform].popleft()
+                        if not pending[platform]:
+                            del pending[platform]
+                        running[platform] += 1
+                        future = executor.submit(self._run_job, url, platform, download_func)
+                        futures[future] = platform
+                        launched = True
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running[futures.pop(future)] -= 1
+                    result = future.result()
+                    results.append(result)
+                    status = "✅" if result['ok'] else "❌"
+                    print(f"{status} [{len(results)}/{len(urls)}] {result['platform']}: {result['url'][:60]}")
+
+        bus.flush()
+        bus.unsubscribe(subscription)
+        self.print_summary(results, metrics.snapshot()['downloaded_bytes'], time.time() - start)
+        return results
+
+    def print_summary(self, results, downloaded_bytes=None, elapsed=None):
+        """Print a short summary of a finished batch"""
+        succeeded = sum(1 for r in results if r['ok'])
+        print("\n📊 Batch Summary:")
+        print("=" * 30)
+        print(f"✅ Succeeded: {succeeded}")
+        print(f"❌ Failed: {len(results) - succeeded}")
+        if downloaded_bytes:
+            rate = f" ({format_bytes(downloaded_bytes / elapsed)}/s)" if elapsed else ''
+            print(f"📦 Downloaded: {format_bytes(downloaded_bytes)}{rate}")
+        for result in results:
+            if not result['ok']:
+                print(f"   - {result['url'][:60]} {result['error'] or ''}")
@@ -13,11 +13,57 @@ import requests
 from pathlib import Path
 from urllib.parse import urlparse
 
+from http_downloader import HttpDownloader, format_bytes
+
 
 class DiscordDownloader:
     def __init__(self, download_path="./downloads/discord"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.http = HttpDownloader()
+
+    def attachment_path(self, url, custom_name=None):
+        """Return the output path for a Discord CDN URL, or None if it is not one"""
+        parsed = urlparse(url)
+        if 'cdn.discordapp.com' not in parsed.netloc and 'media.discordapp.net' not in parsed.netloc:
+            return None
+        
+        # Get filename from URL or use custom name
+        if custom_name:
+            filename = custom_name
+        else:
+            filename = os.path.basename(parsed.path)
+            if not filename:
+                filename = "discord_attachment"
+        return self.download_path / filename
+
+    @staticmethod
+    def unique_paths(jobs):
+        """Give every (url, path) job its own path
+
+        Attachments are very often all called image.png or unknown.png;
+        concurrent downloads to one path would write the same .part file.
+        Shared names get the attachment id from the CDN path
+        (/attachments/<channel>/<id>/<name>) in front, or a number after.
+        """
+        counts = {}
+        for _, path in jobs:
+            counts[path] = counts.get(path, 0) + 1
+
+        taken = set()
+        unique = []
+        for url, path in jobs:
+            if counts[path] > 1:
+                parts = urlparse(url).path.strip('/').split('/')
+                if len(parts) >= 4 and parts[0] == 'attachments':
+                    path = path.with_name(f"{parts[2]}_{path.name}")
+            candidate, number = path, 1
+            while candidate in taken:
+                candidate = path.with_name(f"{path.stem} ({number}){path.suffix}")
+                number += 1
+            taken.add(candidate)
+            unique.append((url, candidate))
+        return unique
 
     def download_attachment(self, url, custom_name=None):
         """Download Discord attachment (video/image/file)"""
@@ -27,53 +73,57 @@ class DiscordDownloader:
             print(f"🔗 URL: {url}")
             
             # Parse Discord CDN URL
-            parsed = urlparse(url)
-            if 'cdn.discordapp.com' not in parsed.netloc and 'media.discordapp.net' not in parsed.netloc:
+            output_path = self.attachment_path(url, custom_name)
+            if output_path is None:
                 print("❌ Invalid Discord attachment URL")
-                return
-            
-            # Get filename from URL or use custom name
-            if custom_name:
-                filename = custom_name
-            else:
-                filename = os.path.basename(parsed.path)
-                if not filename:
-                    filename = "discord_attachment"
-            
-            # Create output path
-            output_path = self.download_path / filename
+                return False
             
-            # Download with requests
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
+            # Download over the pooled keep-alive session
+            self.http.download(url, output_path)
             
-            # Save file
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            print(f"✅ Downloaded: {filename}")
+            print(f"✅ Downloaded: {output_path.name}")
             print(f"📁 Saved to: {output_path}")
+            return True
                 
         except requests.RequestException as e:
             print(f"❌ Download failed: {e}")
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
+        return False
 
-    def bulk_download_attachments(self, urls_file):
+    def bulk_download_attachments(self, urls_file, workers=8):
         """Download multiple Discord attachments from a file"""
+        # Only needed here; the batch machinery would load with it
+        from batch_downloader import read_url_file
         
         try:
-            with open(urls_file, 'r') as f:
-                urls = [line.strip() for line in f if line.strip()]
-            
+            urls = read_url_file(urls_file)
             print(f"📋 Found {len(urls)} URLs to download")
+            print(f"⚙️  Concurrent downloads: {workers}")
             
-            for i, url in enumerate(urls, 1):
-                print(f"\n📎 Downloading {i}/{len(urls)}: {url[:50]}...")
-                self.download_attachment(url)
-                
-            print(f"\n✅ Bulk download completed! Downloaded {len(urls)} files")
+            jobs = []
+            for url in urls:
+                output_path = self.attachment_path(url)
+                if output_path is None:
+                    print(f"❌ Invalid Discord attachment URL: {url[:60]}")
+                else:
+                    jobs.append((url, output_path))
+            jobs = self.unique_paths(jobs)
+            
+            done = [0]
+            
+            def report(result):
+                done[0] += 1
+                status = "✅" if result['ok'] else "❌"
+                detail = format_bytes(result['bytes']) if result['ok'] else result['error']
+                print(f"{status} [{done[0]}/{len(jobs)}] {result['path'].name} ({detail})")
+            
+            # Every worker keeps its CDN connection in the shared pool alive between files
+            results, stats = self.http.download_many(jobs, workers=workers, on_done=report)
+            
+            downloaded = sum(1 for r in results if r['ok'])
+            print(f"\n✅ Bulk download completed! Downloaded {downloaded}/{len(urls)} files")
+            print(f"📊 Throughput: {stats.summary()}")
                 
         except FileNotFoundError:
             print(f"❌ File not found: {urls_file}")
@@ -104,7 +154,7 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("1. Single attachment: python3 discord_downloader.py <discord_url>")
-        print("2. Bulk download: python3 discord_downloader.py <urls_file> bulk")
+        print("2. Bulk download: python3 discord_downloader.py <urls_file> bulk [workers]")
         print("3. Show info: python3 discord_downloader.py --info")
         print("\nExamples:")
         print("python3 discord_downloader.py 'https://cdn.discordapp.com/...'")
@@ -120,7 +170,8 @@ def main():
     if len(sys.argv) >= 3 and sys.argv[2] == 'bulk':
         # Bulk download from file
         urls_file = sys.argv[1]
-        downloader.bulk_download_attachments(urls_file)
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3].isdigit() else 8
+        downloader.bulk_download_attachments(urls_file, workers)
     else:
         # Single download
         url = sys.argv[1]
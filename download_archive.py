@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Download Archive
+SQLite record of every media item already downloaded, keyed by
+(extractor, video id) and shared by all downloaders. A Bloom filter in
+front answers "never seen" without touching the database, so yt-dlp can
+check every playlist entry against millions of records before extracting it
+"""
+
+import atexit
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from local_state import state_path
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (false positives only, no false negatives)"""
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        # Standard sizing: m = -n ln p / (ln 2)^2 bits, k = m/n ln 2 hashes
+        bits = int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)) + 1
+        self.size = bits
+        self.hashes = max(1, round(bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def save(self, path, **extra):
+        """Write the filter (and extra JSON-safe fields) to path atomically"""
+        header = dict(extra, capacity=self.capacity, size=self.size, hashes=self.hashes, count=self.count)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            f.write(self._bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Return (filter, header) saved by save(), or (None, None)"""
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                bits = bytearray(f.read())
+        except (OSError, ValueError):
+            return None, None
+        bloom = cls.__new__(cls)
+        bloom.capacity = header['capacity']
+        bloom.size = header['size']
+        bloom.hashes = header['hashes']
+        bloom.count = header['count']
+        bloom._bits = bits
+        if len(bits) != (bloom.size + 7) // 8:
+            return None, None
+        return bloom, header
+
+
+class DownloadArchive:
+    """Set-like archive of '<extractor> <id>' keys, the format yt-dlp uses
+
+    An instance can be passed straight to YoutubeDL as its download_archive
+    option. Every record is also appended to a plain-text mirror, which is
+    what the yt-dlp command line reads with --download-archive; lines that
+    the command line adds to it are imported back with import_mirror().
+    """
+
+    # How often a Bloom miss looks for rows added by other processes
+    refresh_interval = 1.0
+
+    def __init__(self, path=None, mirror_path=None):
+        self.path = str(path or state_path('archive.sqlite3'))
+        self.mirror_path = str(mirror_path or state_path('archive.txt'))
+        self.bloom_path = self.path + '.bloom'
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS archive (
+                extractor TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                url TEXT,
+                added REAL NOT NULL,
+                UNIQUE (extractor, video_id)
+            )''')
+        self._db.commit()
+
+        self._bloom = None
+        self._last_rowid = 0
+        self._last_refresh = 0
+        # Lines already in the mirror were recorded by earlier runs
+        try:
+            self._mirror_offset = os.path.getsize(self.mirror_path)
+        except OSError:
+            self._mirror_offset = 0
+        self._load_bloom()
+
+    @staticmethod
+    def _split(archive_id):
+        extractor, _, video_id = archive_id.partition(' ')
+        return extractor.lower(), video_id
+
+    def _load_bloom(self, rebuild=False):
+        """Load the Bloom filter snapshot, or rebuild it from every row in the database"""
+        with self._lock:
+            bloom, header = (None, None) if rebuild else BloomFilter.load(self.bloom_path)
+            if bloom is not None and header.get('database') == self.path:
+                # Only rows added since the snapshot need hashing
+                self._bloom = bloom
+                self._last_rowid = header['last_rowid']
+                self._pull_new_rows()
+                if self._bloom.count <= self._bloom.capacity:
+                    return
+
+            total = self._db.execute('SELECT COUNT(*) FROM archive').fetchone()[0]
+            # Leave room to grow before the filter has to be rebuilt
+            self._bloom = BloomFilter(capacity=max(100000, total * 2))
+            self._last_rowid = 0
+            self._pull_new_rows()
+            self._save_bloom()
+
+    def _save_bloom(self):
+        try:
+            self._bloom.save(self.bloom_path, database=self.path, last_rowid=self._last_rowid)
+        except OSError:
+            pass
+
+    def _pull_new_rows(self):
+        """Add rows inserted since the last look (by us or another process) to the filter"""
+        rows = self._db.execute(
+            'SELECT rowid, extractor, video_id FROM archive WHERE rowid > ? ORDER BY rowid',
+            (self._last_rowid,))
+        for rowid, extractor, video_id in rows:
+            self._bloom.add(f"{extractor} {video_id}")
+            self._last_rowid = rowid
+        self._last_refresh = time.time()
+
+    def __bool__(self):
+        # yt-dlp skips archive checks entirely for an empty (falsy) archive
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM archive').fetchone()[0]
+
+    def __contains__(self, archive_id):
+        if not archive_id:
+            # yt-dlp asks about entries it cannot build an id for yet
+            return False
+        extractor, video_id = self._split(archive_id)
+        key = f"{extractor} {video_id}"
+        with self._lock:
+            if key not in self._bloom:
+                if time.time() - self._last_refresh < self.refresh_interval:
+                    return False
+                self._pull_new_rows()
+                if key not in self._bloom:
+                    return False
+            # Possible hit: the database has the final word
+            row = self._db.execute(
+                'SELECT 1 FROM archive WHERE extractor = ? AND video_id = ?',
+                (extractor, video_id)).fetchone()
+        return row is not None
+
+    def contains(self, extractor, video_id):
+        """Return True if (extractor, video_id) was downloaded before"""
+        return f"{extractor} {video_id}" in self
+
+    def add(self, archive_id, url=None):
+        """Record a downloaded item (called by yt-dlp after each download)"""
+        self._record(archive_id, url)
+        try:
+            with open(self.mirror_path, 'a', encoding='utf-8') as f:
+                f.write(archive_id + '\n')
+        except OSError:
+            pass
+
+    def _record(self, archive_id, url=None):
+        extractor, video_id = self._split(archive_id)
+        if not video_id:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR IGNORE INTO archive (extractor, video_id, url, added) VALUES (?, ?, ?, ?)',
+                (extractor, video_id, url, time.time()))
+            self._db.commit()
+            self._pull_new_rows()
+            full = self._bloom.count > self._bloom.capacity
+        if full:
+            # Past its capacity the false positive rate climbs; resize
+            self._load_bloom(rebuild=True)
+
+    def record(self, extractor, video_id, url=None):
+        """Record (extractor, video_id) as downloaded"""
+        self.add(f"{extractor} {video_id}", url)
+
+    def import_mirror(self):
+        """Import lines the yt-dlp command line appended to the text mirror"""
+        try:
+            with open(self.mirror_path, 'r', encoding='utf-8') as f:
+                if os.fstat(f.fileno()).st_size < self._mirror_offset:
+                    self._mirror_offset = 0
+                f.seek(self._mirror_offset)
+                lines = f.readlines()
+                self._mirror_offset = f.tell()
+        except OSError:
+            return 0
+        for line in lines:
+            if line.strip():
+                self._record(line.strip())
+        return len(lines)
+
+    def close(self):
+        """Snapshot the Bloom filter for the next run and close the database"""
+        with self._lock:
+            self._save_bloom()
+            self._db.close()
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Return the process-wide download archive"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive()
+            atexit.register(_archive.close)
+        return _archive
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Download Error Taxonomy
+Sorts failed yt-dlp runs into transient (worth retrying after a backoff),
+permanent (removed, private, unsupported), auth-required and geo-blocked
+failures. URLs that failed for a reason that will not go away by itself
+are kept in a negative cache for a while, so they are skipped before a
+worker spends a slot on them again
+"""
+
+import random
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+
+from local_state import state_path
+from metadata_cache import canonical_url
+
+
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+AUTH = 'auth'
+GEO = 'geo'
+
+# Checked in order: rate limiting and network trouble first, since their
+# messages can also mention logins or availability
+ERROR_PATTERNS = [
+    (TRANSIENT, re.compile(
+        r'HTTP Error (429|5\d\d)|Too Many Requests|rate.?limit|timed? ?out|'
+        r'Connection (reset|refused|aborted)|Temporary failure|Remote end closed|'
+        r'IncompleteRead|try again later|captcha|not a bot|download stalled', re.IGNORECASE)),
+    (GEO, re.compile(
+        r'not (made this video )?available in your (country|region|location)|'
+        r'geo.?restrict|geo.?block|blocked (it )?in your (country|region)|'
+        r'HTTP Error 451', re.IGNORECASE)),
+    (AUTH, re.compile(
+        r'login required|log ?in to|sign in|private video|members.only|'
+        r'requires? (authentication|an account|subscription|payment)|--cookies|'
+        r'only available for registered users|HTTP Error 401|age.restricted|'
+        r'confirm your age', re.IGNORECASE)),
+    (PERMANENT, re.compile(
+        r'Video unavailable|has been removed|no longer available|does not exist|'
+        r'HTTP Error (404|410)|Unsupported URL|is not a valid URL|account.{0,20}terminated|'
+        r'copyright|This (video|content|post) (is|has been) (deleted|unavailable)|'
+        r'Requested format is not available|ffmpeg is not installed|exceeded its deadline', re.IGNORECASE)),
+]
+
+# Permanent for the command that was run, not for the URL: another format,
+# a fixed setup or a longer deadline can still work, so these are never cached
+COMMAND_ERRORS = re.compile(
+    r'Requested format is not available|ffmpeg is not installed|no such option|exceeded its deadline',
+    re.IGNORECASE)
+
+# How long each kind of failure keeps a URL from being tried again
+NEGATIVE_TTLS = {
+    PERMANENT: 7 * 86400,
+    GEO: 86400,
+    AUTH: 12 * 3600
+}
+
+# Options that change whether an auth/geo failure still applies
+AUTH_OPTIONS = ('--cookies', '--cookies-from-browser', '-u', '--username', '--netrc')
+GEO_OPTIONS = ('--proxy', '--geo-verification-proxy', '--xff')
+
+
+def classify_error(message, returncode=1):
+    """Return the category of a failed run from its error text and exit code
+
+    Exit code 101 (a download cancelled on purpose, e.g. --max-downloads)
+    is not a failure and returns None; bad options (2) are permanent.
+    Errors nothing matches are treated as transient.
+    """
+    if returncode == 101:
+        return None
+    if returncode == 2:
+        return PERMANENT
+    for category, pattern in ERROR_PATTERNS:
+        if pattern.search(message or ''):
+            return category
+    return TRANSIENT
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """Return the seconds to wait before retry number attempt (0-based)
+
+    Exponential with "equal jitter": half the step is fixed and half is
+    random, so retries of many jobs failing together spread out.
+    """
+    step = min(cap, base * 2 ** attempt)
+    return step / 2 + random.uniform(0, step / 2)
+
+
+class DownloadFailure(subprocess.CalledProcessError):
+    """CalledProcessError that also says what kind of failure it was"""
+
+    def __init__(self, returncode, cmd, category, reason=None, output=None, stderr=None, cached=False):
+        super().__init__(returncode, cmd, output, stderr if stderr is not None else reason)
+        self.category = category
+        self.reason = reason
+        self.cached = cached
+
+    def __str__(self):
+        if self.cached:
+            return f"skipped, known {self.category} failure: {self.reason}"
+        return f"{super().__str__()} ({self.category})"
+
+
+def error_reason(text):
+    """Return the line of yt-dlp output that best explains a failure"""
+    lines = [line.strip() for line in (text or '').splitlines() if line.strip()]
+    errors = [line for line in lines if line.startswith('ERROR')]
+    return (errors or lines or [None])[-1]
+
+
+def cacheable(url, reason, returncode=1):
+    """Return whether a failure says something lasting about url itself
+
+    Not when the command was at fault (bad options, a format that does
+    not exist), nor when a playlist run stopped at one bad entry: yt-dlp
+    prefixes errors with the id of the item that failed, and that has to
+    be the URL's own.
+    """
+    if returncode == 2 or COMMAND_ERRORS.search(reason or ''):
+        return False
+    match = re.search(r'ERROR: \[[^\]]+\] ([^:\s]+):', reason or '')
+    return match is None or match.group(1) in url
+
+
+class NegativeCache:
+    def __init__(self, path=None):
+        self.path = str(path or state_path('failures.sqlite3'))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS failures (
+                url TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                reason TEXT,
+                expires REAL NOT NULL
+            )''')
+        self._db.commit()
+
+    def get(self, url, cmd=None):
+        """Return (category, reason, expires) if url is known to fail, else None
+
+        Auth failures are ignored when cmd brings credentials, and geo
+        blocks when it brings a proxy, since the outcome may now differ.
+        """
+        key = canonical_url(url)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT category, reason, expires FROM failures WHERE url = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[2] <= time.time():
+                self._db.execute('DELETE FROM failures WHERE url = ?', (key,))
+                self._db.commit()
+                return None
+        category = row[0]
+        if cmd and ((category == AUTH and any(o in cmd for o in AUTH_OPTIONS)) or
+                    (category == GEO and any(o in cmd for o in GEO_OPTIONS))):
+            return None
+        return row
+
+    def put(self, url, category, reason=None, ttl=None):
+        """Remember that url failed; categories without a TTL are not stored"""
+        ttl = ttl or NEGATIVE_TTLS.get(category)
+        if not ttl:
+            return
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)',
+                             (canonical_url(url), category, reason, time.time() + ttl))
+            self._db.commit()
+
+    def forget(self, url):
+        """Drop url from the cache so the next run tries it again"""
+        with self._lock:
+            self._db.execute('DELETE FROM failures WHERE url = ?', (canonical_url(url),))
+            self._db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_negative_cache():
+    """Return the process-wide negative cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = NegativeCache()
+        return _cache
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Format Catalog
+Structured view of the formats a video offers, built from its extracted
+info dict, and a ranking engine that picks the smallest format (or video +
+audio pair) meeting a requested resolution, codec and bitrate. The chosen
+format ids are passed to yt-dlp as an exact -f selector, so the download
+starts with a format that exists instead of guessing and falling back
+"""
+
+import re
+import shutil
+import threading
+from collections import OrderedDict
+
+from metadata_cache import canonical_url
+
+
+# Codec names users type, mapped to the prefixes yt-dlp reports
+CODEC_ALIASES = {
+    'h264': ('avc1', 'h264'),
+    'avc': ('avc1', 'h264'),
+    'h265': ('hvc1', 'hev1', 'h265'),
+    'hevc': ('hvc1', 'hev1', 'h265'),
+    'vp9': ('vp9', 'vp09'),
+    'av1': ('av01',),
+}
+
+# Audio bitrate (kbit/s) a merged download aims for
+AUDIO_TARGET_ABR = 160
+
+
+def parse_quality(quality, best_height=None):
+    """Turn a quality string into (mode, max_height)
+
+    mode is 'video', 'audio' or 'worst'; max_height is None for no limit.
+    'best' is capped at best_height, matching each downloader's old default.
+    """
+    quality = str(quality or 'best').lower()
+    if quality == 'audio':
+        return 'audio', None
+    if quality == 'worst':
+        return 'worst', None
+    match = re.match(r'(\d+)p?$', quality)
+    if match:
+        return 'video', int(match.group(1))
+    return 'video', best_height
+
+
+def generic_selector(quality, best_height=None, ext=None):
+    """Return the plain yt-dlp selector for a quality, used when no catalog is available"""
+    mode, max_height = parse_quality(quality, best_height)
+    if mode == 'audio':
+        return 'bestaudio/best'
+    if mode == 'worst':
+        return 'worst'
+    selectors = []
+    limit = f"[height<={max_height}]" if max_height else ''
+    if ext:
+        selectors.append(f"best{limit}[ext={ext}]")
+    if limit:
+        selectors.append(f"best{limit}")
+    selectors.append('best')
+    return '/'.join(selectors)
+
+
+def _codec_matches(vcodec, codec):
+    prefixes = CODEC_ALIASES.get(codec.lower(), (codec.lower(),))
+    return (vcodec or '').lower().startswith(prefixes)
+
+
+class FormatCatalog:
+    """The formats of one video, split into muxed, video-only and audio-only"""
+
+    def __init__(self, info):
+        self.video_id = info.get('id')
+        self.duration = info.get('duration') or 0
+        self.muxed = []
+        self.video_only = []
+        self.audio_only = []
+        for order, f in enumerate(info.get('formats') or []):
+            entry = self._entry(f, order)
+            vcodec, acodec = f.get('vcodec'), f.get('acodec')
+            if vcodec == 'none' and acodec == 'none':
+                # Storyboards, thumbnails and the like
+                continue
+            if vcodec == 'none':
+                self.audio_only.append(entry)
+            elif acodec == 'none':
+                self.video_only.append(entry)
+            else:
+                # Unknown codecs are treated as a complete file, like yt-dlp does
+                self.muxed.append(entry)
+
+    def _entry(self, f, order):
+        tbr = f.get('tbr') or ((f.get('vbr') or 0) + (f.get('abr') or 0)) or None
+        size = f.get('filesize') or f.get('filesize_approx')
+        if not size and tbr and self.duration:
+            size = int(tbr * 125 * self.duration)
+        return {
+            'format_id': str(f.get('format_id')),
+            'ext': f.get('ext'),
+            'height': f.get('height'),
+            'width': f.get('width'),
+            'fps': f.get('fps'),
+            'vcodec': f.get('vcodec'),
+            'acodec': f.get('acodec'),
+            'abr': f.get('abr'),
+            'tbr': tbr,
+            'size': size,
+            'protocol': f.get('protocol'),
+            # yt-dlp lists formats worst to best
+            'order': order
+        }
+
+    def __len__(self):
+        return len(self.muxed) + len(self.video_only) + len(self.audio_only)
+
+    def formats(self):
+        """Return every downloadable format, ordered by height then size"""
+        return sorted(self.muxed + self.video_only + self.audio_only,
+                      key=lambda e: (e['height'] or 0, e['size'] or 0))
+
+    @staticmethod
+    def _size_key(entry):
+        # Unknown sizes rank after known ones, in yt-dlp's own order
+        return (entry['size'] is None, entry['size'] or 0, entry['order'])
+
+    def _pick_audio(self, max_abr=AUDIO_TARGET_ABR):
+        """Return the audio format closest to max_abr from below (smallest as last resort)"""
+        if not self.audio_only:
+            return None
+        fitting = [a for a in self.audio_only if (a['abr'] or a['tbr'] or 0) <= max_abr]
+        if fitting:
+            return max(fitting, key=lambda a: (a['abr'] or a['tbr'] or 0, -(a['size'] or 0)))
+        return min(self.audio_only, key=self._size_key)
+
+    def select(self, quality='best', codec=None, max_tbr=None, best_height=None, can_merge=None):
+        """Rank the formats and return the chosen format selector, or None
+
+        The highest available height within the requested one is chosen;
+        among the formats at that height (a muxed file, or a video-only
+        stream plus audio when ffmpeg can merge them) the smallest one that
+        matches codec and stays under max_tbr (kbit/s) wins. Codec and
+        bitrate are preferences: they are dropped if nothing satisfies them.
+        """
+        mode, max_height = parse_quality(quality, best_height)
+        if can_merge is None:
+            can_merge = shutil.which('ffmpeg') is not None
+
+        if mode == 'audio':
+            audio = self._pick_audio(max_tbr or AUDIO_TARGET_ABR)
+            return audio['format_id'] if audio else None
+
+        audio = self._pick_audio() if can_merge else None
+        candidates = [(m, None) for m in self.muxed]
+        if audio is not None:
+            candidates += [(v, audio) for v in self.video_only]
+        candidates = [(v, a) for v, a in candidates if v['height']]
+        if not candidates:
+            return None
+
+        def size(candidate):
+            video, audio = candidate
+            known = video['size'] is not None and (audio is None or audio['size'] is not None)
+            total = (video['size'] or 0) + ((audio or {}).get('size') or 0)
+            return (not known, total, video['order'])
+
+        if mode == 'worst':
+            video, audio = min(candidates, key=lambda c: (c[0]['height'],) + size(c))
+        else:
+            fitting = [c for c in candidates if max_height is None or c[0]['height'] <= max_height]
+            # Nothing that small: take the lowest resolution on offer
+            fitting = fitting or [c for c in candidates
+                                  if c[0]['height'] == min(v['height'] for v, _ in candidates)]
+            height = max(v['height'] for v, _ in fitting)
+            fitting = [c for c in fitting if c[0]['height'] == height]
+            for wanted in (codec and (lambda c: _codec_matches(c[0]['vcodec'], codec)),
+                           max_tbr and (lambda c: (c[0]['tbr'] or 0) + ((c[1] or {}).get('tbr') or 0) <= max_tbr)):
+                if wanted:
+                    fitting = [c for c in fitting if wanted(c)] or fitting
+            video, audio = min(fitting, key=size)
+
+        if audio is None:
+            return video['format_id']
+        return f"{video['format_id']}+{audio['format_id']}"
+
+    def table(self):
+        """Return the catalog as printable text, one format per line"""
+        lines = [f"{'ID':<24} {'EXT':<5} {'RES':>9} {'VCODEC':<14} {'ACODEC':<12} {'TBR':>6} {'SIZE':>10}"]
+        for e in self.formats():
+            if e['height']:
+                res = f"{e['width']}x{e['height']}" if e['width'] else f"{e['height']}p"
+            else:
+                res = 'audio'
+            size = f"{e['size'] / 1048576:.1f}MB" if e['size'] else '?'
+            tbr = f"{e['tbr']:.0f}k" if e['tbr'] else '?'
+            lines.append(f"{e['format_id'][:24]:<24} {(e['ext'] or '?'):<5} {res:>9} "
+                         f"{(e['vcodec'] or '?')[:14]:<14} {(e['acodec'] or '?')[:12]:<12} {tbr:>6} {size:>10}")
+        return '\n'.join(lines)
+
+
+_catalogs = OrderedDict()
+_catalogs_lock = threading.Lock()
+CATALOG_LIMIT = 256
+
+
+def get_catalog(engine, url):
+    """Return the format catalog of a URL, built once per extracted info dict
+
+    The info dict itself comes from the engine's metadata cache, so a
+    catalog is only rebuilt when the video has been extracted again.
+    """
+    info = engine.extract_info(url)
+    key = canonical_url(url)
+    with _catalogs_lock:
+        cached = _catalogs.get(key)
+        if cached is not None and cached[0] is info:
+            _catalogs.move_to_end(key)
+            return cached[1]
+    catalog = FormatCatalog(info)
+    with _catalogs_lock:
+        _catalogs[key] = (info, catalog)
+        _catalogs.move_to_end(key)
+        while len(_catalogs) > CATALOG_LIMIT:
+            _catalogs.popitem(last=False)
+    return catalog
+
+
+def choose_format(engine, url, quality='best', codec=None, max_tbr=None, best_height=None, ext=None):
+    """Return the -f selector for downloading url at a quality
+
+    The ranked choice comes first, with the plain height-limited selector
+    behind it in case the formats changed since extraction. Falls back to
+    just the plain selector if the URL cannot be extracted.
+    """
+    fallback = generic_selector(quality, best_height, ext)
+    try:
+        chosen = get_catalog(engine, url).select(quality, codec, max_tbr, best_height)
+    except Exception:
+        return fallback
+    return f"{chosen}/{fallback}" if chosen else fallback
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Fragment Concurrency
+How many HLS/DASH fragments yt-dlp fetches at once for each platform. The
+starting point is the registry's per-CDN 'fragments' value; a run that
+hits HTTP 429/503 halves the platform's limit for the following runs, and
+every clean run afterwards wins one fragment back up to the default
+"""
+
+import re
+import threading
+
+from platform_registry import get_platform
+
+
+# What yt-dlp reports when a CDN pushes back on segment requests
+THROTTLE_PATTERN = re.compile(
+    r'HTTP Error (429|503)|\b(Too Many Requests|Service Unavailable)\b', re.IGNORECASE)
+
+# Exponential sleep between retries of one fragment (seconds, capped)
+FRAGMENT_RETRY_SLEEP = 'fragment:exp=1:20'
+
+
+def throttle_signal(message):
+    """Return '429' or '503' if a yt-dlp message reports throttling, else None"""
+    match = THROTTLE_PATTERN.search(message or '')
+    if match is None:
+        return None
+    if match.group(1):
+        return match.group(1)
+    return '429' if match.group(2).lower() == 'too many requests' else '503'
+
+
+class FragmentLimits:
+    def __init__(self):
+        self._current = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default(platform):
+        entry = get_platform(platform)
+        return entry['fragments'] if entry else 1
+
+    def limit(self, platform):
+        """Return how many fragments a download from platform may fetch at once"""
+        with self._lock:
+            return self._current.get(platform, self.default(platform))
+
+    def apply(self, cmd, platform):
+        """Return cmd with the platform's fragment settings, unless it sets its own"""
+        if '-N' in cmd or '--concurrent-fragments' in cmd:
+            return cmd
+        fragments = self.limit(platform)
+        if fragments <= 1:
+            return cmd
+        extra = ['--concurrent-fragments', str(fragments)]
+        if '--retry-sleep' not in cmd:
+            extra += ['--retry-sleep', FRAGMENT_RETRY_SLEEP]
+        return cmd[:1] + extra + cmd[1:]
+
+    def report(self, platform, signals):
+        """Adjust a platform's limit after a run that saw the given throttle signals"""
+        default = self.default(platform)
+        with self._lock:
+            current = self._current.get(platform, default)
+            if not signals:
+                if current < default:
+                    self._current[platform] = current + 1
+                return
+            lowered = max(1, current // 2)
+            self._current[platform] = lowered
+        if lowered < current:
+            print(f"⚠️ {platform} is throttling (HTTP {signals[0]}); "
+                  f"fetching {lowered} fragments at a time from now on")
+
+
+_limits = None
+_limits_lock = threading.Lock()
+
+
+def get_fragment_limits():
+    """Return the process-wide fragment limits"""
+    global _limits
+    with _limits_lock:
+        if _limits is None:
+            _limits = FragmentLimits()
+        return _limits
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Direct HTTP Downloader
+Pooled requests.Session for direct file links (Discord CDN attachments and
+other plain URLs): keep-alive connections shared by concurrent workers, with
+aggregate throughput accounting for bulk runs. Large files on servers that
+accept byte ranges are fetched over several connections at once, and
+interrupted downloads resume from a .part file and its journal. Every
+download draws from the shared bandwidth scheduler and waits for a slot
+under its platform's adaptive concurrency limit
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from adaptive_concurrency import get_concurrency, limit_key
+from bandwidth import get_bandwidth
+from platform_index import classify
+
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+# Most connections any one host gets at once, across every download in the
+# process; hosts not listed use DEFAULT_HOST_CONNECTIONS
+HOST_CONNECTION_LIMITS = {
+    'cdn.discordapp.com': 6,
+    'media.discordapp.net': 6
+}
+DEFAULT_HOST_CONNECTIONS = 4
+
+# Files smaller than this are not worth splitting
+RANGED_MIN_SIZE = 16 * 1024 * 1024
+RANGED_MIN_PART = 4 * 1024 * 1024
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def host_slots(host):
+    """Return the semaphore capping concurrent connections to a host"""
+    with _host_slots_lock:
+        slots = _host_slots.get(host)
+        if slots is None:
+            slots = _host_slots[host] = threading.BoundedSemaphore(
+                HOST_CONNECTION_LIMITS.get(host, DEFAULT_HOST_CONNECTIONS))
+        return slots
+
+
+def split_ranges(size, parts, min_part=RANGED_MIN_PART, offset=0):
+    """Split [offset, offset + size) into at most parts inclusive (start, end) byte ranges"""
+    parts = max(1, min(parts, size // max(min_part, 1) or 1))
+    step = -(-size // parts)
+    return [(offset + start, offset + min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+def write_at(fd, data, offset):
+    """Positional write that does not move a shared file offset"""
+    while data:
+        written = os.pwrite(fd, data, offset)
+        data = data[written:]
+        offset += written
+
+
+class RangeNotSupported(Exception):
+    """The server ignored a Range request; fall back to a single stream"""
+
+
+class PartJournal:
+    """Progress journal for a .part file
+
+    Kept next to the output as <name>.part.json: the URL (without its query,
+    so re-signed CDN links still match), the size, the ETag/Last-Modified
+    validators and the byte ranges already written. A restarted download
+    resumes only when all of them match the server's current answer.
+    """
+
+    save_interval = 1.0
+
+    def __init__(self, output_path):
+        self.output_path = Path(output_path)
+        self.part_path = self.output_path.with_name(self.output_path.name + '.part')
+        self.path = self.output_path.with_name(self.output_path.name + '.part.json')
+        self.state = None
+        self._lock = threading.Lock()
+        self._last_save = 0
+
+    @staticmethod
+    def _url_key(url):
+        return url.split('?', 1)[0]
+
+    def resume(self, url, size, etag, last_modified):
+        """Load an earlier attempt's journal; return True if it is safe to continue"""
+        if not (etag or last_modified):
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            if self.part_path.stat().st_size != size:
+                return False
+        except (OSError, ValueError):
+            return False
+
+        if (state.get('url') != self._url_key(url) or state.get('size') != size or
+                state.get('etag') != etag or state.get('last_modified') != last_modified):
+            return False
+        state['completed'] = [tuple(r) for r in state.get('completed', [])]
+        self.state = state
+        return True
+
+    def reset(self, url, size, etag, last_modified):
+        """Start a fresh journal and preallocate the .part file"""
+        self.state = {
+            'url': self._url_key(url),
+            'size': size,
+            'etag': etag,
+            'last_modified': last_modified,
+            'completed': []
+        }
+        with open(self.part_path, 'wb') as f:
+            f.truncate(size)
+        self.save(force=True)
+
+    def if_range(self):
+        """Validator for If-Range (weak ETags are not allowed there)"""
+        etag = self.state['etag']
+        if etag and not etag.startswith('W/'):
+            return etag
+        return self.state['last_modified']
+
+    def add(self, start, end):
+        """Record that bytes start..end (inclusive) are on disk"""
+        with self._lock:
+            merged = []
+            for a, b in sorted(self.state['completed'] + [(start, end)]):
+                if merged and a <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+                else:
+                    merged.append((a, b))
+            self.state['completed'] = merged
+        self.save()
+
+    def completed_bytes(self):
+        with self._lock:
+            return sum(b - a + 1 for a, b in self.state['completed'])
+
+    def missing(self):
+        """Return the inclusive byte ranges not written yet"""
+        with self._lock:
+            gaps = []
+            position = 0
+            for a, b in self.state['completed']:
+                if a > position:
+                    gaps.append((position, a - 1))
+                position = max(position, b + 1)
+            if position < self.state['size']:
+                gaps.append((position, self.state['size'] - 1))
+            return gaps
+
+    def save(self, force=False):
+        """Write the journal, at most once per save_interval unless forced"""
+        now = time.time()
+        if not force and now - self._last_save < self.save_interval:
+            return
+        with self._lock:
+            self._last_save = now
+            temp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(temp_path, self.path)
+
+    def finish(self):
+        """Move the completed .part file into place and drop the journal"""
+        os.replace(self.part_path, self.output_path)
+        self.discard_journal()
+
+    def discard_journal(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def format_bytes(size):
+    """Return a human readable size, e.g. 12.3 MB"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{int(size)} B"
+        size /= 1024
+
+
+class TransferStats:
+    """Thread-safe byte and file counters for a bulk run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = time.time()
+        self.bytes = 0
+        self.files = 0
+        self.failed = 0
+
+    def add(self, nbytes, ok=True):
+        with self._lock:
+            self.bytes += nbytes
+            if ok:
+                self.files += 1
+            else:
+                self.failed += 1
+
+    def elapsed(self):
+        return max(time.time() - self.start, 1e-6)
+
+    def throughput(self):
+        """Return the aggregate rate in bytes per second"""
+        return self.bytes / self.elapsed()
+
+    def summary(self):
+        return (f"{self.files} files, {format_bytes(self.bytes)} in {self.elapsed():.1f}s "
+                f"({format_bytes(self.throughput())}/s), {self.failed} failed")
+
+
+def probed_size(response):
+    """Return the full size of a file from the answer to a Range probe (0 if unknown)"""
+    if response.status_code != 206:
+        return 0
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else 0
+
+
+class HttpDownloader:
+    def __init__(self, pool_size=16, chunk_size=1024 * 1024, timeout=(10, 60), connections=4):
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # Parallel ranged connections per large file (1 disables splitting)
+        self.connections = max(1, connections)
+        # One session for every worker: connections to the same host are
+        # kept alive and reused instead of paying TCP/TLS setup per file
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+    def download(self, url, output_path):
+        """Download url to output_path and return the number of bytes fetched
+
+        Data goes to <output_path>.part and is moved into place when done.
+        On servers that accept byte ranges, progress is journaled so an
+        interrupted download resumes where it stopped, and large files are
+        fetched over several ranged connections; anything else (or a server
+        that ignores Range) is streamed over one connection.
+        Raises requests.RequestException on HTTP or network errors.
+        A 429, 403 or 503 answer lowers how many downloads of the platform
+        run at once (see adaptive_concurrency.py).
+        """
+        platform = classify(url)
+        key = limit_key(url, platform)
+        concurrency = get_concurrency()
+        with concurrency.slot(key):
+            start = time.time()
+            try:
+                with get_bandwidth().job(platform) as bandwidth:
+                    written = self._download(url, output_path, bandwidth)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                concurrency.record_status(key, status, time.time() - start)
+                raise
+            except (requests.RequestException, OSError):
+                concurrency.record(key, False)
+                raise
+            concurrency.record(key, True, time.time() - start)
+            return written
+
+    def _download(self, url, output_path, bandwidth):
+        journal = PartJournal(output_path)
+        host = urlparse(url).hostname or ''
+        with host_slots(host):
+            # A one-byte probe tells whether the server takes ranges and how big
+            # the file is; a server that ignores Range answers with the whole file
+            response = self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=self.timeout)
+            try:
+                if response.status_code == 416:
+                    # Empty file: nothing to split or resume
+                    response.close()
+                    response = self.session.get(url, stream=True, timeout=self.timeout)
+                response.raise_for_status()
+                size = probed_size(response)
+                resumable = (size > 0 and hasattr(os, 'pwrite') and
+                             'Content-Encoding' not in response.headers)
+                if not resumable:
+                    if response.status_code == 206:
+                        response.close()
+                        response = self.session.get(url, stream=True, timeout=self.timeout)
+                        response.raise_for_status()
+                    journal.discard_journal()
+                    written = self._write_stream(response, journal.part_path, bandwidth)
+                    journal.finish()
+                    return written
+
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                # Read the probe byte so the connection goes back to the pool
+                response.content
+            finally:
+                response.close()
+
+        if journal.resume(url, size, etag, last_modified):
+            print(f"↩️  Resuming {journal.output_path.name} from "
+                  f"{format_bytes(journal.completed_bytes())} of {format_bytes(size)}")
+        else:
+            journal.reset(url, size, etag, last_modified)
+        resumed_from = journal.completed_bytes()
+        parts = self.connections if size >= RANGED_MIN_SIZE else 1
+
+        try:
+            self._download_missing(url, journal, host, parts, size, bandwidth)
+            return size - resumed_from
+        except RangeNotSupported as e:
+            print(f"⚠️  Server ignored the Range request ({e}), restarting over a single connection")
+            journal.discard_journal()
+            with host_slots(host):
+                with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    written = self._write_stream(response, journal.part_path, bandwidth)
+            journal.finish()
+            return written
+
+    def _download_missing(self, url, journal, host, parts, size, bandwidth):
+        try:
+            try:
+                self._fetch_ranges(url, journal, host, parts, bandwidth)
+            except (requests.RequestException, OSError) as e:
+                if parts == 1:
+                    raise
+                print(f"⚠️  Ranged download failed ({e}), resuming over a single connection")
+                self._fetch_ranges(url, journal, host, 1, bandwidth)
+        finally:
+            # Whatever made it to disk is kept for the next attempt
+            if journal.missing():
+                journal.save(force=True)
+
+        if journal.missing():
+            raise RangeNotSupported(f"got {journal.completed_bytes()} of {size} bytes")
+        journal.finish()
+
+    def _chunks(self, response, bandwidth):
+        """Yield the response body in chunks, at the pace the scheduler allows"""
+        # Smaller chunks keep a throttled stream smooth
+        chunk_size = self.chunk_size
+        if bandwidth.rate is not None:
+            chunk_size = max(16 * 1024, min(chunk_size, bandwidth.rate // 8))
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            bandwidth.throttle(len(chunk))
+            yield chunk
+
+    def _write_stream(self, response, part_path, bandwidth):
+        written = 0
+        with open(part_path, 'wb') as f:
+            for chunk in self._chunks(response, bandwidth):
+                f.write(chunk)
+                written += len(chunk)
+        return written
+
+    def _write_journaled(self, response, journal, offset, bandwidth):
+        fd = os.open(journal.part_path, os.O_WRONLY)
+        try:
+            for chunk in self._chunks(response, bandwidth):
+                write_at(fd, chunk, offset)
+                journal.add(offset, offset + len(chunk) - 1)
+                offset += len(chunk)
+        finally:
+            os.close(fd)
+
+    def _fetch_ranges(self, url, journal, host, parts, bandwidth):
+        ranges = []
+        for start, end in journal.missing():
+            ranges.extend(split_ranges(end - start + 1, parts, offset=start))
+        if not ranges:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(parts, len(ranges))) as executor:
+            futures = [executor.submit(self._fetch_range, url, journal, start, end, host, bandwidth)
+                       for start, end in ranges]
+            for future in futures:
+                future.result()
+
+    def _fetch_range(self, url, journal, start, end, host, bandwidth):
+        headers = {'Range': f'bytes={start}-{end}'}
+        validator = journal.if_range()
+        if validator:
+            # The server sends the whole file (200) if it changed since
+            headers['If-Range'] = validator
+        with host_slots(host):
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise RangeNotSupported(f"server answered {response.status_code} to a Range request")
+                self._write_journaled(response, journal, start, bandwidth)
+
+    def download_many(self, jobs, workers=4, on_done=None):
+        """Download (url, output_path) pairs concurrently
+
+        on_done(result) is called as each file finishes. Returns the result
+        dicts (url, path, ok, bytes, error, elapsed) in completion order and
+        the TransferStats of the run.
+        """
+        stats = TransferStats()
+        results = []
+
+        def fetch(url, output_path):
+            start = time.time()
+            try:
+                with get_bandwidth().bulk():
+                    written = self.download(url, output_path)
+                error = None
+            except (requests.RequestException, OSError) as e:
+                written = 0
+                error = str(e)
+            stats.add(written, ok=error is None)
+            return {
+                'url': url,
+                'path': output_path,
+                'ok': error is None,
+                'bytes': written,
+                'error': error,
+                'elapsed': time.time() - start
+            }
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(fetch, url, path) for url, path in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_done:
+                    on_done(result)
+        return results, stats
+
+    def close(self):
+        self.session.close()
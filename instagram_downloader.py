@@ -8,19 +8,20 @@ import os
 import sys
 import argparse
 import subprocess
-import json
 from pathlib import Path
 
+from source_sync import sync_source
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class InstagramDownloader:
     def __init__(self, download_path="./instagram_downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed or not found in PATH")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -28,12 +29,7 @@ class InstagramDownloader:
     def get_media_info(self, url):
         """Get Instagram media information without downloading"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse the first line of JSON output
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Instagram Media'),
@@ -106,7 +102,7 @@ class InstagramDownloader:
                 print("-" * 50)
             
             # Run the download command
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -115,8 +111,11 @@ class InstagramDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_user_posts(self, username, max_downloads=10):
-        """Download recent posts from a user (public profiles only)"""
+    def download_user_posts(self, username, max_downloads=10, sync=False):
+        """Download recent posts from a user (public profiles only)
+
+        sync=True only fetches items newer than the last sync of this source
+        """
         profile_url = f"https://www.instagram.com/{username}/"
         
         cmd = [
@@ -131,7 +130,10 @@ class InstagramDownloader:
 
         try:
             print(f"Downloading recent posts from @{username}...")
-            result = subprocess.run(cmd, check=True)
+            if sync:
+                sync_source(self.engine, cmd)
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ User posts download completed!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed with exit code {e.returncode}")
@@ -152,6 +154,8 @@ def main():
     parser.add_argument('-u', '--user', help='Download recent posts from username')
     parser.add_argument('-n', '--number', type=int, default=10,
                         help='Number of posts to download from user (default: 10)')
+    parser.add_argument('--sync', action='store_true',
+                        help='With --user, only download posts newer than the last sync')
     parser.add_argument('--info', action='store_true',
                         help='Show media information without downloading')
     
@@ -166,7 +170,7 @@ def main():
         print(f"👤 Username: @{args.user}")
         print(f"📊 Max posts: {args.number}")
         print("-" * 50)
-        downloader.download_user_posts(args.user, args.number)
+        downloader.download_user_posts(args.user, args.number, args.sync)
         return
     
     if not args.url:
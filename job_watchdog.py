@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Job Watchdog
+Supervises running yt-dlp jobs: a job whose download makes no progress
+for a while is stopped (the engine then resumes it from its .part file),
+and every job has a hard wall-clock deadline for its class, so a stalled
+CDN or a live stream passed as a video cannot hold a worker forever.
+
+Limits can be changed from the environment, e.g.
+    SMDL_STALL_TIMEOUT=300
+    SMDL_JOB_DEADLINES=video=2h,playlist=12h
+"""
+
+import os
+import re
+import signal
+import threading
+import time
+
+
+# Hard wall-clock limits per job class (seconds)
+JOB_DEADLINES = {
+    'extract': 5 * 60,
+    'video': 4 * 3600,
+    'playlist': 24 * 3600,
+    'live': 12 * 3600
+}
+
+# Seconds a download may go without progress; live jobs may sit waiting
+# for the stream to start, so they are only held to their deadline
+STALL_TIMEOUT = 300
+NO_STALL_CHECK = {'extract', 'live'}
+
+_EXTRACT_OPTIONS = {'-j', '--dump-json', '-J', '--dump-single-json', '--flat-playlist', '-s', '--simulate'}
+_LIVE_OPTIONS = {'--live-from-start', '--wait-for-video'}
+_PLAYLIST_OPTIONS = {'--yes-playlist', '--playlist-start', '--playlist-end', '--playlist-items', '-I'}
+_PLAYLIST_URL = re.compile(r'[?&]list=|/playlist|/channel/|/c/|/user/|/@[^/]+/?$|/videos/?$', re.IGNORECASE)
+
+# yt-dlp output that is not progress: retrying the same bytes is not moving
+_NOT_PROGRESS = re.compile(r'Got error|Retrying|ERROR|WARNING', re.IGNORECASE)
+_DOWNLOAD_PROGRESS = re.compile(r'^\[download\]\s+([\d.]+)(%|\s*[KMGT]?i?B\b)')
+_DESTINATION = re.compile(r'^\[download\] Destination: (.+)$')
+_UNITS = {'B': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4,
+          'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4}
+
+
+def parse_duration(value):
+    """Parse a duration like '90', '30m' or '2h' into seconds"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([smhd]?)\s*', str(value))
+    if match is None:
+        raise ValueError(f"invalid duration: {value!r}")
+    return float(match.group(1)) * {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+
+
+def _deadlines_from_env():
+    deadlines = dict(JOB_DEADLINES)
+    for item in os.environ.get('SMDL_JOB_DEADLINES', '').split(','):
+        if '=' in item:
+            job_class, value = item.split('=', 1)
+            deadlines[job_class.strip()] = parse_duration(value)
+    return deadlines
+
+
+def _stall_timeout_from_env():
+    value = os.environ.get('SMDL_STALL_TIMEOUT')
+    return parse_duration(value) if value else STALL_TIMEOUT
+
+
+def job_class(cmd):
+    """Guess the class of a yt-dlp command line: extract, live, playlist or video"""
+    options = set(cmd[:-1])
+    if options & _EXTRACT_OPTIONS:
+        return 'extract'
+    if options & _LIVE_OPTIONS:
+        return 'live'
+    if '--no-playlist' in options:
+        return 'video'
+    if options & _PLAYLIST_OPTIONS or _PLAYLIST_URL.search(cmd[-1] if len(cmd) > 1 else ''):
+        return 'playlist'
+    return 'video'
+
+
+def kill_job(process):
+    """Kill a job's process and, if it leads its own process group, everything it started
+
+    Works for subprocess.Popen and asyncio processes alike.
+    """
+    try:
+        if os.name == 'posix' and os.getpgid(process.pid) == process.pid:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class JobWatch:
+    """Progress and deadline tracking for one running job
+
+    Feed it progress (progress(), on_line() or the hooks); start() runs
+    a monitor thread that calls on_expire(reason) once the job stalls or
+    runs past its deadline. reason stays set so the caller can tell a
+    job that was stopped from one that failed by itself.
+    """
+
+    def __init__(self, job_class='video', deadline=None, stall_timeout=None):
+        self.job_class = job_class
+        self.deadline = deadline or _deadlines_from_env().get(job_class) or JOB_DEADLINES['video']
+        if stall_timeout is None and job_class not in NO_STALL_CHECK:
+            stall_timeout = _stall_timeout_from_env()
+        self.stall_timeout = stall_timeout
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self.reason = None
+        self._marker = None
+        self._reached = {}
+        self._seen = set()
+        self._file = None
+        self._done = threading.Event()
+
+    def progress(self, marker=None):
+        """Note that the job moved on; marker must change with every real step"""
+        if marker is None or marker != self._marker:
+            self._marker = marker
+            self.last_progress = time.monotonic()
+
+    def advance(self, key, amount):
+        """Note how far the download of key (a file) has got
+
+        Only a new high-water mark counts: a download that keeps failing
+        and starting over from the same bytes is not moving.
+        """
+        if amount is None or amount <= self._reached.get(key, -1):
+            return
+        self._reached[key] = amount
+        self.progress((key, amount))
+
+    def on_line(self, line):
+        """Take one line of yt-dlp output as progress if it shows some"""
+        line = line.strip()
+        if not line or _NOT_PROGRESS.search(line):
+            return
+        destination = _DESTINATION.match(line)
+        if destination:
+            self._file = destination.group(1)
+            self.advance(self._file, 0)
+            return
+        match = _DOWNLOAD_PROGRESS.match(line)
+        if match:
+            number, unit = match.group(1), match.group(2).strip()
+            # Percentages and byte counts are never compared with each other
+            self.advance((self._file, unit == '%'), float(number) * _UNITS.get(unit, 1))
+        elif line not in self._seen:
+            # Anything else ([Merger], [ExtractAudio], the next playlist
+            # item...) is a new step, unless it is a retry repeating itself
+            self._seen.add(line)
+            self.progress(line)
+
+    def progress_hook(self, status):
+        """yt-dlp progress hook feeding the watch"""
+        if status.get('status') == 'downloading':
+            self.advance(status.get('filename'), status.get('downloaded_bytes') or 0)
+        else:
+            self.progress((status.get('filename'), status.get('status')))
+
+    def postprocessor_hook(self, status):
+        """yt-dlp postprocessor hook feeding the watch"""
+        self.progress((status.get('postprocessor'), status.get('status')))
+
+    def check(self):
+        """Return why the job should be stopped now, or None"""
+        if self.reason:
+            return self.reason
+        now = time.monotonic()
+        if now - self.started > self.deadline:
+            self.reason = f"{self.job_class} job exceeded its deadline of {self.deadline:.0f}s"
+        elif self.stall_timeout and now - self.last_progress > self.stall_timeout:
+            self.reason = f"download stalled: no progress for {self.stall_timeout:.0f}s"
+        return self.reason
+
+    def start(self, on_expire=None, interval=1.0):
+        """Check the job every interval seconds from a daemon thread until stop()"""
+        def monitor():
+            while not self._done.wait(interval):
+                if self.check():
+                    if on_expire:
+                        on_expire(self.reason)
+                    return
+        threading.Thread(target=monitor, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._done.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
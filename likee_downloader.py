@@ -7,19 +7,20 @@ Downloads short videos from Likee using yt-dlp
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from source_sync import sync_source
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class LikeeDownloader:
     def __init__(self, download_path="./downloads/likee"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +28,7 @@ class LikeeDownloader:
     def get_video_info(self, url):
         """Get Likee video information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Likee Video'),
@@ -96,7 +93,7 @@ class LikeeDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Likee download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -105,8 +102,11 @@ class LikeeDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_user_videos(self, username, max_downloads=50):
-        """Download videos from Likee user"""
+    def download_user_videos(self, username, max_downloads=50, sync=False):
+        """Download videos from Likee user
+
+        sync=True only fetches items newer than the last sync of this source
+        """
         user_url = f"https://likee.video/@{username}"
         
         cmd = [
@@ -123,7 +123,10 @@ class LikeeDownloader:
         try:
             print(f"👤 Downloading videos from user: {username}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            if sync:
+                sync_source(self.engine, cmd)
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ User videos download completed!")
         except Exception as e:
             print(f"❌ User videos download failed: {e}")
@@ -146,7 +149,7 @@ class LikeeDownloader:
         try:
             print(f"#️⃣ Downloading videos from hashtag: #{hashtag}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd, archive=True)
             print("✅ Hashtag videos download completed!")
         except Exception as e:
             print(f"❌ Hashtag videos download failed: {e}")
@@ -159,7 +162,7 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("1. Single video: python3 likee_downloader.py <likee_url>")
-        print("2. User videos: python3 likee_downloader.py <username> user")
+        print("2. User videos: python3 likee_downloader.py <username> user [--sync]")
         print("3. Hashtag videos: python3 likee_downloader.py <hashtag> hashtag")
         print("\nExamples:")
         print("python3 likee_downloader.py 'https://likee.video/v/...'")
@@ -173,7 +176,7 @@ def main():
         # User videos download
         username = sys.argv[1]
         max_downloads = int(input("Max downloads [50]: ") or 50)
-        downloader.download_user_videos(username, max_downloads)
+        downloader.download_user_videos(username, max_downloads, sync='--sync' in sys.argv)
     elif len(sys.argv) >= 3 and sys.argv[2] == 'hashtag':
         # Hashtag videos download
         hashtag = sys.argv[1]
@@ -7,19 +7,20 @@ Downloads videos and content from LinkedIn using yt-dlp
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from format_catalog import choose_format, generic_selector
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class LinkedInDownloader:
     def __init__(self, download_path="./downloads/linkedin"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +28,7 @@ class LinkedInDownloader:
     def get_post_info(self, url):
         """Get LinkedIn post information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'LinkedIn Post'),
@@ -48,16 +45,7 @@ class LinkedInDownloader:
     def download_post(self, url, quality='best'):
         """Download LinkedIn post content"""
         
-        # Quality mapping for LinkedIn
-        quality_mapping = {
-            '720p': 'best[height<=720]',
-            '480p': 'best[height<=480]',
-            '360p': 'best[height<=360]',
-            'best': 'best',
-            'audio': 'bestaudio'
-        }
-        
-        format_selector = quality_mapping.get(quality, 'best')
+        format_selector = choose_format(self.engine, url, quality)
         
         cmd = [
             'yt-dlp',
@@ -84,7 +72,7 @@ class LinkedInDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ LinkedIn download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -97,14 +85,8 @@ class LinkedInDownloader:
     def download_with_cookies(self, url, cookies_file, quality='best'):
         """Download LinkedIn content with cookies for authentication"""
         
-        quality_mapping = {
-            '720p': 'best[height<=720]',
-            '480p': 'best[height<=480]',
-            '360p': 'best[height<=360]',
-            'best': 'best'
-        }
-        
-        format_selector = quality_mapping.get(quality, 'best')
+        # The catalog would need the cookies too; yt-dlp picks by height instead
+        format_selector = generic_selector(quality)
         
         cmd = [
             'yt-dlp',
@@ -121,7 +103,7 @@ class LinkedInDownloader:
             print(f"💼 Starting authenticated LinkedIn download...")
             print(f"🍪 Using cookies: {cookies_file}")
             
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Authenticated LinkedIn download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Local State Directory
+Where the downloaders keep caches and databases between runs
+(override with the SMDL_STATE_DIR environment variable)
+"""
+
+import os
+from pathlib import Path
+
+
+def state_dir():
+    """Return the state directory, creating it if needed"""
+    path = Path(os.environ.get('SMDL_STATE_DIR') or Path.home() / '.cache' / 'socialmedia_dl')
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def state_path(filename):
+    """Return the path of a file inside the state directory"""
+    return state_dir() / filename
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Metadata Cache
+On-disk cache of extracted info dicts (the `yt-dlp --dump-json` output),
+keyed by canonical URL. Entries expire after a per-platform TTL, the file is
+kept under a size budget by evicting least recently used entries, and the
+hottest entries are also held in memory
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from local_state import state_path
+from platform_index import classify
+from platform_registry import get_platform
+
+
+DEFAULT_TTL = 6 * 3600
+
+# Query parameters that never change what a URL points to
+TRACKING_PARAMS = {'si', 'feature', 'igshid', 'igsh', 'fbclid', 'gclid', 'ref', 'ref_src'}
+
+
+def canonical_url(url):
+    """Return a normalised form of a URL for use as a cache key"""
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'm.', 'mobile.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port:
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip('/') or '/'
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in TRACKING_PARAMS and not k.startswith('utm_')]
+
+    # Short links that carry the whole id in the path
+    if host == 'youtu.be' and path != '/':
+        host, query = 'youtube.com', [('v', path.lstrip('/'))] + query
+        path = '/watch'
+
+    return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+
+class MetadataCache:
+    def __init__(self, path=None, max_bytes=64 * 1024 * 1024, hot_entries=256):
+        self.path = str(path or state_path('metadata_cache.sqlite3'))
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self._hot = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS metadata (
+                url TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                fetched REAL NOT NULL,
+                accessed REAL NOT NULL,
+                size INTEGER NOT NULL,
+                info BLOB NOT NULL
+            )''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS metadata_accessed ON metadata (accessed)')
+        self._db.commit()
+
+    @staticmethod
+    def ttl_for(platform):
+        """Return how long (seconds) metadata of a platform stays fresh"""
+        entry = get_platform(platform)
+        return entry['metadata_ttl'] if entry else DEFAULT_TTL
+
+    def get(self, url):
+        """Return (info, fetched_at) for a fresh cached URL, or None"""
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                platform, fetched, info = entry
+                if now - fetched < self.ttl_for(platform):
+                    self._hot.move_to_end(key)
+                    return info, fetched
+                del self._hot[key]
+
+            row = self._db.execute(
+                'SELECT platform, fetched, info FROM metadata WHERE url = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            platform, fetched, blob = row
+            if now - fetched >= self.ttl_for(platform):
+                self._db.execute('DELETE FROM metadata WHERE url = ?', (key,))
+                self._db.commit()
+                return None
+
+            self._db.execute('UPDATE metadata SET accessed = ? WHERE url = ?', (now, key))
+            self._db.commit()
+            info = json.loads(zlib.decompress(blob))
+            self._remember_hot(key, platform, fetched, info)
+        return info, fetched
+
+    def put(self, url, info):
+        """Store the info dict extracted for a URL"""
+        key = canonical_url(url)
+        platform = classify(url)
+        if self.ttl_for(platform) <= 0:
+            return
+        now = time.time()
+        blob = zlib.compress(json.dumps(info).encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO metadata (url, platform, fetched, accessed, size, info) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, platform, now, now, len(blob), blob))
+            self._evict()
+            self._db.commit()
+            self._remember_hot(key, platform, now, info)
+
+    def _remember_hot(self, key, platform, fetched, info):
+        self._hot[key] = (platform, fetched, info)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under budget"""
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM metadata').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so every insert near the limit does not evict again
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for url, size in self._db.execute('SELECT url, size FROM metadata ORDER BY accessed'):
+            victims.append((url,))
+            freed += size
+            if freed >= target:
+                break
+        self._db.executemany('DELETE FROM metadata WHERE url = ?', victims)
+        for (url,) in victims:
+            self._hot.pop(url, None)
+
+    def invalidate(self, url):
+        """Forget a cached URL"""
+        key = canonical_url(url)
+        with self._lock:
+            self._hot.pop(key, None)
+            self._db.execute('DELETE FROM metadata WHERE url = ?', (key,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_metadata_cache():
+    """Return the process-wide metadata cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MetadataCache()
+        return _cache
@@ -5,110 +5,59 @@ Supports: LinkedIn, Pinterest, Rumble, Peertube, Triller, Likee, Snapchat, Disco
 """
 
 import os
+import re
 import sys
 import subprocess
-import json
 import argparse
 from pathlib import Path
-from urllib.parse import urlparse
+
+from adaptive_concurrency import pushback_signal
+from batch_downloader import BatchDownloader, read_url_file
+from download_errors import AUTH, GEO, PERMANENT
+from format_catalog import choose_format
+from platform_index import classify
+from parallel_playlist import download_playlist_parallel, playlist_succeeded
+from platform_registry import get_platform
+from ytdlp_engine import get_engine, ytdlp_available
 
 
 class MultiPlatformDownloader:
+    # Platform detection with emojis and support status (shared read-only registry)
+    PLATFORMS = {
+        name: get_platform(name)
+        for name in ['linkedin', 'pinterest', 'rumble', 'peertube', 'triller', 'likee', 'snapchat', 'discord']
+    }
+
+    UNKNOWN_PLATFORM = {
+        'emoji': '❓',
+        'supported': False,
+        'extractor': 'generic',
+        'info': 'Unknown platform'
+    }
+
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
     
     def detect_platform(self, url):
         """Detect platform from URL and return platform info"""
-        domain = urlparse(url).netloc.lower()
-        
-        # Platform detection with emojis and support status
-        platforms = {
-            'linkedin': {
-                'domains': ['linkedin.com', 'lnkd.in'],
-                'emoji': '💼',
-                'supported': True,
-                'extractor': 'linkedin',
-                'info': 'Professional network videos'
-            },
-            'pinterest': {
-                'domains': ['pinterest.com', 'pin.it'],
-                'emoji': '📌',
-                'supported': True,
-                'extractor': 'pinterest',
-                'info': 'Pin images and videos'
-            },
-            'rumble': {
-                'domains': ['rumble.com'],
-                'emoji': '🎯',
-                'supported': True,
-                'extractor': 'rumble',
-                'info': 'Video platform'
-            },
-            'peertube': {
-                'domains': ['peertube', 'tube.'],
-                'emoji': '🌐',
-                'supported': True,
-                'extractor': 'peertube',
-                'info': 'Decentralized video platform'
-            },
-            'triller': {
-                'domains': ['triller.co'],
-                'emoji': '🎵',
-                'supported': True,
-                'extractor': 'triller',
-                'info': 'Music video platform'
-            },
-            'likee': {
-                'domains': ['likee.video', 'likee.com'],
-                'emoji': '❤️',
-                'supported': True,
-                'extractor': 'likee',
-                'info': 'Short video platform'
-            },
-            'snapchat': {
-                'domains': ['snapchat.com', 'snap.com'],
-                'emoji': '👻',
-                'supported': False,
-                'extractor': 'snapchat',
-                'info': 'Stories and Spotlight (Limited support)'
-            },
-            'discord': {
-                'domains': ['discord.com', 'discord.gg'],
-                'emoji': '🎮',
-                'supported': False,
-                'extractor': 'discord',
-                'info': 'Chat platform (No video extractor)'
-            }
-        }
-        
-        for platform, config in platforms.items():
-            if any(d in domain for d in config['domains']):
-                return platform, config
+        platform = classify(url)
+        if platform in self.PLATFORMS:
+            return platform, self.PLATFORMS[platform]
         
-        return 'unknown', {
-            'emoji': '❓',
-            'supported': False,
-            'extractor': 'generic',
-            'info': 'Unknown platform'
-        }
+        return 'unknown', self.UNKNOWN_PLATFORM
 
     def get_media_info(self, url):
         """Get media information without downloading"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Unknown Media'),
@@ -156,15 +105,12 @@ class MultiPlatformDownloader:
                 '--audio-quality', '192K'
             ])
         else:
-            # Platform-specific quality settings
-            if platform in ['pinterest', 'linkedin']:
-                # These platforms may have limited quality options
-                format_selector = 'best[height<=720]/best'
-            elif platform == 'rumble':
-                # Rumble usually has good quality options
-                format_selector = f'best[height<={quality.replace("p", "")}]' if quality != 'best' else 'best'
-            else:
-                format_selector = 'best'
+            # Registry default caps 'best' (limited platforms at 720p)
+            cap = re.search(r'height<=(\d+)', config.get('format', ''))
+            ext = re.search(r'ext=(\w+)', config.get('format', ''))
+            format_selector = choose_format(self.engine, url, quality,
+                                            best_height=int(cap.group(1)) if cap else None,
+                                            ext=ext.group(1) if ext else None)
             
             cmd.extend(['--format', format_selector])
         
@@ -190,23 +136,49 @@ class MultiPlatformDownloader:
                 print("-" * 50)
             
             # Run the download command
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Download successful!")
             return True
                 
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed with exit code {e.returncode}")
-            print("💡 Possible issues:")
-            print("   - Content may be private or restricted")
-            print("   - Platform may require authentication")
-            print("   - Content may not be available for download")
+            category = getattr(e, 'category', None)
+            signal = pushback_signal(e.stderr if isinstance(e.stderr, str) else '')
+            if getattr(e, 'cached', False):
+                print(f"⏭️  Skipped: this URL failed for good recently ({category}): {e.reason}")
+            elif category == GEO:
+                print(f"🌍 Not available in your region: {e.reason}")
+                print("💡 A proxy or VPN in another region may help")
+            elif category == PERMANENT:
+                print(f"🗑️  Content is gone or unsupported: {e.reason}")
+            elif category == AUTH:
+                print(f"🔐 {platform.title()} requires a login for this: {e.reason}")
+                print("💡 Pass your browser cookies to download it")
+            elif signal in ('429', '503'):
+                print(f"🐢 {platform.title()} is rate limiting us (HTTP {signal}); "
+                      "fewer downloads will run at once, try again later")
+            elif signal in ('captcha', 'login'):
+                print(f"🔐 {platform.title()} wants a login or captcha before serving this; "
+                      "try again later or pass your browser cookies")
+            elif signal == '403':
+                print(f"⛔ {platform.title()} refused the request (HTTP 403); "
+                      "it may be rate limiting, geo-blocked or private")
+            else:
+                print("💡 Possible issues:")
+                print("   - Content may be private or restricted")
+                print("   - Platform may require authentication")
+                print("   - Content may not be available for download")
             return False
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
             return False
 
-    def download_playlist(self, url, max_downloads=20):
-        """Download playlist or channel videos"""
+    def download_playlist(self, url, max_downloads=20, workers=1):
+        """Download playlist or channel videos
+
+        workers > 1 enumerates the playlist first and downloads that many
+        entries at a time instead of one yt-dlp run going through them in turn
+        """
         platform, config = self.detect_platform(url)
         
         if not config['supported']:
@@ -229,7 +201,11 @@ class MultiPlatformDownloader:
         try:
             print(f"📋 Downloading playlist from {platform.upper()} {config['emoji']}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            if workers > 1:
+                if not playlist_succeeded(download_playlist_parallel(self.engine, cmd, workers)):
+                    return False
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ Playlist download completed!")
             return True
         except subprocess.CalledProcessError as e:
@@ -276,10 +252,16 @@ def main():
                         help='Download playlist/channel')
     parser.add_argument('--max-downloads', type=int, default=20,
                         help='Maximum number of downloads for playlist (default: 20)')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help='Enumerate the playlist first, then download N entries at a time (default: 1, serial)')
     parser.add_argument('--list-platforms', action='store_true',
                         help='List all supported platforms')
     parser.add_argument('--info', action='store_true',
                         help='Show media information without downloading')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Download every URL listed in FILE (one per line)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Maximum concurrent downloads in batch mode (default: 8)')
     
     args = parser.parse_args()
     
@@ -290,6 +272,12 @@ def main():
         downloader.list_supported_platforms()
         return
     
+    if args.batch:
+        batch = BatchDownloader(downloader.detect_platform, max_workers=args.workers)
+        batch.download_all(read_url_file(args.batch),
+                           lambda url: downloader.download_media(url, args.quality, args.format))
+        return
+    
     if not args.url:
         print("❌ Error: URL is required")
         print("Use --help for usage information or --list-platforms to see supported platforms")
@@ -316,7 +304,7 @@ def main():
     print("-" * 50)
     
     if args.playlist:
-        downloader.download_playlist(args.url, args.max_downloads)
+        downloader.download_playlist(args.url, args.max_downloads, args.parallel)
     else:
         downloader.download_media(args.url, args.quality, args.format)
 
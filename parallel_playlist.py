@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Parallel Playlist Download
+Two-phase playlist/channel download: a fast --flat-playlist enumeration,
+then every entry downloaded as its own job on the batch queue, with the
+playlist fields of the output template filled in so files land in the same
+%(playlist_title)s layout a single serial yt-dlp run would produce
+"""
+
+import re
+
+from batch_downloader import BatchDownloader
+from platform_index import classify
+
+# Optional import - only used for yt-dlp's own file name sanitising
+try:
+    from yt_dlp.utils import sanitize_filename
+except ImportError:
+    def sanitize_filename(name, restricted=False):
+        return re.sub(r'[/\\\\:*?"<>|\x00-\x1f]', '_', name).strip() or '_'
+
+
+# Options that only make sense for the whole playlist run
+_PLAYLIST_ONLY_OPTIONS = {'--playlist-end', '--playlist-start', '-I', '--playlist-items'}
+
+
+# A yt-dlp output template field with its conversion, e.g. %(playlist_index)03d
+_TEMPLATE_FIELD = re.compile(r'%\((?P<name>\w+)\)(?P<spec>[-#0 +]*\d*(?:\.\d+)?[diouxXeEfFgGcrs])')
+
+
+def _option(cmd, *names):
+    """Return the value given to the last of names in cmd, or None"""
+    value = None
+    for index, arg in enumerate(cmd[:-1]):
+        if arg in names and index + 1 < len(cmd) - 1:
+            value = cmd[index + 1]
+    return value
+
+
+def playlist_items(cmd):
+    """Return the -I/--playlist-items selection equivalent to cmd's range options, or None"""
+    items = _option(cmd, '-I', '--playlist-items')
+    if items:
+        return items
+    start = _option(cmd, '--playlist-start')
+    end = _option(cmd, '--playlist-end')
+    if start is None and end is None:
+        return None
+    return f"{start or 1}:{end or ''}"
+
+
+def fill_template(template, fields, widths=None):
+    """Fill fields into an output template the way yt-dlp would, leaving the rest
+
+    Each field goes through its own conversion spec (%(playlist_index)03d,
+    %(playlist_title).20s...); a plain %(name)s of a field in widths is
+    zero-padded to that width, as yt-dlp does for playlist_index.
+    """
+    widths = widths or {}
+
+    def substitute(match):
+        name, spec = match.group('name'), match.group('spec')
+        if name not in fields:
+            return match.group(0)
+        value = fields[name]
+        if spec == 's' and name in widths:
+            spec = f"0{widths[name]}d"
+        if spec[-1] in 'diouxXc' and not isinstance(value, int):
+            spec = spec[:-1] + 's'
+        elif spec[-1] == 's':
+            value = sanitize_filename(str(value))
+        try:
+            text = ('%' + spec) % value
+        except (TypeError, ValueError):
+            text = str(value)
+        return text.replace('%', '%%')
+
+    return _TEMPLATE_FIELD.sub(substitute, template)
+
+
+def entry_command(cmd, entry_url, fields, widths=None):
+    """Return cmd rewritten to download one entry with playlist fields fixed"""
+    entry_cmd = []
+    args = iter(cmd[:-1])
+    for arg in args:
+        if arg in _PLAYLIST_ONLY_OPTIONS:
+            next(args, None)
+            continue
+        if arg in ('-o', '--output'):
+            entry_cmd.extend([arg, fill_template(next(args), fields, widths)])
+            continue
+        entry_cmd.append(arg)
+    return entry_cmd + ['--no-playlist', entry_url]
+
+
+def download_playlist_parallel(engine, cmd, workers=4, archive=True):
+    """Download the playlist at cmd[-1] with its entries spread over workers
+
+    cmd is the command a serial download would run (URL last); its
+    --playlist-start/--playlist-end/-I selection is applied to the
+    enumeration. Returns the batch results, one dict per entry.
+    """
+    url = cmd[-1]
+    print("🔎 Enumerating playlist entries...")
+    playlist = engine.extract_playlist(url, items=playlist_items(cmd))
+    listed = playlist.get('entries') or []
+    # Positions in the whole playlist, which the selection may have skipped over
+    indices = playlist.get('requested_entries') or range(1, len(listed) + 1)
+    entries = [(index, e) for index, e in zip(indices, listed) if e and (e.get('url') or e.get('webpage_url'))]
+    if not entries:
+        print("❌ No playlist entries found")
+        return []
+
+    title = playlist.get('title') or playlist.get('id') or 'playlist'
+    print(f"📋 {title}: {len(entries)} entries")
+
+    count = playlist.get('playlist_count') or len(listed)
+    widths = {'playlist_index': len(str(max(index for index, _ in entries)))}
+    commands = {}
+    for index, entry in entries:
+        entry_url = entry.get('url') or entry['webpage_url']
+        fields = {
+            'playlist_title': title,
+            'playlist': title,
+            'playlist_id': playlist.get('id') or title,
+            'playlist_index': index,
+            'playlist_count': count,
+            'n_entries': len(listed)
+        }
+        commands[entry_url] = entry_command(cmd, entry_url, fields, widths)
+
+    batch = BatchDownloader(classify, max_workers=workers)
+    # Repeated entries collapse into one job
+    return batch.download_all(
+        list(commands),
+        lambda entry_url: engine.run(commands[entry_url], archive=archive))
+
+
+def playlist_succeeded(results):
+    """Return True if every entry in results downloaded, reporting the ones that didn't"""
+    failed = [result for result in results if not result['ok']]
+    if not results:
+        print("❌ Playlist download failed: nothing was downloaded")
+        return False
+    if failed:
+        print(f"❌ Playlist download incomplete: {len(failed)} of {len(results)} entries failed")
+        return False
+    return True
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+PeerTube REST API Client
+Talks to an instance's /api/v1 endpoints directly: pages through video
+lists concurrently, and picks a downloadable file from a video's own file
+list, so no extractor pass is needed per video
+"""
+
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+
+from http_downloader import USER_AGENT
+
+
+# The API refuses larger pages
+MAX_PAGE_SIZE = 100
+
+# Instances searched when no list is given
+POPULAR_INSTANCES = [
+    ("framapiaf.org", "French general instance"),
+    ("peertube.tv", "General PeerTube instance"),
+    ("tube.nuagelibre.fr", "French tech-focused"),
+    ("video.ploud.fr", "French general instance"),
+    ("peertube.social", "English general instance"),
+    ("tube.jeena.net", "Personal instance"),
+    ("peertube.linuxrocks.online", "Linux community"),
+    ("video.blender.org", "Blender Foundation")
+]
+
+
+def safe_name(name, limit=120):
+    """Return a name usable as a file or directory name"""
+    name = re.sub(r'[/\\:*?"<>|\x00-\x1f]', '_', str(name)).strip(' .')
+    return name[:limit] or '_'
+
+
+def parse_height(quality):
+    """Return the height limit for a quality string like '720p' (None for 'best')"""
+    match = re.match(r'(\d+)p?$', str(quality or ''))
+    return int(match.group(1)) if match else None
+
+
+def video_files(details):
+    """Return every file a video offers: web videos plus HLS playlist files"""
+    files = list(details.get('files') or [])
+    for playlist in details.get('streamingPlaylists') or []:
+        files.extend(playlist.get('files') or [])
+    return [f for f in files if f.get('fileDownloadUrl') or f.get('fileUrl')]
+
+
+def pick_file(details, max_height=None, max_size=None):
+    """Choose the file to download from a video's API details
+
+    Picks the highest resolution within max_height (and max_size bytes),
+    preferring the smaller file between equal resolutions. Falls back to
+    the smallest file when nothing fits the limits. Returns None if the
+    video offers no files (e.g. a live stream).
+    """
+    files = video_files(details)
+    if not files:
+        return None
+
+    def height(f):
+        return (f.get('resolution') or {}).get('id') or 0
+
+    fitting = [f for f in files
+               if (max_height is None or height(f) <= max_height) and
+               (max_size is None or (f.get('size') or 0) <= max_size) and
+               height(f) > 0]
+    if fitting:
+        return max(fitting, key=lambda f: (height(f), -(f.get('size') or 0)))
+    return min(files, key=lambda f: (f.get('size') or 0))
+
+
+def archive_ids(video):
+    """Return the ids yt-dlp's PeerTube extractor may archive a video under
+
+    It records the id found in the watch URL: the full UUID for
+    /videos/watch/<uuid> links, the short one for /w/<shortUUID> links.
+    """
+    return [video_id for video_id in (video.get('uuid'), video.get('shortUUID')) if video_id]
+
+
+def file_url(file_info):
+    return file_info.get('fileDownloadUrl') or file_info.get('fileUrl')
+
+
+class PeerTubeClient:
+    def __init__(self, instance_url, session=None, timeout=10, page_size=25, concurrency=4):
+        if '://' not in instance_url:
+            instance_url = 'https://' + instance_url
+        parsed = urlparse(instance_url)
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
+        self.instance = parsed.netloc
+        self.timeout = timeout
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.concurrency = max(1, concurrency)
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', USER_AGENT)
+
+    def get(self, path, params=None):
+        """GET an API path and return the decoded JSON"""
+        response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _page(self, path, params, start, count):
+        return self.get(path, dict(params, start=start, count=count))
+
+    def iter_videos(self, path='/api/v1/videos', params=None, max_items=20):
+        """Yield up to max_items video objects from a paginated list endpoint
+
+        The first page tells how many videos there are; the remaining pages
+        are then fetched concurrently and yielded in order as they arrive.
+        """
+        params = dict(params or {})
+        first = self._page(path, params, 0, min(self.page_size, max_items))
+        videos = first.get('data') or []
+        total = min(first.get('total', len(videos)), max_items)
+        yield from videos[:total]
+
+        starts = list(range(len(videos), total, self.page_size)) if videos else []
+        if not starts:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(starts))) as executor:
+            pages = [executor.submit(self._page, path, params, start, min(self.page_size, total - start))
+                     for start in starts]
+            for page in pages:
+                data = page.result().get('data') or []
+                if not data:
+                    break
+                yield from data
+
+    def trending(self, max_items=20):
+        """Yield the instance's trending videos"""
+        return self.iter_videos('/api/v1/videos', {'sort': '-trending'}, max_items)
+
+    def search(self, query, max_items=20, sort='-match'):
+        """Yield videos matching a search query on this instance"""
+        return self.iter_videos('/api/v1/search/videos', {'search': query, 'sort': sort}, max_items)
+
+    def video(self, video_id):
+        """Return the full details (including the file list) of a video"""
+        return self.get(f"/api/v1/videos/{video_id}")
+
+    def watch_url(self, video):
+        """Return the web page URL of a video object"""
+        return video.get('url') or f"{self.base_url}/w/{video.get('shortUUID') or video['uuid']}"
+
+
+def federated_search(query, instances=None, max_per_instance=10, timeout=8, on_error=None):
+    """Search many instances at once and yield (client, video) as results arrive
+
+    Every instance is queried concurrently; its results are yielded as soon
+    as its search returns, so fast instances are not held up by slow ones.
+    An instance gets timeout seconds for its whole search; stragglers past
+    that are abandoned and reported to on_error(instance, error) together
+    with instances that failed. Federated copies of the same video (same
+    UUID on several instances) are only yielded once.
+    """
+    instances = [i for i, _ in POPULAR_INSTANCES] if instances is None else list(instances)
+    if not instances:
+        return
+    session = requests.Session()
+    clients = [PeerTubeClient(instance, session=session, timeout=timeout,
+                              page_size=max_per_instance, concurrency=1)
+               for instance in instances]
+    executor = ThreadPoolExecutor(max_workers=min(16, len(clients)))
+    pending = {executor.submit(lambda c: list(c.search(query, max_per_instance)), client): client
+               for client in clients}
+    deadline = time.monotonic() + timeout
+    seen = set()
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                client = pending.pop(future)
+                try:
+                    videos = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    if on_error:
+                        on_error(client.instance, e)
+                    continue
+                for video in videos:
+                    uuid = video.get('uuid')
+                    if not uuid or uuid in seen:
+                        continue
+                    seen.add(uuid)
+                    yield client, video
+        for client in pending.values():
+            if on_error:
+                on_error(client.instance, TimeoutError(f"no answer within {timeout}s"))
+    finally:
+        # Do not wait for abandoned instances
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -8,19 +8,29 @@ import os
 import sys
 import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
 
+import requests
+
+from bandwidth import get_bandwidth
+from download_archive import get_archive
+from http_downloader import HttpDownloader, TransferStats, format_bytes
+from peertube_api import (POPULAR_INSTANCES, PeerTubeClient, archive_ids, federated_search, file_url,
+                          parse_height, pick_file, safe_name)
+from source_sync import sync_source
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class PeerTubeDownloader:
     def __init__(self, download_path="./downloads/peertube"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -33,11 +43,7 @@ class PeerTubeDownloader:
     def get_video_info(self, url):
         """Get PeerTube video information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'PeerTube Video'),
@@ -109,7 +115,7 @@ class PeerTubeDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ PeerTube download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -118,8 +124,11 @@ class PeerTubeDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_channel(self, url, max_downloads=50):
-        """Download videos from PeerTube channel"""
+    def download_channel(self, url, max_downloads=50, sync=False):
+        """Download videos from PeerTube channel
+
+        sync=True only fetches items newer than the last sync of this source
+        """
         instance = self.detect_peertube_instance(url)
         instance_dir = self.download_path / instance
         
@@ -138,45 +147,138 @@ class PeerTubeDownloader:
             print(f"📺 Downloading PeerTube channel...")
             print(f"🏠 Instance: {instance}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            if sync:
+                sync_source(self.engine, cmd)
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ Channel download completed!")
         except Exception as e:
             print(f"❌ Channel download failed: {e}")
 
-    def download_instance_trending(self, instance_url, max_downloads=20):
+    def download_instance_trending(self, instance_url, max_downloads=20, quality='best', workers=4):
         """Download trending videos from PeerTube instance"""
-        trending_url = f"{instance_url.rstrip('/')}/api/v1/videos?sort=-trending"
+        client = PeerTubeClient(instance_url)
         
         try:
-            print(f"🔥 Downloading trending videos from: {instance_url}")
+            print(f"🔥 Downloading trending videos from: {client.instance}")
             print(f"🔢 Max downloads: {max_downloads}")
-            print("💡 Note: This feature may require API access")
-            print("   Try using specific video/channel URLs instead")
-        except Exception as e:
+            return self.download_api_videos(client, client.trending(max_downloads), quality, workers)
+        except requests.RequestException as e:
             print(f"❌ Trending download failed: {e}")
+            return False
+
+    def download_api_videos(self, client, videos, quality='best', workers=4):
+        """Download video objects from the PeerTube API straight from their file list
+
+        videos can be any iterable (e.g. a paginator); each video is handed to
+        the download pool as soon as it arrives.
+        """
+        max_height = parse_height(quality)
+        archive = get_archive()
+        http = HttpDownloader(pool_size=max(1, workers))
+        stats = TransferStats()
+        
+        def fetch(video):
+            # Same archive keys yt-dlp's PeerTube extractor uses, whichever URL it was given
+            if any(archive.contains('peertube', video_id) for video_id in archive_ids(video)):
+                return video.get('name'), None, 0
+            details = client.video(video['uuid'])
+            chosen = pick_file(details, max_height)
+            if chosen is None:
+                raise ValueError("no downloadable file (live stream?)")
+            
+            url = file_url(chosen)
+            channel = (details.get('channel') or {}).get('displayName') or 'Unknown'
+            # The instance may carry a port, which is no valid path component on every system
+            output_dir = self.download_path / safe_name(client.instance) / safe_name(channel)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            # Titles repeat within a channel; the id keeps concurrent downloads apart
+            video_id = details.get('shortUUID') or details['uuid']
+            name = f"{safe_name(details.get('name') or video_id)} [{video_id}]"
+            ext = os.path.splitext(urlparse(url).path)[1] or '.mp4'
+            
+            with get_bandwidth().bulk():
+                written = http.download(url, output_dir / f"{name}{ext}")
+            with open(output_dir / f"{name}.info.json", 'w', encoding='utf-8') as f:
+                json.dump(details, f, ensure_ascii=False)
+            for archive_id in archive_ids(details):
+                archive.record('peertube', archive_id, client.watch_url(details))
+            stats.add(written)
+            return details.get('name'), (chosen.get('resolution') or {}).get('label'), written
+        
+        done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                futures = {executor.submit(fetch, video): video for video in videos}
+                for future in as_completed(futures):
+                    done += 1
+                    title = futures[future].get('name', 'video')[:50]
+                    try:
+                        name, resolution, written = future.result()
+                    except (requests.RequestException, OSError, ValueError, KeyError) as e:
+                        stats.add(0, ok=False)
+                        print(f"❌ [{done}/{len(futures)}] {title}: {e}")
+                        continue
+                    if resolution is None:
+                        print(f"⏭️  [{done}/{len(futures)}] {title}: already downloaded")
+                    else:
+                        print(f"✅ [{done}/{len(futures)}] {title} ({resolution}, {format_bytes(written)})")
+        finally:
+            http.close()
+        
+        print(f"📊 {stats.summary()}")
+        return stats.failed == 0
+
+    def search_instances(self, query, instances=None, max_per_instance=10, timeout=8):
+        """Search several PeerTube instances at once, printing results as they arrive
+
+        Returns a list of (client, video) pairs, one per distinct video.
+        """
+        instances = instances or [domain for domain, _ in POPULAR_INSTANCES]
+        print(f"🔍 Searching {len(instances)} instances for: {query}")
+        print("-" * 50)
+        
+        def report(instance, error):
+            print(f"⚠️  {instance}: {error}")
+        
+        results = []
+        for client, video in federated_search(query, instances, max_per_instance, timeout, report):
+            results.append((client, video))
+            channel = (video.get('channel') or {}).get('displayName') or 'Unknown'
+            print(f"🎬 [{client.instance}] {video.get('name', 'video')[:60]} - {channel}")
+            print(f"   {client.watch_url(video)}")
+        
+        print(f"📊 {len(results)} distinct videos found")
+        return results
+
+    def download_search(self, query, instances=None, max_downloads=10, quality='best', workers=4):
+        """Download the first max_downloads results of a federated search"""
+        results = self.search_instances(query, instances)[:max_downloads]
+        if not results:
+            return False
+        
+        # Each video is fetched through the instance that returned it
+        by_instance = {}
+        for client, video in results:
+            by_instance.setdefault(client.instance, (client, []))[1].append(video)
+        ok = True
+        for client, videos in by_instance.values():
+            print(f"\n📥 {client.instance}: {len(videos)} videos")
+            ok = self.download_api_videos(client, videos, quality, workers) and ok
+        return ok
 
     def list_popular_instances(self):
         """List popular PeerTube instances"""
         print("\n🌐 Popular PeerTube Instances:")
         print("=" * 40)
         
-        instances = [
-            ("framapiaf.org", "French general instance"),
-            ("peertube.tv", "General PeerTube instance"),
-            ("tube.nuagelibre.fr", "French tech-focused"),
-            ("video.ploud.fr", "French general instance"),
-            ("peertube.social", "English general instance"),
-            ("tube.jeena.net", "Personal instance"),
-            ("peertube.linuxrocks.online", "Linux community"),
-            ("video.blender.org", "Blender Foundation")
-        ]
-        
-        for domain, description in instances:
+        for domain, description in POPULAR_INSTANCES:
             print(f"🏠 {domain:<25} - {description}")
         
         print("\n💡 Usage Examples:")
         print("python3 peertube_downloader.py 'https://framapiaf.org/videos/watch/...'")
         print("python3 peertube_downloader.py 'https://peertube.tv/c/channel-name/videos' channel")
+        print("python3 peertube_downloader.py --search 'blender tutorial'")
 
 
 def main():
@@ -186,8 +288,10 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("1. Single video: python3 peertube_downloader.py <peertube_url>")
-        print("2. Channel: python3 peertube_downloader.py <channel_url> channel")
-        print("3. List instances: python3 peertube_downloader.py --list-instances")
+        print("2. Channel: python3 peertube_downloader.py <channel_url> channel [--sync]")
+        print("3. Trending: python3 peertube_downloader.py <instance_url> trending [max] [quality]")
+        print("4. Search: python3 peertube_downloader.py --search <query> [instance...] [--download N]")
+        print("5. List instances: python3 peertube_downloader.py --list-instances")
         print("\nExamples:")
         print("python3 peertube_downloader.py 'https://framapiaf.org/videos/watch/...'")
         print("python3 peertube_downloader.py 'https://peertube.tv/c/channel/' channel")
@@ -199,11 +303,31 @@ def main():
         downloader.list_popular_instances()
         return
     
-    if len(sys.argv) >= 3 and sys.argv[2] == 'channel':
+    if sys.argv[1] == '--search' and len(sys.argv) >= 3:
+        # Fan-out search over several instances (popular ones by default)
+        args = sys.argv[3:]
+        max_downloads = 0
+        if '--download' in args:
+            i = args.index('--download')
+            given = i + 1 < len(args) and args[i + 1].isdigit()
+            max_downloads = int(args[i + 1]) if given else 10
+            del args[i:i + 1 + int(given)]
+        if max_downloads:
+            downloader.download_search(sys.argv[2], args or None, max_downloads)
+        else:
+            downloader.search_instances(sys.argv[2], args or None)
+        return
+    
+    if len(sys.argv) >= 3 and sys.argv[2] == 'trending':
+        # Trending videos over the instance's REST API
+        max_downloads = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3].isdigit() else 20
+        quality = sys.argv[4] if len(sys.argv) > 4 else 'best'
+        downloader.download_instance_trending(sys.argv[1], max_downloads, quality)
+    elif len(sys.argv) >= 3 and sys.argv[2] == 'channel':
         # Channel download
         channel_url = sys.argv[1]
         max_downloads = int(input("Max downloads [50]: ") or 50)
-        downloader.download_channel(channel_url, max_downloads)
+        downloader.download_channel(channel_url, max_downloads, sync='--sync' in sys.argv)
     else:
         # Single video download
         url = sys.argv[1]
@@ -7,19 +7,19 @@ Downloads images and videos from Pinterest using yt-dlp
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class PinterestDownloader:
     def __init__(self, download_path="./downloads/pinterest"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +27,7 @@ class PinterestDownloader:
     def get_pin_info(self, url):
         """Get Pinterest pin information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Pinterest Pin'),
@@ -77,7 +73,7 @@ class PinterestDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Pinterest download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -102,7 +98,7 @@ class PinterestDownloader:
         try:
             print(f"📋 Downloading Pinterest board...")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd, archive=True)
             print("✅ Board download completed!")
         except Exception as e:
             print(f"❌ Board download failed: {e}")
@@ -126,7 +122,7 @@ class PinterestDownloader:
         try:
             print(f"👤 Downloading pins from user: {username}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd, archive=True)
             print("✅ User pins download completed!")
         except Exception as e:
             print(f"❌ User pins download failed: {e}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Platform Domain Index
+Compiled host-suffix index for platform detection: built once at import,
+classifies a URL with one hash lookup per host label instead of scanning
+every pattern of every platform
+"""
+
+from urllib.parse import urlsplit
+
+from platform_registry import platform_domains
+
+
+# Platform -> host patterns, taken from the shared registry. A pattern is one of:
+#   'example.com' - the host is example.com or any subdomain of it
+#   'tube.'       - the host starts with this label (ends with a dot)
+#   'peertube'    - the host contains this keyword (no dot)
+PLATFORM_DOMAINS = platform_domains()
+
+
+def url_host(url):
+    """Return the lowercased host of a URL (URLs without a scheme are accepted)"""
+    if '://' not in url:
+        url = '//' + url
+    try:
+        host = urlsplit(url.strip()).hostname
+    except ValueError:
+        return ''
+    return (host or '').rstrip('.')
+
+
+class DomainIndex:
+    def __init__(self, platform_domains):
+        self._suffixes = {}
+        self._prefixes = []
+        self._keywords = []
+
+        for platform, patterns in platform_domains.items():
+            for pattern in patterns:
+                pattern = pattern.lower()
+                if pattern.endswith('.'):
+                    self._prefixes.append((pattern, platform))
+                elif '.' in pattern:
+                    # First platform to claim a domain wins, like the old scan order
+                    self._suffixes.setdefault(pattern, platform)
+                else:
+                    self._keywords.append((pattern, platform))
+
+    def classify_host(self, host):
+        """Return the platform for a host name, or 'unknown'"""
+        # Try the host itself, then each parent domain: a.b.example.com,
+        # b.example.com, example.com, com
+        labels = host.split('.')
+        for i in range(len(labels)):
+            platform = self._suffixes.get('.'.join(labels[i:]))
+            if platform is not None:
+                return platform
+
+        for prefix, platform in self._prefixes:
+            if host.startswith(prefix):
+                return platform
+        for keyword, platform in self._keywords:
+            if keyword in host:
+                return platform
+        return 'unknown'
+
+    def classify(self, url):
+        """Return the platform for a URL, or 'unknown'"""
+        return self.classify_host(url_host(url))
+
+    def classify_many(self, urls):
+        """Classify an iterable of URLs, yielding (url, platform) pairs
+
+        Hosts are memoised, so large inputs that repeat the same hosts cost
+        one dict lookup per URL after the first occurrence.
+        """
+        seen_hosts = {}
+        for url in urls:
+            host = url_host(url)
+            platform = seen_hosts.get(host)
+            if platform is None:
+                if len(seen_hosts) >= 100000:
+                    seen_hosts.clear()
+                platform = seen_hosts[host] = self.classify_host(host)
+            yield url, platform
+
+
+# Built once at import and shared by every downloader
+DEFAULT_INDEX = DomainIndex(PLATFORM_DOMAINS)
+
+
+def classify(url):
+    """Return the platform for a URL using the default index"""
+    return DEFAULT_INDEX.classify(url)
+
+
+def classify_many(urls):
+    """Classify many URLs using the default index, yielding (url, platform) pairs"""
+    return DEFAULT_INDEX.classify_many(urls)
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Platform Registry
+Single source of truth for platform metadata: domains, extractor, support
+status, default format selector and per-platform limits. Importable
+without pulling in any downloader module; also exports the table as JSON
+for the website (python3 platform_registry.py --export platforms.json)
+"""
+
+import json
+import sys
+import threading
+from types import MappingProxyType
+
+
+# Defaults for fields a platform entry does not set
+_DEFAULTS = {
+    'supported': True,
+    'info': '',
+    'downloader': 'ultimate_downloader.py',
+    'icon': 'fas fa-globe',
+    'color': '#00ff88',
+    'format': 'best',
+    'geo_bypass': False,
+    'concurrency': 2,
+    # Fragments of an HLS/DASH stream fetched at once (1 = one after another)
+    'fragments': 1,
+    # Seconds extracted metadata stays valid in the metadata cache
+    'metadata_ttl': 6 * 3600
+}
+
+# Domain patterns follow platform_index: 'example.com' matches the domain and
+# its subdomains, 'tube.' matches a host prefix, 'peertube' a host keyword
+_PLATFORMS = {
+    # Main Western Platforms
+    'youtube': {
+        'name': 'YouTube', 'emoji': '🔴', 'category': 'Main Western',
+        'status': '✅ Full', 'extractor': 'youtube', 'info': 'Videos, playlists and channels',
+        'domains': ['youtube.com', 'youtu.be'],
+        'icon': 'fab fa-youtube', 'color': '#ff0000', 'concurrency': 4, 'fragments': 4
+    },
+    'instagram': {
+        'name': 'Instagram', 'emoji': '📷', 'category': 'Main Western',
+        'status': '✅ Full', 'extractor': 'instagram', 'info': 'Posts, reels and stories',
+        'domains': ['instagram.com', 'instagr.am'],
+        'downloader': 'instagram_downloader.py', 'icon': 'fab fa-instagram', 'color': '#e4405f',
+        'format': 'best[ext=mp4]/best',
+        'metadata_ttl': 3600
+    },
+    'twitter': {
+        'name': 'Twitter/X', 'emoji': '🐦', 'category': 'Main Western',
+        'status': '✅ Full', 'extractor': 'twitter', 'info': 'Videos, GIFs and Spaces',
+        'domains': ['twitter.com', 'x.com', 't.co'],
+        'downloader': 'twitter_downloader.py', 'icon': 'fab fa-twitter', 'color': '#1da1f2',
+        'metadata_ttl': 3600
+    },
+    'tiktok': {
+        'name': 'TikTok', 'emoji': '🎵', 'category': 'Main Western',
+        'status': '✅ Full', 'extractor': 'tiktok', 'info': 'Short videos',
+        'domains': ['tiktok.com'],
+        'icon': 'fab fa-tiktok', 'color': '#000000',
+        'metadata_ttl': 3600
+    },
+    'facebook': {
+        'name': 'Facebook', 'emoji': '📘', 'category': 'Main Western',
+        'status': '✅ Full', 'extractor': 'facebook', 'info': 'Public videos',
+        'domains': ['facebook.com', 'fb.com', 'fb.watch'],
+        'icon': 'fab fa-facebook', 'color': '#1877f2',
+        'metadata_ttl': 3600
+    },
+
+    # Video Platforms
+    'vimeo': {
+        'name': 'Vimeo', 'emoji': '🎥', 'category': 'Video Platforms',
+        'status': '✅ Full', 'extractor': 'vimeo', 'info': 'Creative videos',
+        'domains': ['vimeo.com'],
+        'downloader': 'vimeo_downloader.py', 'icon': 'fab fa-vimeo', 'color': '#1ab7ea',
+        'format': 'best[height<=1080]/best', 'concurrency': 3,
+        # Fastly/Akamai HLS edges take many parallel segment requests
+        'fragments': 8
+    },
+    'dailymotion': {
+        'name': 'Dailymotion', 'emoji': '📺', 'category': 'Video Platforms',
+        'status': '✅ Full', 'extractor': 'dailymotion', 'info': 'Videos and playlists',
+        'domains': ['dailymotion.com', 'dai.ly'],
+        'icon': 'fas fa-play', 'color': '#0066dc', 'fragments': 4
+    },
+    'twitch': {
+        'name': 'Twitch', 'emoji': '🟣', 'category': 'Video Platforms',
+        'status': '✅ Full', 'extractor': 'twitch', 'info': 'Clips and VODs',
+        'domains': ['twitch.tv'],
+        'icon': 'fab fa-twitch', 'color': '#9146ff', 'fragments': 8
+    },
+    'reddit': {
+        'name': 'Reddit', 'emoji': '🔴', 'category': 'Video Platforms',
+        'status': '✅ Full', 'extractor': 'reddit', 'info': 'Video posts',
+        'domains': ['reddit.com', 'redd.it'],
+        'icon': 'fab fa-reddit', 'color': '#ff4500'
+    },
+
+    # Professional Platforms
+    'linkedin': {
+        'name': 'LinkedIn', 'emoji': '💼', 'category': 'Professional',
+        'status': '⚠️ Auth', 'extractor': 'linkedin', 'info': 'Professional network videos',
+        'domains': ['linkedin.com', 'lnkd.in'],
+        'downloader': 'linkedin_downloader.py', 'icon': 'fab fa-linkedin', 'color': '#0077b5',
+        'format': 'best[height<=720]/best'
+    },
+    'pinterest': {
+        'name': 'Pinterest', 'emoji': '📌', 'category': 'Professional',
+        'status': '⚠️ Limited', 'extractor': 'pinterest', 'info': 'Pin images and videos',
+        'domains': ['pinterest.com', 'pin.it'],
+        'downloader': 'pinterest_downloader.py', 'icon': 'fab fa-pinterest', 'color': '#bd081c',
+        'format': 'best[height<=720]/best'
+    },
+
+    # Alternative Platforms
+    'rumble': {
+        'name': 'Rumble', 'emoji': '🎯', 'category': 'Alternative',
+        'status': '✅ Full', 'extractor': 'rumble', 'info': 'Video platform',
+        'domains': ['rumble.com'],
+        'downloader': 'rumble_downloader.py', 'icon': 'fas fa-bullhorn', 'color': '#85c742',
+        'concurrency': 3, 'fragments': 6
+    },
+    'odysee': {
+        'name': 'Odysee', 'emoji': '🌊', 'category': 'Alternative',
+        'status': '✅ Full', 'extractor': 'odysee', 'info': 'Decentralized video platform (LBRY)',
+        'domains': ['odysee.com', 'lbry.tv'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-wave-square',
+        'color': '#047857'
+    },
+    'bitchute': {
+        'name': 'BitChute', 'emoji': '🎬', 'category': 'Alternative',
+        'status': '✅ Full', 'extractor': 'bitchute', 'info': 'Alternative video platform',
+        'domains': ['bitchute.com'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-video',
+        'color': '#ff6b35'
+    },
+    'peertube': {
+        'name': 'PeerTube', 'emoji': '🌐', 'category': 'Alternative',
+        'status': '✅ Full', 'extractor': 'peertube', 'info': 'Decentralized video platform',
+        'domains': ['peertube', 'tube.'],
+        'downloader': 'peertube_downloader.py', 'icon': 'fas fa-share-alt', 'color': '#f1680d'
+    },
+    'triller': {
+        'name': 'Triller', 'emoji': '🎵', 'category': 'Alternative',
+        'status': '❓ Experimental', 'extractor': 'triller', 'info': 'Music video platform',
+        'domains': ['triller.co'],
+        'downloader': 'triller_downloader.py', 'icon': 'fas fa-music', 'color': '#ff0050'
+    },
+    'likee': {
+        'name': 'Likee', 'emoji': '❤️', 'category': 'Alternative',
+        'status': '❓ Experimental', 'extractor': 'likee', 'info': 'Short video platform',
+        'domains': ['likee.video', 'likee.com'],
+        'downloader': 'likee_downloader.py', 'icon': 'fas fa-heart', 'color': '#ff2d55'
+    },
+
+    # Asian Platforms
+    'bilibili': {
+        'name': 'Bilibili', 'emoji': '🇨🇳', 'category': 'Asian Platforms',
+        'status': '✅ Good', 'extractor': 'bilibili', 'info': 'Chinese video platform',
+        'domains': ['bilibili.com', 'b23.tv'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-play-circle',
+        'color': '#fb7299', 'geo_bypass': True, 'concurrency': 3,
+        # Bilibili's CDN starts refusing (412/429) well before Vimeo's does
+        'fragments': 4
+    },
+    'niconico': {
+        'name': 'Niconico', 'emoji': '🇯🇵', 'category': 'Asian Platforms',
+        'status': '✅ Good', 'extractor': 'niconico', 'info': 'Japanese video platform',
+        'domains': ['nicovideo.jp', 'nico.ms'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-video', 'color': '#252525'
+    },
+    'youku': {
+        'name': 'Youku', 'emoji': '🇨🇳', 'category': 'Asian Platforms',
+        'status': '✅ Good', 'extractor': 'youku', 'info': 'Chinese video platform',
+        'domains': ['youku.com', 'youku.cn'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-film', 'color': '#06a7e1',
+        'geo_bypass': True
+    },
+    'kuaishou': {
+        'name': 'Kuaishou', 'emoji': '🇨🇳', 'category': 'Asian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'kuaishou', 'info': 'Chinese short videos',
+        'domains': ['kuaishou.com', 'ks.com'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-camera', 'color': '#ff6600',
+        'geo_bypass': True
+    },
+    'weibo': {
+        'name': 'Weibo', 'emoji': '🇨🇳', 'category': 'Asian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'weibo', 'info': 'Chinese social media',
+        'domains': ['weibo.com', 'weibo.cn'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fab fa-weibo', 'color': '#e6162d',
+        'geo_bypass': True
+    },
+    'douyin': {
+        'name': 'Douyin', 'emoji': '🇨🇳', 'category': 'Asian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'douyin', 'info': 'Chinese TikTok',
+        'domains': ['douyin.com', 'iesdouyin.com'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-music', 'color': '#000000',
+        'geo_bypass': True
+    },
+
+    # Indian Platforms
+    'mxtakatak': {
+        'name': 'MX TakaTak', 'emoji': '🇮🇳', 'category': 'Indian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'generic', 'info': 'Indian short videos',
+        'domains': ['mxtakatak.com', 'takatak.tv'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-mobile-alt',
+        'color': '#ff4757'
+    },
+    'moj': {
+        'name': 'Moj', 'emoji': '🇮🇳', 'category': 'Indian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'generic', 'info': 'Indian short videos',
+        'domains': ['moj.tv', 'mojapp.in'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-star', 'color': '#ffa502'
+    },
+    'chingari': {
+        'name': 'Chingari', 'emoji': '🇮🇳', 'category': 'Indian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'generic', 'info': 'Indian short videos',
+        'domains': ['chingari.io', 'chingariapp.com'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-fire', 'color': '#ff6348'
+    },
+    'josh': {
+        'name': 'Josh', 'emoji': '🇮🇳', 'category': 'Indian Platforms',
+        'status': '⚠️ Limited', 'extractor': 'generic', 'info': 'Indian short videos',
+        'domains': ['josh.in', 'joshapp.com'],
+        'downloader': 'asian_platforms_downloader.py', 'icon': 'fas fa-heart', 'color': '#2f3542'
+    },
+
+    # Other Platforms
+    'vk': {
+        'name': 'VK Video', 'emoji': '🇷🇺', 'category': 'Other/Regional',
+        'status': '⚠️ Limited', 'extractor': 'vk', 'info': 'Russian social platform',
+        'domains': ['vk.com', 'vkontakte'],
+        'icon': 'fab fa-vk', 'color': '#4680c2'
+    },
+    'metacafe': {
+        'name': 'Metacafe', 'emoji': '🎥', 'category': 'Other/Regional',
+        'status': '⚠️ Limited', 'extractor': 'metacafe', 'info': 'Classic video platform',
+        'domains': ['metacafe.com'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-film'
+    },
+    'veoh': {
+        'name': 'Veoh', 'emoji': '📹', 'category': 'Other/Regional',
+        'status': '⚠️ Limited', 'extractor': 'veoh', 'info': 'Video sharing platform',
+        'domains': ['veoh.com'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-video'
+    },
+    'dtube': {
+        'name': 'DTube', 'emoji': '⛓️', 'category': 'Other/Regional',
+        'status': '⚠️ Limited', 'extractor': 'generic', 'info': 'Blockchain video platform',
+        'domains': ['dtube'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-cube',
+        'color': '#ff4757'
+    },
+
+    # Streaming/Live
+    'younow': {
+        'name': 'YouNow', 'emoji': '📡', 'category': 'Streaming/Live',
+        'status': '⚠️ Live Only', 'extractor': 'younow', 'info': 'Live streaming platform',
+        'domains': ['younow.com'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-broadcast-tower',
+        'color': '#00cf91'
+    },
+    'trovo': {
+        'name': 'Trovo', 'emoji': '🎮', 'category': 'Streaming/Live',
+        'status': '⚠️ Live Only', 'extractor': 'trovo', 'info': 'Gaming live streams',
+        'domains': ['trovo.live'],
+        'downloader': 'alternative_platforms_downloader.py', 'icon': 'fas fa-gamepad',
+        'color': '#20bf55'
+    },
+    'snapchat': {
+        'name': 'Snapchat', 'emoji': '👻', 'category': 'Streaming/Live',
+        'status': '❌ Very Limited', 'supported': False, 'extractor': 'generic',
+        'info': 'Stories and Spotlight (Limited support)',
+        'domains': ['snapchat.com', 'snap.com'],
+        'downloader': 'snapchat_downloader.py', 'icon': 'fab fa-snapchat', 'color': '#fffc00'
+    },
+    'discord': {
+        'name': 'Discord', 'emoji': '🎮', 'category': 'Streaming/Live',
+        'status': '✅ Direct Links', 'supported': False, 'extractor': 'direct',
+        'info': 'Chat platform (No video extractor)',
+        'domains': ['cdn.discordapp.com', 'media.discordapp.net', 'discord.com', 'discord.gg'],
+        'downloader': 'discord_downloader.py', 'icon': 'fab fa-discord', 'color': '#5865f2',
+        'concurrency': 8,
+        'metadata_ttl': 0
+    },
+
+    # Streaming/Discontinued
+    'periscope': {
+        'name': 'Periscope', 'emoji': '📡', 'category': 'Discontinued',
+        'status': '❌ Discontinued', 'supported': False, 'extractor': 'none',
+        'info': 'Service shut down in 2021',
+        'domains': ['periscope.tv', 'pscp.tv'],
+        'downloader': 'streaming_platforms_downloader.py'
+    },
+    'zynn': {
+        'name': 'Zynn', 'emoji': '🎬', 'category': 'Discontinued',
+        'status': '❌ Discontinued', 'supported': False, 'extractor': 'none',
+        'info': 'App removed from stores',
+        'domains': ['zynn'],
+        'downloader': 'streaming_platforms_downloader.py'
+    },
+    'tubi': {
+        'name': 'Tubi', 'emoji': '📺', 'category': 'Discontinued',
+        'status': '❌ DRM Protected', 'supported': False, 'extractor': 'none',
+        'info': 'Streaming service with DRM protection',
+        'domains': ['tubi.tv'],
+        'downloader': 'alternative_platforms_downloader.py'
+    },
+    'streamyard': {
+        'name': 'StreamYard', 'emoji': '🎥', 'category': 'Discontinued',
+        'status': '❌ Tool Only', 'supported': False, 'extractor': 'none',
+        'info': 'Not a content platform',
+        'domains': ['streamyard.com'],
+        'downloader': 'streaming_platforms_downloader.py'
+    }
+}
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def _freeze(name, entry):
+    """Return an immutable platform entry with defaults filled in"""
+    platform = dict(_DEFAULTS)
+    platform.update(entry)
+    platform['key'] = name
+    platform['label'] = f"{platform['emoji']} {platform['name']}"
+    platform['domains'] = tuple(platform['domains'])
+    return MappingProxyType(platform)
+
+
+def get_registry():
+    """Return the read-only platform table, built on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MappingProxyType(
+                    {name: _freeze(name, entry) for name, entry in _PLATFORMS.items()})
+    return _registry
+
+
+def get_platform(name):
+    """Return one platform entry, or None for unknown platforms"""
+    return get_registry().get(name)
+
+
+def platform_domains():
+    """Return {platform: domain patterns} for building the domain index"""
+    return {name: platform['domains'] for name, platform in get_registry().items()}
+
+
+def platform_limits():
+    """Return {platform: max concurrent jobs}"""
+    return {name: platform['concurrency'] for name, platform in get_registry().items()}
+
+
+def platforms_by_category():
+    """Return {category: [platform names]} in registry order"""
+    categories = {}
+    for name, platform in get_registry().items():
+        categories.setdefault(platform['category'], []).append(name)
+    return categories
+
+
+def to_json():
+    """Return the registry as a JSON string for the website"""
+    table = {name: dict(platform, domains=list(platform['domains']))
+             for name, platform in get_registry().items()}
+    return json.dumps(table, ensure_ascii=False, indent=2)
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == '--export':
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            f.write(to_json() + '\n')
+        print(f"✅ Exported {len(get_registry())} platforms to {sys.argv[2]}")
+    else:
+        print(to_json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Progress Events
+Turns yt-dlp progress (in-process hooks, or a machine-readable progress
+template on the command line) into typed events, and fans them out to
+subscribers (terminal, website, metrics) through an in-process bus.
+Download updates are throttled per subscriber and job, so a bulk run does
+not flood the terminal, and a slow subscriber never holds up a download.
+
+What is printed by default can be chosen from the environment:
+    SMDL_PROGRESS=bar    (one progress line per job, the default)
+    SMDL_PROGRESS=json   (one JSON object per event, for other programs)
+    SMDL_PROGRESS=off
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+
+# Phases of a job, in the order they normally happen
+STARTED = 'started'
+DOWNLOADING = 'downloading'
+DOWNLOADED = 'downloaded'
+POSTPROCESSING = 'postprocessing'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+# Seconds between two download updates of one job to one subscriber
+DEFAULT_INTERVAL = 0.5
+
+# How often throttled updates that are due get delivered
+FLUSH_INTERVAL = 0.25
+
+PROGRESS_PREFIX = 'smdl-progress '
+POSTPROCESS_PREFIX = 'smdl-postprocess '
+
+# Only the fields events are built from, so the command line prints less
+_DOWNLOAD_FIELDS = ('status,filename,downloaded_bytes,total_bytes,total_bytes_estimate,'
+                    'speed,eta,fragment_index,fragment_count')
+PROGRESS_TEMPLATES = [
+    '--progress-template', f'download:{PROGRESS_PREFIX}%(progress.{{{_DOWNLOAD_FIELDS}}})j',
+    '--progress-template', f'postprocess:{POSTPROCESS_PREFIX}%(progress.{{status,postprocessor}})j'
+]
+
+_job_ids = itertools.count(1)
+
+
+class ProgressEvent:
+    """One progress update of one job"""
+
+    __slots__ = ('job', 'phase', 'url', 'filename', 'downloaded_bytes', 'total_bytes', 'speed',
+                 'eta', 'fragment_index', 'fragment_count', 'postprocessor', 'error', 'time')
+
+    def __init__(self, job, phase, url=None, filename=None, downloaded_bytes=None, total_bytes=None,
+                 speed=None, eta=None, fragment_index=None, fragment_count=None, postprocessor=None,
+                 error=None):
+        self.job = job
+        self.phase = phase
+        self.url = url
+        self.filename = filename
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.speed = speed
+        self.eta = eta
+        self.fragment_index = fragment_index
+        self.fragment_count = fragment_count
+        self.postprocessor = postprocessor
+        self.error = error
+        self.time = time.time()
+
+    @classmethod
+    def from_status(cls, job, status, url=None):
+        """Build an event from a yt-dlp progress hook dict; None for statuses it does not cover"""
+        phase = {'downloading': DOWNLOADING, 'finished': DOWNLOADED}.get(status.get('status'))
+        if phase is None:
+            return None
+        return cls(job, phase, url,
+                   filename=status.get('filename'),
+                   downloaded_bytes=status.get('downloaded_bytes'),
+                   total_bytes=status.get('total_bytes') or status.get('total_bytes_estimate'),
+                   speed=status.get('speed'),
+                   eta=status.get('eta'),
+                   fragment_index=status.get('fragment_index'),
+                   fragment_count=status.get('fragment_count'))
+
+    @classmethod
+    def from_postprocessor(cls, job, status, url=None):
+        """Build an event from a yt-dlp postprocessor hook dict"""
+        return cls(job, POSTPROCESSING, url, postprocessor=status.get('postprocessor'))
+
+    @property
+    def percent(self):
+        if self.phase == DOWNLOADED:
+            return 100.0
+        if self.downloaded_bytes is None or not self.total_bytes:
+            return None
+        return min(100.0, 100.0 * self.downloaded_bytes / self.total_bytes)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['percent'] = self.percent
+        return data
+
+    def __repr__(self):
+        return f"ProgressEvent(job={self.job}, phase={self.phase!r}, percent={self.percent})"
+
+
+def parse_progress_line(line):
+    """Return (kind, status) for a line printed by PROGRESS_TEMPLATES, else None
+
+    kind is 'download' or 'postprocess'; status is the hook-style dict.
+    """
+    for kind, prefix in (('download', PROGRESS_PREFIX), ('postprocess', POSTPROCESS_PREFIX)):
+        if line.startswith(prefix):
+            try:
+                return kind, json.loads(line[len(prefix):])
+            except ValueError:
+                return None
+    return None
+
+
+def with_progress_templates(cmd):
+    """Return a yt-dlp command line that prints progress as PROGRESS_TEMPLATES lines
+
+    Command lines that already set a progress template are left alone.
+    """
+    if '--progress-template' in cmd[:-1]:
+        return cmd
+    return cmd[:-1] + ['--newline'] + PROGRESS_TEMPLATES + cmd[-1:]
+
+
+def without_progress_bar(cmd):
+    """Return a yt-dlp command line that does not draw its own progress bar
+
+    For in-process runs, where the hooks report progress instead.
+    """
+    return cmd[:-1] + ['--no-progress'] + cmd[-1:]
+
+
+class _Subscription:
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval
+        # Per job: when a download update was last sent, and the newest
+        # one held back since then
+        self.sent = {}
+        self.pending = {}
+
+
+class ProgressBus:
+    """Fans progress events out to subscribers
+
+    Download updates of a job reach each subscriber at most once per its
+    interval; the ones in between are dropped except the newest, which is
+    delivered once the interval is up. Phase changes always go through.
+    Subscribers are called from one dispatcher thread, never from the
+    thread that published the event.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._queue = deque()
+        self._delivering = 0
+        self._thread = None
+
+    def subscribe(self, callback, interval=None):
+        """Call callback(event) for published events; returns a handle for unsubscribe()"""
+        subscription = _Subscription(callback, self.interval if interval is None else interval)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, event):
+        """Hand an event to every subscriber (as far as their throttling allows)"""
+        now = time.monotonic()
+        with self._ready:
+            for subscription in self._subscriptions:
+                if event.phase == DOWNLOADING:
+                    if now - subscription.sent.get(event.job, float('-inf')) < subscription.interval:
+                        subscription.pending[event.job] = event
+                        continue
+                    subscription.sent[event.job] = now
+                else:
+                    # Older download updates would arrive after the change
+                    subscription.pending.pop(event.job, None)
+                    if event.phase in (FINISHED, FAILED):
+                        subscription.sent.pop(event.job, None)
+                self._queue.append((subscription, event))
+            if self._queue:
+                self._ready.notify()
+
+    def flush(self, timeout=1.0):
+        """Wait until the events published so far have been delivered; False on timeout"""
+        with self._ready:
+            return self._ready.wait_for(lambda: not self._queue and not self._delivering, timeout)
+
+    def _due(self, now):
+        for subscription in self._subscriptions:
+            for job, event in list(subscription.pending.items()):
+                if now - subscription.sent.get(job, float('-inf')) >= subscription.interval:
+                    del subscription.pending[job]
+                    subscription.sent[job] = now
+                    self._queue.append((subscription, event))
+
+    def _dispatch(self):
+        while True:
+            with self._ready:
+                self._delivering = 0
+                self._ready.notify_all()
+                if not self._queue:
+                    self._ready.wait(FLUSH_INTERVAL)
+                self._due(time.monotonic())
+                batch = list(self._queue)
+                self._queue.clear()
+                self._delivering = len(batch)
+            for subscription, event in batch:
+                try:
+                    subscription.callback(event)
+                except Exception as e:
+                    # A broken subscriber must not take the others down with it
+                    print(f"⚠️  Progress subscriber failed and was removed: {e}")
+                    self.unsubscribe(subscription)
+
+
+class JobProgress:
+    """Publishes one job's progress: feed it yt-dlp hook dicts or template lines"""
+
+    def __init__(self, url=None, bus=None):
+        self.job = next(_job_ids)
+        self.url = url
+        self.bus = bus or get_progress_bus()
+
+    def start(self):
+        self.bus.publish(ProgressEvent(self.job, STARTED, self.url))
+
+    def progress_hook(self, status):
+        """yt-dlp progress hook publishing the job's download updates"""
+        event = ProgressEvent.from_status(self.job, status, self.url)
+        if event is not None:
+            self.bus.publish(event)
+
+    def postprocessor_hook(self, status):
+        """yt-dlp postprocessor hook publishing when postprocessors start"""
+        if status.get('status') == 'started':
+            self.bus.publish(ProgressEvent.from_postprocessor(self.job, status, self.url))
+
+    def finish(self, error=None, wait=True):
+        """Publish that the job ended, failed if error (an exception or message) is given
+
+        wait=True waits (briefly) until subscribers have it, so the job's
+        progress line is complete before the caller prints anything else.
+        """
+        if error is None:
+            self.bus.publish(ProgressEvent(self.job, FINISHED, self.url))
+        else:
+            reason = getattr(error, 'reason', None) or str(error)
+            self.bus.publish(ProgressEvent(self.job, FAILED, self.url, error=reason))
+        if wait:
+            self.bus.flush()
+
+
+def format_bytes(value):
+    if value is None:
+        return 'Unknown'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024:
+            return f"{value:.2f}{unit}"
+        value /= 1024
+    return f"{value:.2f}TiB"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class TerminalProgress:
+    """Subscriber printing progress the way yt-dlp would
+
+    With one job running on a terminal its line is redrawn in place;
+    with several, each update is a line of its own, tagged with the job.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._running = set()
+        self._open_line = False
+
+    def __call__(self, event):
+        if event.phase == STARTED:
+            self._running.add(event.job)
+            return
+        if event.phase in (FINISHED, FAILED):
+            self._running.discard(event.job)
+            self._end_line()
+            return
+
+        if event.phase == POSTPROCESSING:
+            # yt-dlp says what its postprocessors do itself
+            self._end_line()
+            return
+        tag = f"#{event.job} " if len(self._running) > 1 else ''
+        percent = event.percent
+        line = f"[download] {tag}{percent:5.1f}%" if percent is not None else f"[download] {tag}   ?  "
+        if event.phase == DOWNLOADED:
+            line += f" of {format_bytes(event.total_bytes or event.downloaded_bytes)}"
+        else:
+            line += (f" of {format_bytes(event.total_bytes)} at {format_bytes(event.speed)}/s"
+                     f" ETA {format_eta(event.eta)}")
+            if event.fragment_count:
+                line += f" (frag {event.fragment_index}/{event.fragment_count})"
+        self._write(line, redraw=event.phase == DOWNLOADING)
+
+    def _write(self, line, redraw):
+        if redraw and len(self._running) <= 1 and self.stream.isatty():
+            self.stream.write(f"\r{line}\033[K")
+            self._open_line = True
+        else:
+            self._end_line()
+            self.stream.write(f"{line}\n")
+        self.stream.flush()
+
+    def _end_line(self):
+        if self._open_line:
+            self.stream.write('\n')
+            self.stream.flush()
+            self._open_line = False
+
+
+class JsonProgress:
+    """Subscriber printing every event as one line of JSON"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def __call__(self, event):
+        self.stream.write(json.dumps(event.to_dict()) + '\n')
+        self.stream.flush()
+
+
+class ProgressMetrics:
+    """Subscriber keeping running totals: jobs, bytes and current speed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._downloaded = {}
+        self._speed = {}
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+
+    def __call__(self, event):
+        with self._lock:
+            if event.phase == STARTED:
+                self.started += 1
+            elif event.phase in (FINISHED, FAILED):
+                self._speed.pop(event.job, None)
+                if event.phase == FINISHED:
+                    self.finished += 1
+                else:
+                    self.failed += 1
+            elif event.filename and event.downloaded_bytes is not None:
+                self._downloaded[(event.job, event.filename)] = event.downloaded_bytes
+                self._speed[event.job] = event.speed or 0
+
+    def snapshot(self):
+        """Return the totals as a dict"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'running': self.started - self.finished - self.failed,
+                'finished': self.finished,
+                'failed': self.failed,
+                'downloaded_bytes': sum(self._downloaded.values()),
+                'speed': sum(self._speed.values())
+            }
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_progress_bus():
+    """Return the process-wide progress bus, with the output SMDL_PROGRESS asks for"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = ProgressBus()
+            output = os.environ.get('SMDL_PROGRESS', 'bar').lower()
+            if output == 'json':
+                _bus.subscribe(JsonProgress())
+            elif output != 'off':
+                _bus.subscribe(TerminalProgress(), interval=1.0)
+        return _bus
@@ -7,19 +7,21 @@ Downloads videos from Rumble.com using yt-dlp
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from format_catalog import choose_format
+from source_sync import sync_source
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class RumbleDownloader:
     def __init__(self, download_path="./downloads/rumble"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +29,7 @@ class RumbleDownloader:
     def get_video_info(self, url):
         """Get Rumble video information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Unknown'),
@@ -49,17 +47,7 @@ class RumbleDownloader:
     def download_video(self, url, quality='best'):
         """Download Rumble video"""
         
-        # Quality mapping for Rumble
-        quality_mapping = {
-            '1080p': 'best[height<=1080]',
-            '720p': 'best[height<=720]',
-            '480p': 'best[height<=480]',
-            '360p': 'best[height<=360]',
-            'best': 'best',
-            'audio': 'bestaudio'
-        }
-        
-        format_selector = quality_mapping.get(quality, 'best')
+        format_selector = choose_format(self.engine, url, quality)
         
         cmd = [
             'yt-dlp',
@@ -86,7 +74,7 @@ class RumbleDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Rumble download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -94,8 +82,11 @@ class RumbleDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_channel(self, url, max_downloads=50):
-        """Download videos from Rumble channel"""
+    def download_channel(self, url, max_downloads=50, sync=False):
+        """Download videos from Rumble channel
+
+        sync=True only fetches items newer than the last sync of this source
+        """
         cmd = [
             'yt-dlp',
             '--playlist-end', str(max_downloads),
@@ -110,20 +101,26 @@ class RumbleDownloader:
         try:
             print(f"📋 Downloading Rumble channel...")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            if sync:
+                sync_source(self.engine, cmd)
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ Channel download completed!")
         except Exception as e:
             print(f"❌ Channel download failed: {e}")
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 rumble_downloader.py <rumble_url> [quality]")
+    sync = '--sync' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--sync']
+    if not args:
+        print("Usage: python3 rumble_downloader.py <rumble_url> [quality] [--sync]")
         print("Quality options: best, 1080p, 720p, 480p, 360p, audio")
+        print("--sync: for channels, only fetch videos newer than the last sync")
         sys.exit(1)
     
-    url = sys.argv[1]
-    quality = sys.argv[2] if len(sys.argv) > 2 else 'best'
+    url = args[0]
+    quality = args[1] if len(args) > 1 else 'best'
     
     downloader = RumbleDownloader()
     
@@ -133,7 +130,7 @@ def main():
     if '/c/' in url or '/user/' in url:
         # Channel URL
         max_downloads = int(input("Max downloads [50]: ") or 50)
-        downloader.download_channel(url, max_downloads)
+        downloader.download_channel(url, max_downloads, sync)
     else:
         # Single video
         downloader.download_video(url, quality)
@@ -407,8 +407,61 @@ const mockMediaData = {
 let currentPlatform = null;
 let isDownloading = false;
 
+// Merge the shared platform registry (platforms.json, exported by
+// platform_registry.py) into the built-in table; the table above is kept as
+// a fallback for when the page is opened without a web server
+function loadPlatformRegistry() {
+    if (!window.fetch) {
+        return;
+    }
+    fetch('platforms.json')
+        .then(response => response.ok ? response.json() : null)
+        .then(registry => {
+            if (!registry) {
+                return;
+            }
+            for (const [key, entry] of Object.entries(registry)) {
+                const platform = platforms[key] || (platforms[key] = {
+                    icon: entry.icon,
+                    name: entry.name,
+                    domains: [],
+                    color: entry.color
+                });
+                entry.domains.forEach(domain => {
+                    if (!platform.domains.includes(domain)) {
+                        platform.domains.push(domain);
+                    }
+                });
+                platform.downloader = entry.downloader;
+            }
+        })
+        .catch(() => {});
+}
+
+// Host of a URL, accepting URLs typed without a scheme
+function urlHost(url) {
+    try {
+        return new URL(url.includes('://') ? url : 'https://' + url).hostname.toLowerCase();
+    } catch (e) {
+        return '';
+    }
+}
+
+// Same pattern rules as platform_index.py: 'example.com' matches the domain
+// and its subdomains, 'tube.' a host prefix, 'peertube' a host keyword
+function hostMatches(host, pattern) {
+    if (pattern.endsWith('.')) {
+        return host.startsWith(pattern);
+    }
+    if (pattern.includes('.')) {
+        return host === pattern || host.endsWith('.' + pattern);
+    }
+    return host.includes(pattern);
+}
+
 // Initialize page
 document.addEventListener('DOMContentLoaded', function() {
+    loadPlatformRegistry();
     setupEventListeners();
     addSmoothScrolling();
     initializeAdvancedFeatures();
@@ -459,9 +512,10 @@ function detectPlatform() {
     setTimeout(() => {
         // Detect platform from URL
         let detectedPlatform = null;
+        const host = urlHost(url);
         
         for (const [key, platform] of Object.entries(platforms)) {
-            if (platform.domains.some(domain => url.toLowerCase().includes(domain))) {
+            if (platform.domains.some(domain => hostMatches(host, domain))) {
                 detectedPlatform = key;
                 break;
             }
@@ -8,19 +8,19 @@ Note: Limited to public/spotlight content due to platform restrictions
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class SnapchatDownloader:
     def __init__(self, download_path="./downloads/snapchat"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -28,11 +28,7 @@ class SnapchatDownloader:
     def get_content_info(self, url):
         """Get Snapchat content information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Snapchat Content'),
@@ -75,7 +71,7 @@ class SnapchatDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Snapchat download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -99,7 +95,7 @@ class SnapchatDownloader:
 
         try:
             print(f"👻 Starting public story download...")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Story download successful!")
                 
         except subprocess.CalledProcessError as e:
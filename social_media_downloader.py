@@ -8,21 +8,22 @@ import os
 import sys
 import argparse
 import subprocess
-import json
 import re
 from pathlib import Path
 from urllib.parse import urlparse
 
+from parallel_playlist import download_playlist_parallel, playlist_succeeded
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class SocialMediaDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed or not found in PATH")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -55,12 +56,7 @@ class SocialMediaDownloader:
     def get_media_info(self, url):
         """Get media information without downloading"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse the first line of JSON output
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Unknown Media'),
@@ -159,7 +155,7 @@ class SocialMediaDownloader:
                 print("-" * 50)
             
             # Run the download command
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -168,8 +164,12 @@ class SocialMediaDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_playlist_or_channel(self, url, max_downloads=50):
-        """Download playlist or channel videos"""
+    def download_playlist_or_channel(self, url, max_downloads=50, workers=1):
+        """Download playlist or channel videos
+
+        workers > 1 enumerates the playlist first and downloads that many
+        entries at a time instead of one yt-dlp run going through them in turn
+        """
         platform, emoji = self.detect_platform(url)
         
         cmd = [
@@ -188,7 +188,11 @@ class SocialMediaDownloader:
         try:
             print(f"Downloading playlist/channel from {platform.upper()} {emoji}")
             print(f"Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            if workers > 1:
+                if not playlist_succeeded(download_playlist_parallel(self.engine, cmd, workers)):
+                    return
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ Playlist/Channel download completed!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed with exit code {e.returncode}")
@@ -209,6 +213,8 @@ def main():
                         help='Download entire playlist/channel')
     parser.add_argument('-n', '--number', type=int, default=50,
                         help='Max number of videos to download from playlist (default: 50)')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help='Enumerate the playlist first, then download N entries at a time (default: 1, serial)')
     parser.add_argument('--info', action='store_true',
                         help='Show media information without downloading')
     
@@ -245,7 +251,7 @@ def main():
     
     if args.playlist:
         print("📋 Downloading playlist/channel...")
-        downloader.download_playlist_or_channel(args.url, args.number)
+        downloader.download_playlist_or_channel(args.url, args.number, args.parallel)
     else:
         print("📹 Downloading single media...")
         downloader.download_media(args.url, args.quality, args.format)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Incremental Source Sync
+Per-source watermarks (newest item id and upload date) for channels and
+user feeds. A repeat sync looks at a bounded window of the feed's first
+entries and skips, without stopping, items already in the download archive
+or older than the watermark. Feeds are not reliably newest-first (pinned or
+reordered posts come first on Instagram, Twitter, Rumble...), so one old
+item must not end the sync before the newer ones behind it
+"""
+
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+
+from local_state import state_path
+from metadata_cache import canonical_url
+
+
+# yt-dlp exits with this code when a run is cut short on purpose
+# (e.g. --max-downloads); for a sync that is a normal way to finish
+SYNC_STOPPED = 101
+
+# Entries a repeat sync looks at when the command sets no range of its own
+SYNC_WINDOW = 50
+
+_RANGE_OPTIONS = {'--playlist-end', '-I', '--playlist-items'}
+
+
+class WatermarkStore:
+    def __init__(self, path=None):
+        self.path = str(path or state_path('sync_state.sqlite3'))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS watermarks (
+                source TEXT PRIMARY KEY,
+                newest_id TEXT,
+                newest_date TEXT,
+                last_sync REAL NOT NULL,
+                items INTEGER NOT NULL DEFAULT 0
+            )''')
+        self._db.commit()
+
+    def get(self, source):
+        """Return {'newest_id', 'newest_date', 'last_sync', 'items'} for a source, or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT newest_id, newest_date, last_sync, items FROM watermarks WHERE source = ?',
+                (source,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('newest_id', 'newest_date', 'last_sync', 'items'), row))
+
+    def update(self, source, newest_id, newest_date, new_items):
+        """Advance a source's watermark after a sync"""
+        previous = self.get(source) or {}
+        if (previous.get('newest_date') or '') > (newest_date or ''):
+            # Nothing newer than the current watermark arrived
+            newest_id, newest_date = previous['newest_id'], previous['newest_date']
+        newest_id = newest_id or previous.get('newest_id')
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO watermarks (source, newest_id, newest_date, last_sync, items) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (source, newest_id, newest_date, time.time(), previous.get('items', 0) + new_items))
+            self._db.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_watermarks():
+    """Return the process-wide watermark store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WatermarkStore()
+        return _store
+
+
+def sync_source(engine, cmd):
+    """Run a channel/feed download command (URL last) as an incremental sync
+
+    Returns the number of new items downloaded. Raises
+    subprocess.CalledProcessError for real failures, like engine.run.
+    """
+    url = cmd[-1]
+    source = canonical_url(url)
+    store = get_watermarks()
+    watermark = store.get(source)
+
+    fd, log_path = tempfile.mkstemp(prefix='smdl-sync-', suffix='.txt')
+    os.close(fd)
+    # Items downloaded by an earlier sync are skipped through the archive
+    sync_cmd = cmd[:-1] + ['--print-to-file', 'after_move:%(id)s\t%(upload_date|)s', log_path]
+    if watermark is None:
+        print("🆕 First sync of this source")
+    else:
+        print(f"🔁 Syncing since {watermark['newest_date'] or watermark['newest_id']} (last sync: "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(watermark['last_sync']))})")
+        if watermark['newest_date']:
+            # Skip, but keep going past, items older than the newest one seen so far
+            sync_cmd += ['--match-filters', f"upload_date>=?{watermark['newest_date']}"]
+        if not _RANGE_OPTIONS & set(cmd[:-1]):
+            sync_cmd += ['--playlist-end', str(SYNC_WINDOW)]
+    sync_cmd.append(url)
+
+    try:
+        try:
+            engine.run(sync_cmd, archive=True)
+        except subprocess.CalledProcessError as e:
+            if e.returncode != SYNC_STOPPED:
+                raise
+            print("⏹️  Sync stopped early")
+
+        with open(log_path, 'r', encoding='utf-8') as f:
+            entries = [line.rstrip('\n').split('\t') for line in f if line.strip()]
+    finally:
+        os.remove(log_path)
+
+    # The newest upload date carries the watermark, wherever the item was listed
+    dated = [(date, video_id) for video_id, date in entries if date]
+    newest_date, newest_id = max(dated) if dated else (None, entries[0][0] if entries else None)
+    store.update(source, newest_id, newest_date, len(entries))
+    print(f"✅ Sync finished: {len(entries)} new items")
+    return len(entries)
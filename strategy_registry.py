@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Download Strategy Registry
+Remembers, per domain, how often each download strategy (the normal
+yt-dlp run, a generic extraction, a direct fetch...) has worked and how
+long it took, so a fallback chain starts with the strategy that usually
+works for that site instead of failing through the same first step on
+every job. Now and then a lower-ranked strategy is tried first anyway, so
+a site that gets fixed (or broken) upstream is noticed
+"""
+
+import random
+import sqlite3
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+from download_errors import get_negative_cache
+from local_state import state_path
+from metadata_cache import canonical_url
+
+
+# Share of runs that try a strategy other than the best one first
+EXPLORE_RATE = 0.05
+
+# Attempts counted per strategy; older results are halved away past this,
+# so the ranking follows sites whose behaviour changes
+MAX_ATTEMPTS = 50
+
+
+def strategy_domain(url):
+    """Return the domain a URL's strategy statistics are kept under"""
+    return urlsplit(canonical_url(url)).hostname or 'unknown'
+
+
+class StrategyRegistry:
+    def __init__(self, path=None, explore_rate=EXPLORE_RATE):
+        self.path = str(path or state_path('strategies.sqlite3'))
+        self.explore_rate = explore_rate
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS strategies (
+                domain TEXT NOT NULL,
+                strategy TEXT NOT NULL,
+                attempts REAL NOT NULL,
+                successes REAL NOT NULL,
+                latency REAL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (domain, strategy)
+            )''')
+        self._db.commit()
+
+    def stats(self, domain):
+        """Return {strategy: (attempts, successes, latency)} for a domain"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT strategy, attempts, successes, latency FROM strategies WHERE domain = ?',
+                (domain,)).fetchall()
+        return {strategy: (attempts, successes, latency) for strategy, attempts, successes, latency in rows}
+
+    def order(self, domain, names):
+        """Return strategy names best first for a domain
+
+        Strategies rank by smoothed success rate, then by how fast they
+        were; untried ones keep their given position. Occasionally a
+        random other strategy is moved to the front to keep learning.
+        """
+        stats = self.stats(domain)
+
+        def rank(item):
+            index, name = item
+            attempts, successes, latency = stats.get(name, (0, 0, None))
+            score = (successes + 1) / (attempts + 2)
+            return (-round(score, 2), latency if latency is not None else float('inf'), index)
+
+        ordered = [name for _, name in sorted(enumerate(names), key=rank)]
+        if len(ordered) > 1 and random.random() < self.explore_rate:
+            ordered.insert(0, ordered.pop(random.randrange(1, len(ordered))))
+        return ordered
+
+    def record(self, domain, name, ok, elapsed=None):
+        """Record one attempt of a strategy on a domain"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT attempts, successes, latency FROM strategies WHERE domain = ? AND strategy = ?',
+                (domain, name)).fetchone()
+            attempts, successes, latency = row or (0, 0, None)
+            if attempts >= MAX_ATTEMPTS:
+                attempts, successes = attempts / 2, successes / 2
+            attempts += 1
+            successes += 1 if ok else 0
+            if ok and elapsed is not None:
+                # Only successful runs say how long the strategy takes
+                latency = elapsed if latency is None else latency * 0.7 + elapsed * 0.3
+            self._db.execute(
+                'INSERT OR REPLACE INTO strategies VALUES (?, ?, ?, ?, ?, ?)',
+                (domain, name, attempts, successes, latency, time.time()))
+            self._db.commit()
+
+
+def run_strategies(url, strategies, registry=None):
+    """Try (name, func) strategies for url, best first, until one returns True
+
+    Every attempt is recorded, so the next job on the same domain starts
+    with whichever strategy has been working. Returns True if one worked.
+    A URL in the negative cache does not end the chain: the yt-dlp based
+    strategies skip it on their own (the cache is checked per command),
+    while a different kind of fetch may still get it.
+    """
+    registry = registry or get_strategy_registry()
+    domain = strategy_domain(url)
+    funcs = dict(strategies)
+    names = registry.order(domain, [name for name, _ in strategies])
+    if names[0] != strategies[0][0]:
+        attempts, successes, _ = registry.stats(domain).get(names[0], (0, 0, None))
+        history = f"worked {successes:.0f} of {attempts:.0f} times" if attempts else "not tried here yet"
+        print(f"🧠 Trying '{names[0]}' first for {domain} ({history})")
+
+    failures = get_negative_cache()
+    for name in names:
+        start = time.time()
+        try:
+            ok = bool(funcs[name]())
+        except subprocess.CalledProcessError:
+            ok = False
+        if not ok and failures.get(url) is not None:
+            # Removed, private or blocked for yt-dlp: not held against the strategy
+            continue
+        registry.record(domain, name, ok, time.time() - start)
+        if ok:
+            return True
+    return False
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_strategy_registry():
+    """Return the process-wide strategy registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = StrategyRegistry()
+        return _registry
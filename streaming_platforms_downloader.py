@@ -7,10 +7,13 @@ Supports: Periscope, Zynn, StreamYard, and other live/streaming platforms
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 from datetime import datetime
 
+from platform_index import classify
+from strategy_registry import run_strategies
+from ytdlp_engine import get_engine, ytdlp_available
+
 # Optional import - fallback if not available
 try:
     import requests
@@ -23,6 +26,7 @@ class StreamingPlatformsDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
         # Platform information
         self.platform_info = {
@@ -43,10 +47,8 @@ class StreamingPlatformsDownloader:
             }
         }
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -122,7 +124,7 @@ class StreamingPlatformsDownloader:
         try:
             print(f"📡 Attempting live stream download...")
             print("⚠️ This may take time for live content")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Live stream download successful!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Live stream download failed: {e}")
@@ -146,10 +148,23 @@ class StreamingPlatformsDownloader:
         
         try:
             print(f"📼 Starting archived stream download...")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Archived stream download successful!")
+            return True
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed: {e}")
+            return False
+
+    def download_with_fallback(self, url, quality='best'):
+        """Download an archived stream, falling back to the emergency download
+
+        Sites where the emergency download is what works get it first
+        (see strategy_registry.py).
+        """
+        return run_strategies(url, [
+            ('archived-stream', lambda: self.download_archived_stream(url, quality)),
+            ('emergency', lambda: self.emergency_download(url))
+        ])
 
     def analyze_url(self, url):
         """Analyze URL and determine best action"""
@@ -158,16 +173,17 @@ class StreamingPlatformsDownloader:
         print(f"🔍 Analyzing URL: {url[:50]}...")
         print("=" * 50)
         
-        # Check for discontinued platforms
-        if any(platform in url_lower for platform in ['periscope', 'pscp.tv']):
+        # Check for discontinued platforms (shared domain index)
+        platform = classify(url)
+        if platform == 'periscope':
             self.handle_periscope(url)
             return
         
-        if 'zynn' in url_lower:
+        if platform == 'zynn':
             self.handle_zynn(url)
             return
         
-        if 'streamyard' in url_lower:
+        if platform == 'streamyard':
             self.handle_streamyard(url)
             return
         
@@ -179,9 +195,9 @@ class StreamingPlatformsDownloader:
             if choice == 'y':
                 self.try_live_stream_download(url)
             else:
-                self.download_archived_stream(url)
+                self.download_with_fallback(url)
         else:
-            self.download_archived_stream(url)
+            self.download_with_fallback(url)
 
     def show_alternatives(self):
         """Show alternative platforms for discontinued services"""
@@ -214,10 +230,12 @@ class StreamingPlatformsDownloader:
         
         try:
             print(f"🚨 Emergency download attempt...")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Emergency download successful!")
+            return True
         except subprocess.CalledProcessError as e:
             print(f"❌ Emergency download failed: {e}")
+            return False
 
 
 def main():
@@ -0,0 +1,137 @@
+"""Tests for the PeerTube API client against a local fake instance"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from peertube_api import PeerTubeClient, archive_ids, federated_search, file_url, pick_file
+
+
+def make_video(number):
+    return {
+        'uuid': f"uuid-{number:04d}",
+        'shortUUID': f"short{number}",
+        'name': f"Video {number}"
+    }
+
+
+VIDEOS = [make_video(number) for number in range(1, 61)]
+
+DETAILS = {
+    'uuid': 'uuid-0001',
+    'shortUUID': 'short1',
+    'name': 'Video 1',
+    'files': [
+        {'resolution': {'id': 1080, 'label': '1080p'}, 'size': 900, 'fileDownloadUrl': 'http://x/1080.mp4'},
+        {'resolution': {'id': 720, 'label': '720p'}, 'size': 500, 'fileDownloadUrl': 'http://x/720.mp4'},
+        {'resolution': {'id': 0, 'label': 'Audio'}, 'size': 50, 'fileDownloadUrl': 'http://x/audio.mp4'}
+    ],
+    'streamingPlaylists': [
+        {'files': [{'resolution': {'id': 720, 'label': '720p'}, 'size': 400, 'fileUrl': 'http://x/hls-720.mp4'}]}
+    ]
+}
+
+
+class FakeInstance(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append((url.path, query))
+        if url.path in ('/api/v1/videos', '/api/v1/search/videos'):
+            videos = VIDEOS
+            if 'search' in query:
+                videos = [v for v in VIDEOS if query['search'] in v['name']]
+            start, count = int(query.get('start', 0)), int(query.get('count', 15))
+            self.reply({'total': len(videos), 'data': videos[start:start + count]})
+        elif url.path.startswith('/api/v1/videos/'):
+            uuid = url.path.rsplit('/', 1)[1]
+            self.reply(dict(DETAILS, uuid=uuid, shortUUID='short' + uuid.rsplit('-', 1)[1].lstrip('0')))
+        else:
+            self.send_error(404)
+
+    def reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def instance():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeInstance)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def instance_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_iter_videos_pages_in_order(instance):
+    client = PeerTubeClient(instance_url(instance), page_size=10)
+    videos = list(client.iter_videos(max_items=35))
+    assert [v['uuid'] for v in videos] == [v['uuid'] for v in VIDEOS[:35]]
+    pages = sorted((int(q['start']), int(q['count'])) for _, q in instance.requests)
+    assert pages == [(0, 10), (10, 10), (20, 10), (30, 5)]
+
+
+def test_iter_videos_stops_at_total(instance):
+    client = PeerTubeClient(instance_url(instance), page_size=25)
+    assert len(list(client.iter_videos(max_items=500))) == len(VIDEOS)
+
+
+def test_client_keeps_port_in_instance(instance):
+    client = PeerTubeClient(instance_url(instance))
+    assert client.instance == f"127.0.0.1:{instance.server_address[1]}"
+    assert client.watch_url({'uuid': 'abc'}) == f"{instance_url(instance)}/w/abc"
+
+
+def test_pick_file_prefers_highest_fitting_resolution():
+    assert file_url(pick_file(DETAILS)) == 'http://x/1080.mp4'
+    # Equal resolutions: the smaller (HLS) file wins
+    assert file_url(pick_file(DETAILS, max_height=720)) == 'http://x/hls-720.mp4'
+    assert file_url(pick_file(DETAILS, max_size=450)) == 'http://x/hls-720.mp4'
+
+
+def test_pick_file_falls_back_to_smallest():
+    assert file_url(pick_file(DETAILS, max_height=360)) == 'http://x/audio.mp4'
+    assert pick_file({'files': [], 'streamingPlaylists': []}) is None
+
+
+def test_archive_ids_cover_both_url_forms():
+    assert archive_ids(make_video(7)) == ['uuid-0007', 'short7']
+    assert archive_ids({'uuid': 'uuid-0007'}) == ['uuid-0007']
+
+
+def test_pick_file_from_fetched_details(instance):
+    details = PeerTubeClient(instance_url(instance)).video('uuid-0042')
+    assert (details['uuid'], details['shortUUID']) == ('uuid-0042', 'short42')
+    assert pick_file(details, 720)['resolution']['label'] == '720p'
+
+
+def test_federated_search_deduplicates_and_reports_errors(instance):
+    port = instance.server_address[1]
+    errors = []
+    # Two names for the same instance return the same UUIDs; the third refuses connections
+    unused = ThreadingHTTPServer(('127.0.0.1', 0), FakeInstance)
+    dead = f"http://127.0.0.1:{unused.server_address[1]}"
+    unused.server_close()
+    results = list(federated_search('Video 1', [f"http://127.0.0.1:{port}", f"http://localhost:{port}", dead],
+                                    max_per_instance=20, timeout=5,
+                                    on_error=lambda name, error: errors.append(name)))
+    expected = [v['uuid'] for v in VIDEOS if 'Video 1' in v['name']]
+    assert sorted(video['uuid'] for _, video in results) == expected
+    assert errors == [dead.split('://')[1]]
+    assert all(query['search'] == 'Video 1' for path, query in instance.requests)
@@ -0,0 +1,86 @@
+"""Tests for incremental source syncs against a local RSS feed"""
+
+import threading
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import download_archive
+import source_sync
+from source_sync import get_watermarks, sync_source
+from ytdlp_engine import YtDlpEngine, ytdlp_available
+
+
+pytestmark = pytest.mark.skipif(not ytdlp_available(), reason="yt-dlp is not installed")
+
+
+def rss(items):
+    entries = ''.join(
+        f"<item><title>{guid}</title><guid>{guid}</guid>"
+        f"<enclosure url=\"{{base}}/media/{guid}.mp4\" type=\"video/mp4\"/>"
+        f"<pubDate>{format_datetime(datetime.strptime(date, '%Y%m%d').replace(tzinfo=timezone.utc))}</pubDate>"
+        f"</item>"
+        for guid, date in items)
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>Feed</title>{entries}</channel></rss>"
+
+
+class FakeFeed(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/feed.xml':
+            body = rss(self.server.items).replace('{base}', self.server.base).encode()
+            content_type = 'application/rss+xml'
+        elif self.path.startswith('/media/'):
+            body = b'\x00' * 2048
+            content_type = 'video/mp4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def feed():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeFeed)
+    server.base = f"http://127.0.0.1:{server.server_address[1]}"
+    server.items = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setenv('SMDL_STATE_DIR', str(tmp_path / 'state'))
+    monkeypatch.setenv('SMDL_PROGRESS', 'off')
+    monkeypatch.setattr(download_archive, '_archive', None)
+    monkeypatch.setattr(source_sync, '_store', None)
+    return tmp_path
+
+
+def test_sync_goes_past_pinned_posts(feed, state):
+    engine = YtDlpEngine()
+    cmd = ['yt-dlp', '--playlist-end', '10', '-o', str(state / 'out' / '%(id)s.%(ext)s'), feed.base + '/feed.xml']
+
+    # A post pinned to the top of the feed, older than everything after it
+    feed.items = [('pinned', '20260101'), ('post1', '20260301')]
+    assert sync_source(engine, cmd) == 2
+    assert get_watermarks().get(source_sync.canonical_url(cmd[-1]))['newest_date'] == '20260301'
+
+    # New posts arrive behind the pinned one (already downloaded) and an old
+    # post pinned since (never downloaded, older than the watermark)
+    feed.items = [('pinned', '20260101'), ('oldpin', '20260201'),
+                  ('post3', '20260303'), ('post2', '20260302'), ('post1', '20260301')]
+    assert sync_source(engine, cmd) == 2
+    assert sorted(path.stem for path in (state / 'out').iterdir()) == ['pinned', 'post1', 'post2', 'post3']
+    assert get_watermarks().get(source_sync.canonical_url(cmd[-1]))['newest_date'] == '20260303'
@@ -7,19 +7,19 @@ Downloads music videos and content from Triller using yt-dlp
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class TrillerDownloader:
     def __init__(self, download_path="./downloads/triller"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +27,7 @@ class TrillerDownloader:
     def get_video_info(self, url):
         """Get Triller video information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Triller Video'),
@@ -95,7 +91,7 @@ class TrillerDownloader:
                 print("-" * 50)
             
             # Run download
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Triller download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -122,7 +118,7 @@ class TrillerDownloader:
         try:
             print(f"👤 Downloading videos from user: {username}")
             print(f"🔢 Max downloads: {max_downloads}")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd, archive=True)
             print("✅ User videos download completed!")
         except Exception as e:
             print(f"❌ User videos download failed: {e}")
@@ -8,19 +8,20 @@ import os
 import sys
 import argparse
 import subprocess
-import json
 from pathlib import Path
 
+from source_sync import sync_source
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class TwitterDownloader:
     def __init__(self, download_path="./twitter_downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed or not found in PATH")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -28,12 +29,7 @@ class TwitterDownloader:
     def get_tweet_info(self, url):
         """Get Twitter/X media information without downloading"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse the first line of JSON output
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Twitter Media'),
@@ -110,7 +106,7 @@ class TwitterDownloader:
                 print("-" * 50)
             
             # Run the download command
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -119,8 +115,11 @@ class TwitterDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_user_tweets(self, username, max_downloads=20):
-        """Download recent media tweets from a user (public profiles only)"""
+    def download_user_tweets(self, username, max_downloads=20, sync=False):
+        """Download recent media tweets from a user (public profiles only)
+
+        sync=True only fetches items newer than the last sync of this source
+        """
         profile_url = f"https://twitter.com/{username}"
         
         cmd = [
@@ -135,7 +134,10 @@ class TwitterDownloader:
 
         try:
             print(f"Downloading recent media tweets from @{username}...")
-            result = subprocess.run(cmd, check=True)
+            if sync:
+                sync_source(self.engine, cmd)
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ User tweets download completed!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed with exit code {e.returncode}")
@@ -158,7 +160,7 @@ class TwitterDownloader:
 
         try:
             print(f"Downloading Twitter Space from: {url}")
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Twitter Space download completed!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Download failed with exit code {e.returncode}")
@@ -179,6 +181,8 @@ def main():
     parser.add_argument('-u', '--user', help='Download recent media tweets from username')
     parser.add_argument('-n', '--number', type=int, default=20,
                         help='Number of tweets to download from user (default: 20)')
+    parser.add_argument('--sync', action='store_true',
+                        help='With --user, only download tweets newer than the last sync')
     parser.add_argument('-s', '--space', action='store_true',
                         help='Download Twitter Space audio')
     parser.add_argument('--info', action='store_true',
@@ -195,7 +199,7 @@ def main():
         print(f"👤 Username: @{args.user}")
         print(f"📊 Max tweets: {args.number}")
         print("-" * 50)
-        downloader.download_user_tweets(args.user, args.number)
+        downloader.download_user_tweets(args.user, args.number, args.sync)
         return
     
     if not args.url:
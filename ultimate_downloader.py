@@ -8,135 +8,43 @@ import os
 import sys
 import subprocess
 import json
+import threading
 from pathlib import Path
 
-# Optional import - fallback if not available
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+from batch_downloader import BatchDownloader, read_url_file
+from platform_index import PLATFORM_DOMAINS, classify
+from platform_registry import get_platform, get_registry, platforms_by_category
+from strategy_registry import run_strategies
+from ytdlp_engine import get_engine, ytdlp_available
 
 
 class UltimateDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
+        self.http = None
+        self._http_lock = threading.Lock()
         
-        # All supported platforms
+        # All supported platforms (shared read-only registry)
         self.all_platforms = {
-            # Main Western Platforms
-            'youtube': {'name': '🔴 YouTube', 'status': '✅ Full', 'extractor': 'youtube'},
-            'instagram': {'name': '📷 Instagram', 'status': '✅ Full', 'extractor': 'instagram'},
-            'twitter': {'name': '🐦 Twitter/X', 'status': '✅ Full', 'extractor': 'twitter'},
-            'tiktok': {'name': '🎵 TikTok', 'status': '✅ Full', 'extractor': 'tiktok'},
-            'facebook': {'name': '📘 Facebook', 'status': '✅ Full', 'extractor': 'facebook'},
-            
-            # Video Platforms
-            'vimeo': {'name': '🎥 Vimeo', 'status': '✅ Full', 'extractor': 'vimeo'},
-            'dailymotion': {'name': '📺 Dailymotion', 'status': '✅ Full', 'extractor': 'dailymotion'},
-            'twitch': {'name': '🟣 Twitch', 'status': '✅ Full', 'extractor': 'twitch'},
-            'reddit': {'name': '🔴 Reddit', 'status': '✅ Full', 'extractor': 'reddit'},
-            
-            # Professional Platforms
-            'linkedin': {'name': '💼 LinkedIn', 'status': '⚠️ Auth', 'extractor': 'linkedin'},
-            'pinterest': {'name': '📌 Pinterest', 'status': '⚠️ Limited', 'extractor': 'pinterest'},
-            
-            # Alternative Platforms
-            'rumble': {'name': '🎯 Rumble', 'status': '✅ Full', 'extractor': 'rumble'},
-            'odysee': {'name': '🌊 Odysee', 'status': '✅ Full', 'extractor': 'odysee'},
-            'bitchute': {'name': '🎬 BitChute', 'status': '✅ Full', 'extractor': 'bitchute'},
-            'peertube': {'name': '🌐 PeerTube', 'status': '✅ Full', 'extractor': 'peertube'},
-            
-            # Asian Platforms
-            'bilibili': {'name': '🇨🇳 Bilibili', 'status': '✅ Good', 'extractor': 'bilibili'},
-            'niconico': {'name': '🇯🇵 Niconico', 'status': '✅ Good', 'extractor': 'niconico'},
-            'youku': {'name': '🇨🇳 Youku', 'status': '✅ Good', 'extractor': 'youku'},
-            'kuaishou': {'name': '🇨🇳 Kuaishou', 'status': '⚠️ Limited', 'extractor': 'kuaishou'},
-            'weibo': {'name': '🇨🇳 Weibo', 'status': '⚠️ Limited', 'extractor': 'weibo'},
-            'douyin': {'name': '🇨🇳 Douyin', 'status': '⚠️ Limited', 'extractor': 'douyin'},
-            
-            # Indian Platforms
-            'mxtakatak': {'name': '🇮🇳 MX TakaTak', 'status': '⚠️ Limited', 'extractor': 'generic'},
-            'moj': {'name': '🇮🇳 Moj', 'status': '⚠️ Limited', 'extractor': 'generic'},
-            'chingari': {'name': '🇮🇳 Chingari', 'status': '⚠️ Limited', 'extractor': 'generic'},
-            'josh': {'name': '🇮🇳 Josh', 'status': '⚠️ Limited', 'extractor': 'generic'},
-            
-            # Other Platforms
-            'vk': {'name': '🇷🇺 VK Video', 'status': '⚠️ Limited', 'extractor': 'vk'},
-            'metacafe': {'name': '🎥 Metacafe', 'status': '⚠️ Limited', 'extractor': 'metacafe'},
-            'veoh': {'name': '📹 Veoh', 'status': '⚠️ Limited', 'extractor': 'veoh'},
-            'dtube': {'name': '⛓️ DTube', 'status': '⚠️ Limited', 'extractor': 'generic'},
-            'younow': {'name': '📡 YouNow', 'status': '⚠️ Live Only', 'extractor': 'younow'},
-            'trovo': {'name': '🎮 Trovo', 'status': '⚠️ Live Only', 'extractor': 'trovo'},
-            
-            # Streaming/Discontinued
-            'snapchat': {'name': '👻 Snapchat', 'status': '❌ Very Limited', 'extractor': 'generic'},
-            'discord': {'name': '🎮 Discord', 'status': '✅ Direct Links', 'extractor': 'direct'},
-            'periscope': {'name': '📡 Periscope', 'status': '❌ Discontinued', 'extractor': 'none'},
-            'zynn': {'name': '🎬 Zynn', 'status': '❌ Discontinued', 'extractor': 'none'},
-            'tubi': {'name': '📺 Tubi', 'status': '❌ DRM Protected', 'extractor': 'none'},
-            'streamyard': {'name': '🎥 StreamYard', 'status': '❌ Tool Only', 'extractor': 'none'}
+            name: {'name': platform['label'], 'status': platform['status'],
+                   'extractor': platform['extractor']}
+            for name, platform in get_registry().items()
         }
         
-        # Platform detection patterns
-        self.platform_patterns = {
-            'youtube': ['youtube.com', 'youtu.be'],
-            'instagram': ['instagram.com'],
-            'twitter': ['twitter.com', 'x.com'],
-            'tiktok': ['tiktok.com'],
-            'facebook': ['facebook.com', 'fb.com'],
-            'vimeo': ['vimeo.com'],
-            'dailymotion': ['dailymotion.com'],
-            'twitch': ['twitch.tv'],
-            'reddit': ['reddit.com'],
-            'linkedin': ['linkedin.com'],
-            'pinterest': ['pinterest.com'],
-            'rumble': ['rumble.com'],
-            'odysee': ['odysee.com', 'lbry.tv'],
-            'bitchute': ['bitchute.com'],
-            'peertube': ['peertube'],
-            'bilibili': ['bilibili.com', 'b23.tv'],
-            'niconico': ['nicovideo.jp', 'nico.ms'],
-            'youku': ['youku.com'],
-            'kuaishou': ['kuaishou.com'],
-            'weibo': ['weibo.com'],
-            'douyin': ['douyin.com'],
-            'mxtakatak': ['mxtakatak.com', 'takatak.tv'],
-            'moj': ['moj.tv', 'mojapp.in'],
-            'chingari': ['chingari.io'],
-            'josh': ['josh.in'],
-            'vk': ['vk.com', 'vkontakte'],
-            'metacafe': ['metacafe.com'],
-            'veoh': ['veoh.com'],
-            'dtube': ['dtube'],
-            'younow': ['younow.com'],
-            'trovo': ['trovo.live'],
-            'snapchat': ['snapchat.com'],
-            'discord': ['cdn.discordapp.com', 'media.discordapp.net'],
-            'periscope': ['periscope.tv', 'pscp.tv'],
-            'zynn': ['zynn'],
-            'tubi': ['tubi.tv'],
-            'streamyard': ['streamyard.com']
-        }
+        # Platform detection patterns (shared, compiled once in platform_index)
+        self.platform_patterns = PLATFORM_DOMAINS
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
 
     def detect_platform(self, url):
         """Auto-detect platform from URL"""
-        url_lower = url.lower()
-        
-        for platform, patterns in self.platform_patterns.items():
-            for pattern in patterns:
-                if pattern in url_lower:
-                    return platform
-        return 'unknown'
+        return classify(url)
 
     def download_content(self, url, quality='best', format_type='video'):
         """Universal download function"""
@@ -148,13 +56,12 @@ class UltimateDownloader:
         print("-" * 50)
         
         # Handle special cases
-        if platform in ['periscope', 'zynn', 'tubi', 'streamyard']:
+        if platform_info.get('extractor') == 'none':
             self.handle_discontinued_platform(platform, url)
-            return
+            return False
         
         if platform == 'discord':
-            self.download_discord_attachment(url)
-            return
+            return self.download_discord_attachment(url)
         
         # Standard download
         platform_dir = self.download_path / platform
@@ -170,7 +77,7 @@ class UltimateDownloader:
             cmd.extend(['-f', quality])
         
         # Add geo-bypass for Chinese platforms
-        if platform in ['bilibili', 'youku', 'kuaishou', 'weibo', 'douyin']:
+        if platform != 'unknown' and get_platform(platform)['geo_bypass']:
             cmd.append('--geo-bypass')
         
         # Add output template
@@ -185,19 +92,27 @@ class UltimateDownloader:
         # Add URL
         cmd.append(url)
         
-        try:
-            print(f"🚀 Starting download from {platform_info.get('name', platform)}...")
-            result = subprocess.run(cmd, check=True)
-            print("✅ Download successful!")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Download failed: {e}")
-            
-            # Try fallback methods
-            if platform in ['mxtakatak', 'moj', 'chingari', 'josh']:
-                print("🔄 Trying Indian platform fallback...")
-                self.try_indian_platform_fallback(url, platform)
-            else:
-                print("💡 Try updating yt-dlp or check if URL is accessible")
+        def download_standard():
+            try:
+                print(f"🚀 Starting download from {platform_info.get('name', platform)}...")
+                result = self.engine.run(cmd)
+                print("✅ Download successful!")
+                return True
+            except subprocess.CalledProcessError as e:
+                print(f"❌ Download failed: {e}")
+                return False
+
+        # Try fallback methods, starting with whichever has been working
+        # for the site (see strategy_registry.py)
+        if platform in ['mxtakatak', 'moj', 'chingari', 'josh']:
+            return run_strategies(url, [
+                ('standard', download_standard),
+                ('generic', lambda: self.try_indian_platform_fallback(url, platform))
+            ])
+        if download_standard():
+            return True
+        print("💡 Try updating yt-dlp or check if URL is accessible")
+        return False
 
     def handle_discontinued_platform(self, platform, url):
         """Handle discontinued platforms"""
@@ -230,10 +145,17 @@ class UltimateDownloader:
 
     def download_discord_attachment(self, url):
         """Special handler for Discord attachments"""
-        if not REQUESTS_AVAILABLE:
-            print("❌ Discord downloads require 'requests' module")
-            print("💡 Install with: pip3 install requests")
-            return
+        # Pooled session; large files are split over ranged connections.
+        # Batch workers share the one downloader, so only one may create it
+        with self._http_lock:
+            if self.http is None:
+                try:
+                    from http_downloader import HttpDownloader
+                except ImportError:
+                    print("❌ Discord downloads require 'requests' module")
+                    print("💡 Install with: pip3 install requests")
+                    return False
+                self.http = HttpDownloader()
             
         try:
             filename = os.path.basename(url.split('?')[0])
@@ -243,20 +165,18 @@ class UltimateDownloader:
             platform_dir = self.download_path / 'discord'
             platform_dir.mkdir(exist_ok=True)
             
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            
             output_path = platform_dir / filename
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            self.http.download(url, output_path)
             
             print(f"✅ Discord attachment downloaded: {filename}")
+            return True
         except Exception as e:
             print(f"❌ Discord download failed: {e}")
+            return False
 
     def try_indian_platform_fallback(self, url, platform):
         """Fallback for Indian platforms"""
+        print("🔄 Trying Indian platform fallback...")
         print(f"🇮🇳 {platform.upper()} may require specialized extraction")
         print("💡 These platforms often have app-specific APIs")
         print("🔄 Attempting generic extraction...")
@@ -271,28 +191,20 @@ class UltimateDownloader:
         ]
         
         try:
-            subprocess.run(cmd, check=True)
+            self.engine.run(cmd)
             print("✅ Generic extraction successful!")
+            return True
         except subprocess.CalledProcessError:
             print("❌ Generic extraction failed")
             print(f"💡 {platform.title()} may need manual download or API access")
+            return False
 
     def list_all_platforms(self):
         """List all supported platforms"""
         print("\n🌟 ULTIMATE DOWNLOADER - ALL PLATFORMS:")
         print("=" * 60)
         
-        categories = {
-            'Main Western': ['youtube', 'instagram', 'twitter', 'tiktok', 'facebook'],
-            'Video Platforms': ['vimeo', 'dailymotion', 'twitch', 'reddit'],
-            'Professional': ['linkedin', 'pinterest'],
-            'Alternative': ['rumble', 'odysee', 'bitchute', 'peertube'],
-            'Asian Platforms': ['bilibili', 'niconico', 'youku', 'kuaishou', 'weibo', 'douyin'],
-            'Indian Platforms': ['mxtakatak', 'moj', 'chingari', 'josh'],
-            'Other/Regional': ['vk', 'metacafe', 'veoh', 'dtube'],
-            'Streaming/Live': ['younow', 'trovo', 'snapchat', 'discord'],
-            'Discontinued': ['periscope', 'zynn', 'tubi', 'streamyard']
-        }
+        categories = platforms_by_category()
         
         for category, platforms in categories.items():
             print(f"\n📂 {category}:")
@@ -334,6 +246,7 @@ def main():
         print("3. Quality: python3 ultimate_downloader.py <url> --quality 720p")
         print("4. List platforms: python3 ultimate_downloader.py --list")
         print("5. Show examples: python3 ultimate_downloader.py --examples")
+        print("6. Batch: python3 ultimate_downloader.py --batch urls.txt [--workers 8]")
         print("\n🌏 Supported: YouTube, Instagram, TikTok, Bilibili, MX TakaTak, Moj, and 25+ more!")
         sys.exit(1)
     
@@ -346,8 +259,6 @@ def main():
         downloader.show_usage_examples()
         return
     
-    url = sys.argv[1]
-    
     # Parse arguments
     quality = 'best'
     format_type = 'video'
@@ -362,6 +273,24 @@ def main():
         except (IndexError, ValueError):
             quality = 'best'
     
+    if sys.argv[1] == '--batch':
+        if len(sys.argv) < 3:
+            print("❌ Error: Please provide a URLs file after --batch")
+            sys.exit(1)
+        
+        workers = 8
+        if '--workers' in sys.argv:
+            try:
+                workers = int(sys.argv[sys.argv.index('--workers') + 1])
+            except (IndexError, ValueError):
+                workers = 8
+        
+        batch = BatchDownloader(downloader.detect_platform, max_workers=workers)
+        batch.download_all(read_url_file(sys.argv[2]),
+                           lambda url: downloader.download_content(url, quality, format_type))
+        return
+    
+    url = sys.argv[1]
     downloader.download_content(url, quality, format_type)
 
 
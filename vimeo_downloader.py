@@ -7,19 +7,21 @@ Handles Vimeo-specific format issues and downloads
 import os
 import sys
 import subprocess
-import json
 from pathlib import Path
 
+from format_catalog import choose_format, get_catalog
+from strategy_registry import run_strategies
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class VimeoDownloader:
     def __init__(self, download_path="./downloads/vimeo"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(parents=True, exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -27,11 +29,7 @@ class VimeoDownloader:
     def get_video_info(self, url):
         """Get Vimeo video information"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Unknown'),
@@ -46,12 +44,9 @@ class VimeoDownloader:
             return None
 
     def get_available_formats(self, url):
-        """Get available formats for Vimeo video"""
+        """Get the format catalog of a Vimeo video (print it with .table())"""
         try:
-            cmd = ['yt-dlp', '--list-formats', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            return result.stdout
+            return get_catalog(self.engine, url)
         except Exception as e:
             print(f"Error getting formats: {e}")
             return None
@@ -59,18 +54,8 @@ class VimeoDownloader:
     def download_video(self, url, quality='720p'):
         """Download Vimeo video with proper format handling"""
         
-        # Quality format mapping for Vimeo
-        quality_mapping = {
-            '1080p': 'hls-fastly_skyfire-1926+hls-fastly_skyfire-audio-high-English',
-            '720p': 'hls-fastly_skyfire-1926+hls-fastly_skyfire-audio-high-English', 
-            '540p': 'hls-fastly_skyfire-1164+hls-fastly_skyfire-audio-high-English',
-            '360p': 'hls-fastly_skyfire-664+hls-fastly_skyfire-audio-high-English',
-            '240p': 'hls-fastly_skyfire-415+hls-fastly_skyfire-audio-high-English',
-            'best': 'best[height<=1080]/best',
-            'audio': 'hls-fastly_skyfire-audio-high-English'
-        }
-        
-        format_selector = quality_mapping.get(quality, 'best[height<=720]/best')
+        # Vimeo's format ids differ per CDN and video, so pick from its own catalog
+        format_selector = choose_format(self.engine, url, quality, best_height=1080)
         
         cmd = [
             'yt-dlp',
@@ -83,28 +68,37 @@ class VimeoDownloader:
             url
         ]
 
+        def download_catalog_format():
+            try:
+                print(f"🎬 Starting Vimeo download...")
+                print(f"📊 Quality: {quality}")
+
+                # Get video info first
+                info = self.get_video_info(url)
+                if info:
+                    print(f"📹 Title: {info['title']}")
+                    print(f"👤 Uploader: {info['uploader']}")
+                    print(f"⏱️  Duration: {info['duration']} seconds")
+                    print("-" * 50)
+
+                # Run download
+                result = self.engine.run(cmd)
+                print("✅ Vimeo download successful!")
+                return True
+            except subprocess.CalledProcessError as e:
+                print(f"❌ Download failed with exit code {e.returncode}")
+                return False
+
+        # Videos that keep failing the exact format go straight to the
+        # plain fallback next time (see strategy_registry.py)
         try:
-            print(f"🎬 Starting Vimeo download...")
-            print(f"📊 Quality: {quality}")
-            
-            # Get video info first
-            info = self.get_video_info(url)
-            if info:
-                print(f"📹 Title: {info['title']}")
-                print(f"👤 Uploader: {info['uploader']}")
-                print(f"⏱️  Duration: {info['duration']} seconds")
-                print("-" * 50)
-            
-            # Run download
-            result = subprocess.run(cmd, check=True)
-            print("✅ Vimeo download successful!")
-                
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Download failed with exit code {e.returncode}")
-            print("Trying alternative method...")
-            self.download_fallback(url)
+            return run_strategies(url, [
+                ('catalog-format', download_catalog_format),
+                ('best-or-worst', lambda: self.download_fallback(url))
+            ])
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
+            return False
 
     def download_fallback(self, url):
         """Fallback method for problematic Vimeo videos"""
@@ -117,10 +111,13 @@ class VimeoDownloader:
         ]
         
         try:
-            result = subprocess.run(cmd, check=True)
+            print("🔄 Trying alternative method...")
+            result = self.engine.run(cmd)
             print("✅ Fallback download successful!")
+            return True
         except Exception as e:
-            print(f"❌ Fallback also failed: {e}")
+            print(f"❌ Fallback failed: {e}")
+            return False
 
 
 def main():
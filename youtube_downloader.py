@@ -8,19 +8,21 @@ import os
 import sys
 import argparse
 import subprocess
-import json
 from pathlib import Path
 
+from format_catalog import choose_format
+from parallel_playlist import download_playlist_parallel, playlist_succeeded
+from ytdlp_engine import get_engine, ytdlp_available
+
 
 class YouTubeDownloader:
     def __init__(self, download_path="./downloads"):
         self.download_path = Path(download_path)
         self.download_path.mkdir(exist_ok=True)
+        self.engine = get_engine()
         
-        # Check if yt-dlp is available
-        try:
-            subprocess.run(['yt-dlp', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if yt-dlp is available (probed once, cached until it changes)
+        if not ytdlp_available():
             print("❌ Error: yt-dlp is not installed or not found in PATH")
             print("Please install it with: pipx install yt-dlp")
             sys.exit(1)
@@ -28,12 +30,7 @@ class YouTubeDownloader:
     def get_video_info(self, url):
         """Get video information without downloading"""
         try:
-            cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse the first line of JSON output
-            info_line = result.stdout.strip().split('\n')[0]
-            info = json.loads(info_line)
+            info = self.engine.extract_info(url)
             
             return {
                 'title': info.get('title', 'Unknown'),
@@ -60,20 +57,8 @@ class YouTubeDownloader:
                 '--format', 'bestaudio/best'
             ])
         else:
-            # Video download options
-            if quality == 'best':
-                format_selector = 'best[height<=1080]'
-            elif quality == 'worst':
-                format_selector = 'worst'
-            elif quality == '720p':
-                format_selector = 'best[height<=720]'
-            elif quality == '480p':
-                format_selector = 'best[height<=480]'
-            elif quality == '360p':
-                format_selector = 'best[height<=360]'
-            else:
-                format_selector = 'best'
-                
+            # Smallest format at the requested height (best is capped at 1080p)
+            format_selector = choose_format(self.engine, url, quality, best_height=1080)
             cmd.extend(['--format', format_selector, '--merge-output-format', 'mp4'])
 
         # Add output template and other options
@@ -95,7 +80,7 @@ class YouTubeDownloader:
                 print("-" * 50)
             
             # Run the download command
-            result = subprocess.run(cmd, check=True)
+            result = self.engine.run(cmd)
             print("✅ Download successful!")
                 
         except subprocess.CalledProcessError as e:
@@ -103,8 +88,12 @@ class YouTubeDownloader:
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-    def download_playlist(self, url, quality='best', format_type='video'):
-        """Download entire playlist"""
+    def download_playlist(self, url, quality='best', format_type='video', workers=1):
+        """Download entire playlist
+
+        workers > 1 enumerates the playlist first and downloads that many
+        entries at a time instead of one yt-dlp run going through them in turn
+        """
         cmd = ['yt-dlp']
         
         if format_type == 'audio':
@@ -133,7 +122,11 @@ class YouTubeDownloader:
         ])
 
         try:
-            result = subprocess.run(cmd, check=True)
+            if workers > 1:
+                if not playlist_succeeded(download_playlist_parallel(self.engine, cmd, workers)):
+                    return
+            else:
+                result = self.engine.run(cmd, archive=True)
             print("✅ Playlist download completed!")
         except subprocess.CalledProcessError as e:
             print(f"❌ Playlist download failed with exit code {e.returncode}")
@@ -152,6 +145,8 @@ def main():
                         help='Output directory (default: ./downloads)')
     parser.add_argument('-p', '--playlist', action='store_true',
                         help='Download entire playlist')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help='Enumerate the playlist first, then download N entries at a time (default: 1, serial)')
     parser.add_argument('--info', action='store_true',
                         help='Show video information without downloading')
     
@@ -181,7 +176,7 @@ def main():
     
     if args.playlist:
         print("📋 Downloading playlist...")
-        downloader.download_playlist(args.url, args.quality, args.format)
+        downloader.download_playlist(args.url, args.quality, args.format, args.parallel)
     else:
         print("📹 Downloading single video...")
         downloader.download_video(args.url, args.quality, args.format)
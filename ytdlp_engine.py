@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+"""
+Shared yt-dlp Engine
+Drives yt-dlp through its embedded YoutubeDL API inside our own process,
+falling back to the yt-dlp command line when the module is not importable
+"""
+
+import json
+import optparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from adaptive_concurrency import get_concurrency, limit_key, pushback_signal
+from bandwidth import get_bandwidth, option_rate, with_limit_rate
+from download_archive import get_archive
+from download_errors import TRANSIENT, DownloadFailure, backoff_delay, cacheable, classify_error, error_reason
+from download_errors import get_negative_cache
+from fragment_limits import get_fragment_limits
+from job_watchdog import JobWatch, job_class as guess_job_class, kill_job
+from local_state import state_path
+from metadata_cache import get_metadata_cache
+from platform_index import classify
+from progress_events import JobProgress, parse_progress_line, with_progress_templates, without_progress_bar
+
+# Optional import - fallback to the yt-dlp binary if not available
+try:
+    import yt_dlp
+    YT_DLP_AVAILABLE = True
+except ImportError:
+    YT_DLP_AVAILABLE = False
+
+
+class YtDlpEngine:
+    def __init__(self, in_process=True):
+        # Only run in-process when the yt_dlp module can actually be imported
+        self.in_process = in_process and YT_DLP_AVAILABLE
+        self._local = threading.local()
+
+        # Info dicts from recent extractions, handed over to the next download
+        # of the same URL so the page is only extracted once per job
+        self._recent_info = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self.recent_info_limit = 32
+        self.recent_info_ttl = 900
+
+        # Optional pool of warm worker processes (see use_worker_pool, SMDL_WORKER_POOL)
+        self.pool = None
+
+        # Extracted metadata shared across runs (see metadata_cache.py)
+        self.metadata_cache = get_metadata_cache()
+
+        # Per-platform concurrent fragment downloads (see fragment_limits.py)
+        self.fragments = get_fragment_limits()
+
+        # Shared global/per-platform rate limits (see bandwidth.py)
+        self.bandwidth = get_bandwidth()
+
+        # Per-platform job concurrency learned from pushback (see adaptive_concurrency.py)
+        self.concurrency = get_concurrency()
+
+        # URLs known to fail for good, and retries of transient failures
+        # (see download_errors.py)
+        self.failures = get_negative_cache()
+        self.transient_retries = 2
+
+    def use_worker_pool(self, workers=4, max_jobs_per_worker=50):
+        """Run jobs in long-lived worker processes instead of this process"""
+        if not YT_DLP_AVAILABLE:
+            print("⚠️ Worker pool needs the yt_dlp module, using the yt-dlp command line")
+            return
+        from ytdlp_workers import WorkerPool
+
+        self.close()
+        self.pool = WorkerPool(workers, max_jobs_per_worker)
+
+    def close(self):
+        """Shut down the worker pool if one is running"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def _extractor(self):
+        """Return this thread's warmed YoutubeDL instance used for metadata extraction"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL({
+                'quiet': True,
+                'no_warnings': True,
+                'skip_download': True
+            })
+            self._local.ydl = ydl
+        return ydl
+
+    def extract_info(self, url, refresh=False):
+        """Return the raw info dict for a URL (same data as `yt-dlp --dump-json`)
+
+        Results are served from the shared metadata cache while they are
+        fresh for their platform; refresh=True always extracts again.
+        URLs known to fail for good raise DownloadFailure without extracting.
+        """
+        cached = None if refresh else self.metadata_cache.get(url)
+        if cached is not None:
+            info, fetched_at = cached
+            if info.get('_type', 'video') == 'video':
+                self._remember_info(url, info, fetched_at)
+            return info
+
+        cmd = ['yt-dlp', '--dump-json', '--no-warnings', url]
+        known = self.failures.get(url, cmd)
+        if known is not None:
+            category, reason, _ = known
+            raise DownloadFailure(1, cmd, category, reason, cached=True)
+
+        try:
+            if self.pool is not None:
+                info = self.pool.extract_info(url)
+            elif self.in_process:
+                info = extract_in_process(self._extractor(), url)
+            else:
+                result = run_extraction(cmd)
+                # Parse the first line of JSON output
+                info_line = result.stdout.strip().split('\n')[0]
+                info = json.loads(info_line)
+        except subprocess.CalledProcessError as e:
+            raise self._failure(url, e) from None
+
+        # --dump-json prints one line per entry; callers only ever read the first
+        if info.get('_type') == 'playlist' and info.get('entries'):
+            info = info['entries'][0]
+        elif info.get('_type', 'video') == 'video':
+            self._remember_info(url, info)
+        self.metadata_cache.put(url, info)
+        return info
+
+    def extract_playlist(self, url, limit=None, items=None):
+        """Enumerate a playlist/channel without extracting its entries
+
+        Same data as `yt-dlp --flat-playlist -J`: the playlist's own fields
+        plus lightweight entries (id, url, title). limit stops enumeration
+        after that many entries, like --playlist-end; items selects entries
+        like -I/--playlist-items (e.g. '3:10' or '1,4,7'), and their
+        positions in the playlist come back as 'requested_entries'.
+        """
+        if YT_DLP_AVAILABLE and (self.in_process or self.pool is not None):
+            ydl_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'skip_download': True,
+                'extract_flat': 'in_playlist'
+            }
+            if limit:
+                ydl_opts['playlistend'] = limit
+            if items:
+                ydl_opts['playlist_items'] = items
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                return extract_in_process(ydl, url)
+
+        cmd = ['yt-dlp', '--flat-playlist', '-J', '--no-warnings']
+        if limit:
+            cmd.extend(['--playlist-end', str(limit)])
+        if items:
+            cmd.extend(['--playlist-items', items])
+        result = run_extraction(cmd + [url])
+        return json.loads(result.stdout)
+
+    def _remember_info(self, url, info, extracted_at=None):
+        """Keep an extracted info dict so the following download can reuse it"""
+        with self._recent_lock:
+            self._recent_info[url] = (extracted_at or time.time(), info)
+            self._recent_info.move_to_end(url)
+            while len(self._recent_info) > self.recent_info_limit:
+                self._recent_info.popitem(last=False)
+
+    def _take_info(self, url):
+        """Return (and forget) a still-fresh info dict previously extracted for url"""
+        with self._recent_lock:
+            entry = self._recent_info.pop(url, None)
+        if entry is None:
+            return None
+        extracted_at, info = entry
+        if time.time() - extracted_at > self.recent_info_ttl:
+            return None
+        return info
+
+    def run(self, cmd, archive=False, job_class=None):
+        """Run a yt-dlp command line (a list starting with 'yt-dlp')
+
+        Behaves like subprocess.run(cmd, check=True): raises
+        subprocess.CalledProcessError when yt-dlp reports a failure, as a
+        DownloadFailure that also carries the kind of failure (see
+        download_errors.py). Transient failures are retried after a
+        jittered exponential backoff; URLs that failed for good (removed,
+        private, geo-blocked) are remembered for a while and fail straight
+        away without running yt-dlp.
+        If the URL was extracted moments ago by extract_info, that info is
+        loaded with --load-info-json instead of extracting the page again.
+        With archive=True, items already in the shared download archive are
+        skipped before they are extracted, and new downloads are recorded.
+        HLS/DASH fragments are fetched concurrently as far as the platform's
+        fragment limit allows; throttling seen during the run lowers it,
+        and any pushback (429, 403, captcha, login wall) also lowers how
+        many jobs of the platform batch runs start at once.
+        The job draws its bandwidth from the shared scheduler; an explicit
+        --limit-rate in cmd caps this job's share.
+        A watchdog stops the job when its download stalls (it is then
+        resumed like any transient failure) or when it runs past the
+        deadline of its class ('video', 'playlist', 'live' or 'extract',
+        guessed from cmd unless job_class is given; see job_watchdog.py).
+        Progress is published as events on the shared progress bus (see
+        progress_events.py) instead of yt-dlp drawing its own bar.
+        """
+        url = cmd[-1] if len(cmd) > 1 else None
+        known = self.failures.get(url, cmd) if url else None
+        if known is not None:
+            category, reason, _ = known
+            raise DownloadFailure(1, cmd, category, reason, cached=True)
+
+        events = JobProgress(url)
+        events.start()
+        attempt = 0
+        while True:
+            try:
+                result = self._run_once(cmd, archive, job_class or guess_job_class(cmd), events)
+            except subprocess.CalledProcessError as e:
+                failure = self._failure(url, e)
+                if failure.category is None:
+                    events.finish(failure)
+                    raise
+                if failure.category == TRANSIENT and attempt < self.transient_retries:
+                    delay = backoff_delay(attempt)
+                    attempt += 1
+                    print(f"🔁 Temporary failure ({(failure.reason or f'exit code {e.returncode}')[:80]}), "
+                          f"retrying in {delay:.0f}s")
+                    time.sleep(delay)
+                    continue
+                events.finish(failure)
+                raise failure from None
+            events.finish()
+            return result
+
+    def _failure(self, url, e):
+        """Turn a CalledProcessError into a DownloadFailure, remembering URLs that fail for good"""
+        reason = error_reason(e.stderr if isinstance(e.stderr, str) else None)
+        category = classify_error(reason, e.returncode)
+        if url and category not in (None, TRANSIENT) and cacheable(url, reason, e.returncode):
+            self.failures.put(url, category, reason)
+        return DownloadFailure(e.returncode, e.cmd, category, reason, e.output, e.stderr)
+
+    def _run_once(self, cmd, archive, job_class, events=None):
+        platform = classify(cmd[-1]) if len(cmd) > 1 else 'unknown'
+        cmd = self.fragments.apply(cmd, platform)
+        signals = []
+        messages = []
+
+        def on_message(message):
+            signal = pushback_signal(message)
+            if signal:
+                signals.append(signal)
+            if signal or message.lstrip().startswith('ERROR'):
+                messages.append(message.strip())
+
+        start = time.time()
+        try:
+            with self.bandwidth.job(platform, option_rate(cmd)) as bandwidth, JobWatch(job_class) as watch:
+                result = self._run_job(cmd, archive, on_message, bandwidth, watch, events)
+        except subprocess.CalledProcessError as e:
+            # 101: stopped on purpose (--max-downloads, a sync...), not a failure
+            self._report(cmd[-1], platform, e.returncode == 101, time.time() - start, signals)
+            if messages and not e.stderr:
+                # Lets callers tell the user why, whichever way the job ran
+                e.stderr = '\n'.join(messages[-5:])
+            raise
+        self._report(cmd[-1], platform, True, time.time() - start, signals)
+        return result
+
+    def _report(self, url, platform, ok, elapsed, signals):
+        """Feed a finished job's pushback signals to the fragment and job limits"""
+        throttled = [s for s in signals if s in ('429', '503')]
+        # A failure unrelated to throttling says nothing about the fragment limit
+        if ok or throttled:
+            self.fragments.report(platform, throttled)
+        self.concurrency.record(limit_key(url, platform), ok, elapsed, signals[0] if signals else None)
+
+    def _run_job(self, cmd, archive, on_message, bandwidth, watch=None, events=None):
+        info = self._take_info(cmd[-1]) if len(cmd) > 1 else None
+        if info is None:
+            return self._run(cmd, archive=archive, on_message=on_message, bandwidth=bandwidth, watch=watch,
+                             events=events)
+
+        fd, info_path = tempfile.mkstemp(prefix='smdl-', suffix='.info.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(info, f)
+            return self._run(cmd, info_path, archive, on_message, bandwidth, watch, events)
+        finally:
+            os.remove(info_path)
+
+    def _run(self, cmd, info_path=None, archive=False, on_message=None, bandwidth=None, watch=None,
+             events=None):
+        """Execute a yt-dlp command line in a worker, in-process or as a subprocess"""
+        limited = bandwidth is not None and bandwidth.rate is not None
+        if self.in_process and self.pool is None:
+            # The hook follows the job's share as other jobs start and finish
+            return run_in_process(without_progress_bar(cmd) if events else cmd, info_path,
+                                  [bandwidth.progress_hook()] if limited else None,
+                                  download_archive=get_archive() if archive else None,
+                                  on_message=on_message, watch=watch, events=events)
+
+        if limited:
+            # Other processes only take the share the job has right now
+            cmd = with_limit_rate(cmd, bandwidth.rate)
+        if self.pool is not None:
+            if events is not None:
+                cmd = without_progress_bar(cmd)
+            return self.pool.run(cmd, info_path, archive=archive, on_message=on_message, watch=watch,
+                                 events=events)
+
+        if info_path:
+            cmd = cmd[:-1] + ['--load-info-json', info_path]
+        if events is not None:
+            cmd = with_progress_templates(cmd)
+        if not archive:
+            return run_command(cmd, on_message, watch, events)
+
+        # The command line keeps the archive's plain-text mirror up to date;
+        # whatever it adds is imported into the database afterwards
+        download_archive = get_archive()
+        cmd = cmd[:1] + ['--download-archive', download_archive.mirror_path] + cmd[1:]
+        try:
+            return run_command(cmd, on_message, watch, events)
+        finally:
+            download_archive.import_mirror()
+
+
+def run_command(cmd, on_message=None, watch=None, events=None):
+    """subprocess.run(cmd, check=True), also passing each output line to on_message
+
+    yt-dlp reports fragment retries on stdout and errors on stderr, so both
+    streams are relayed to ours as they arrive and scanned on the way.
+    With a JobWatch, the output also counts as progress, and the command
+    (with any ffmpeg it started) is killed once the watch gives up on it.
+    Lines printed by progress_events.PROGRESS_TEMPLATES are not relayed;
+    they feed the watch and are published through events (a JobProgress).
+    """
+    if on_message is None and watch is None and events is None:
+        return subprocess.run(cmd, check=True)
+
+    def on_line(line):
+        parsed = parse_progress_line(line)
+        if parsed is not None:
+            kind, status = parsed
+            for target in (watch, events):
+                if target is not None:
+                    hook = target.progress_hook if kind == 'download' else target.postprocessor_hook
+                    hook(status)
+            return True
+        if watch is not None:
+            watch.on_line(line)
+        if on_message is not None:
+            on_message(line)
+        return False
+
+    if watch is not None and ('-q' in cmd or '--quiet' in cmd) and '--progress' not in cmd:
+        # Nothing to watch: a quiet yt-dlp prints no progress
+        watch.stall_timeout = None
+
+    # Its own process group, so a kill also takes down ffmpeg children
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=os.name == 'posix')
+    relays = [threading.Thread(target=_relay, args=(stream, target, on_line), daemon=True)
+              for stream, target in ((process.stdout, sys.stdout), (process.stderr, sys.stderr))]
+    for relay in relays:
+        relay.start()
+    if watch is not None:
+        watch.start(lambda reason: kill_job(process))
+    try:
+        returncode = process.wait()
+    except BaseException:
+        # Not in our process group any more, so Ctrl+C does not reach it
+        kill_job(process)
+        raise
+    finally:
+        if watch is not None:
+            watch.stop()
+    for relay in relays:
+        relay.join()
+    if returncode:
+        if watch is not None and watch.reason:
+            raise subprocess.CalledProcessError(returncode, cmd, stderr=f"ERROR: {watch.reason}")
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return subprocess.CompletedProcess(cmd, 0)
+
+
+def run_extraction(cmd):
+    """subprocess.run() an extraction command line, held to the 'extract' deadline"""
+    deadline = JobWatch('extract').deadline
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=deadline)
+    except subprocess.TimeoutExpired as e:
+        raise subprocess.CalledProcessError(
+            1, cmd, e.output, f"ERROR: extract job exceeded its deadline of {deadline:.0f}s") from None
+
+
+def _relay(source, target, on_line):
+    """Copy a child's output stream to ours line by line, handing every line to on_line
+
+    Lines on_line returns True for are kept off our stream.
+    """
+    pending = b''
+    for chunk in iter(lambda: source.read1(65536), b''):
+        # Progress updates end in \r rather than \n
+        *lines, pending = re.split(rb'(?<=[\r\n])', pending + chunk)
+        for line in lines:
+            text = line.decode(errors='replace')
+            if not (text.strip() and on_line(text.rstrip('\r\n'))):
+                target.write(text)
+        target.flush()
+    if pending:
+        text = pending.decode(errors='replace')
+        if not on_line(text):
+            target.write(text)
+            target.flush()
+    source.close()
+
+
+if YT_DLP_AVAILABLE:
+    class ReportingYoutubeDL(yt_dlp.YoutubeDL):
+        """YoutubeDL that also hands every warning and error it prints to on_message"""
+
+        on_message = None
+        watch = None
+
+        def report_warning(self, message, only_once=False):
+            super().report_warning(message, only_once)
+            if self.on_message:
+                self.on_message(message)
+
+        def to_stderr(self, message, only_once=False):
+            super().to_stderr(message, only_once)
+            if self.on_message:
+                self.on_message(message)
+
+        def to_screen(self, message, skip_eol=False, quiet=None, only_once=False):
+            super().to_screen(message, skip_eol, quiet, only_once)
+            # Fragment retries ("Got error: HTTP Error 429 ...") are only
+            # printed to the screen; progress lines are not worth passing on
+            if self.on_message and 'error' in message.lower():
+                self.on_message(message)
+            if self.watch is not None:
+                # Retry messages are where a stalled download wakes up
+                self.watch.on_line(message)
+                if self.watch.reason:
+                    raise JobAborted(self.watch.reason)
+
+    class JobAborted(yt_dlp.utils.DownloadCancelled):
+        """Raised inside yt-dlp to stop a job its JobWatch gave up on"""
+
+
+def extract_in_process(ydl, url):
+    """Extract a URL with an existing YoutubeDL instance and return a JSON-safe dict"""
+    try:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+    except yt_dlp.utils.DownloadError as e:
+        raise subprocess.CalledProcessError(
+            1, ['yt-dlp', '--dump-json', url], stderr=str(e))
+
+
+def run_in_process(cmd, info_path=None, progress_hooks=None, download_archive=None, on_message=None,
+                   postprocessor_hooks=None, watch=None, events=None):
+    """Run a yt-dlp command line through the YoutubeDL API of this process
+
+    download_archive is a set-like archive (see download_archive.py) that
+    yt-dlp checks before extracting each item and adds finished items to.
+    on_message receives every warning and error yt-dlp reports.
+    A thread cannot be killed, so a JobWatch that gives up on the job
+    makes yt-dlp stop at its next progress update or retry message
+    (socket timeouts make sure one comes).
+    events (a JobProgress) publishes the job's progress.
+    """
+    progress_hooks = list(progress_hooks or [])
+    postprocessor_hooks = list(postprocessor_hooks or [])
+    if events is not None:
+        progress_hooks.append(events.progress_hook)
+        postprocessor_hooks.append(events.postprocessor_hook)
+    if watch is not None:
+        def check_watch(status):
+            if watch.reason:
+                raise JobAborted(watch.reason)
+        progress_hooks[:0] = [check_watch, watch.progress_hook]
+        postprocessor_hooks[:0] = [check_watch, watch.postprocessor_hook]
+        watch.start()
+    try:
+        parsed = yt_dlp.parse_options(cmd[1:])
+        ydl_opts = dict(parsed.ydl_opts)
+        if progress_hooks:
+            ydl_opts['progress_hooks'] = progress_hooks
+        if postprocessor_hooks:
+            ydl_opts['postprocessor_hooks'] = postprocessor_hooks
+        if download_archive is not None:
+            ydl_opts['download_archive'] = download_archive
+        with ReportingYoutubeDL(ydl_opts) as ydl:
+            ydl.on_message = on_message
+            ydl.watch = watch
+            if info_path:
+                retcode = ydl.download_with_info_file(info_path)
+            else:
+                retcode = ydl.download(parsed.urls)
+    except JobAborted as e:
+        raise subprocess.CalledProcessError(1, cmd, stderr=f"ERROR: {e.msg}")
+    except yt_dlp.utils.DownloadError as e:
+        raise subprocess.CalledProcessError(1, cmd, stderr=str(e))
+    except yt_dlp.utils.DownloadCancelled as e:
+        # --break-on-existing and friends; the CLI exits with 101 for these
+        raise subprocess.CalledProcessError(101, cmd, stderr=str(e))
+    except (optparse.OptParseError, SystemExit) as e:
+        # Bad options fail with the same exit code the CLI would use
+        raise subprocess.CalledProcessError(2, cmd, stderr=str(e))
+
+    finally:
+        if watch is not None:
+            watch.stop()
+
+    if retcode:
+        raise subprocess.CalledProcessError(retcode, cmd)
+    return subprocess.CompletedProcess(cmd, 0)
+
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+def probe_ytdlp(refresh=False):
+    """Return what yt-dlp is available: {'available', 'in_process', 'path', 'version'}
+
+    The result is computed once per process. The version of the yt-dlp
+    binary is also persisted between runs and only re-read (by spawning
+    `yt-dlp --version`) when the binary's path, size or mtime changes.
+    """
+    global _probe
+    with _probe_lock:
+        if _probe is not None and not refresh:
+            return _probe
+
+        probe = {
+            'available': False,
+            'in_process': YT_DLP_AVAILABLE,
+            'path': shutil.which('yt-dlp'),
+            'version': None
+        }
+        if YT_DLP_AVAILABLE:
+            probe['version'] = yt_dlp.version.__version__
+        if probe['path']:
+            binary_version = _binary_version(probe['path'], refresh)
+            probe['version'] = probe['version'] or binary_version
+            if binary_version is None:
+                probe['path'] = None
+
+        probe['available'] = probe['in_process'] or probe['path'] is not None
+        _probe = probe
+        return probe
+
+
+def _binary_version(path, refresh=False):
+    """Return the version of the yt-dlp binary at path, using the persisted probe cache"""
+    cache_file = state_path('ytdlp_probe.json')
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    fingerprint = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+        if not refresh and cached.get('binary') == fingerprint:
+            return cached['version']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, check=True, timeout=30)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        return None
+
+    version = result.stdout.strip()
+    try:
+        with open(cache_file, 'w') as f:
+            json.dump({'binary': fingerprint, 'version': version}, f)
+    except OSError:
+        pass
+    return version
+
+
+def ytdlp_available():
+    """Return True if yt-dlp can be used in-process or as a command"""
+    return probe_ytdlp()['available']
+
+
+def ytdlp_version():
+    """Return the yt-dlp version string (e.g. '2024.08.06'), or None"""
+    return probe_ytdlp()['version']
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine shared by every downloader class"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = YtDlpEngine()
+            # SMDL_WORKER_POOL=N runs jobs in N warm worker processes ('on' for 4)
+            workers = os.environ.get('SMDL_WORKER_POOL', '').strip().lower()
+            if workers not in ('', '0', 'off'):
+                _engine.use_worker_pool(int(workers) if workers.isdigit() else 4)
+        return _engine
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+yt-dlp Worker Pool
+Keeps N long-lived worker processes that import yt-dlp once and take jobs
+over a pipe, so every download skips the cost of a cold yt-dlp start
+"""
+
+import multiprocessing
+import queue
+import subprocess
+
+from job_watchdog import JobWatch
+
+
+def _worker_main(conn):
+    """Worker process loop: run jobs from the pipe until told to stop"""
+    # Imported once per worker lifetime, this is the whole point of the pool
+    import yt_dlp
+    from download_archive import get_archive
+    from ytdlp_engine import extract_in_process, run_in_process
+
+    extractor = yt_dlp.YoutubeDL({
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True
+    })
+
+    def send_message(message):
+        conn.send(('message', message))
+
+    def progress_hook(status):
+        conn.send(('progress', {
+            'status': status.get('status'),
+            'filename': status.get('filename'),
+            'downloaded_bytes': status.get('downloaded_bytes'),
+            'total_bytes': status.get('total_bytes') or status.get('total_bytes_estimate'),
+            'speed': status.get('speed'),
+            'eta': status.get('eta'),
+            'fragment_index': status.get('fragment_index'),
+            'fragment_count': status.get('fragment_count')
+        }))
+
+    def postprocessor_hook(status):
+        # Merging or converting a long video shows no download progress
+        conn.send(('postprocess', {
+            'status': status.get('status'),
+            'postprocessor': status.get('postprocessor')
+        }))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if job is None:
+            break
+
+        result = {'returncode': 0, 'error': None, 'info': None}
+        try:
+            if job['kind'] == 'extract':
+                result['info'] = extract_in_process(extractor, job['url'])
+            else:
+                # Each worker opens the shared archive database itself
+                archive = get_archive() if job.get('archive') else None
+                run_in_process(job['cmd'], job.get('info_path'), [progress_hook], archive,
+                               send_message if job.get('messages') else None, [postprocessor_hook])
+        except subprocess.CalledProcessError as e:
+            result['returncode'] = e.returncode
+            result['error'] = e.stderr
+        except Exception as e:
+            result['returncode'] = 1
+            result['error'] = str(e)
+        conn.send(('result', result))
+
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        """Kill the worker straight away, e.g. when it is in the middle of a job"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    def __init__(self, workers=4, max_jobs_per_worker=50):
+        self.size = max(1, workers)
+        # Workers are replaced after this many jobs to keep leaks bounded
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._context = multiprocessing.get_context()
+        self._idle = queue.Queue()
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.put(_Worker(self._context))
+
+    def _submit(self, job, on_progress=None, on_message=None, watch=None, events=None):
+        """Send a job to an idle worker and wait for its result
+
+        A JobWatch fed by the job's progress kills the worker once it gives
+        up on the job; the worker is then replaced like one that crashed.
+        So is a worker left mid-job because a callback raised (or the wait
+        was interrupted): the pool never shrinks.
+        """
+        if self._closed:
+            raise RuntimeError("Worker pool is closed")
+
+        worker = self._idle.get()
+        finished = False
+        if watch is not None:
+            watch.start(lambda reason: worker.process.kill())
+        try:
+            worker.conn.send(job)
+            while True:
+                kind, payload = worker.conn.recv()
+                if kind == 'result':
+                    finished = True
+                    break
+                if kind == 'message':
+                    if on_message:
+                        on_message(payload)
+                elif kind == 'postprocess':
+                    for target in (watch, events):
+                        if target is not None:
+                            target.postprocessor_hook(payload)
+                else:
+                    for target in (watch, events):
+                        if target is not None:
+                            target.progress_hook(payload)
+                    if on_progress:
+                        on_progress(payload)
+        except (EOFError, BrokenPipeError, OSError) as e:
+            # The worker died mid-job: it is replaced below, the job reported as failed
+            error = f"ERROR: {watch.reason}" if watch is not None and watch.reason else f"Worker process exited: {e}"
+            return {'returncode': 1, 'error': error, 'info': None}
+        finally:
+            if watch is not None:
+                watch.stop()
+            if not finished:
+                # Its pipe may still carry the rest of the job, so it cannot be reused
+                worker.kill()
+                worker = _Worker(self._context)
+            else:
+                worker.jobs_done += 1
+                if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+                    worker.stop()
+                    worker = _Worker(self._context)
+            self._idle.put(worker)
+
+        return payload
+
+    def extract_info(self, url):
+        """Extract a URL in a worker process and return its info dict"""
+        result = self._submit({'kind': 'extract', 'url': url}, watch=JobWatch('extract'))
+        if result['returncode']:
+            raise subprocess.CalledProcessError(
+                result['returncode'], ['yt-dlp', '--dump-json', url], stderr=result['error'])
+        return result['info']
+
+    def run(self, cmd, info_path=None, on_progress=None, archive=False, on_message=None, watch=None,
+            events=None):
+        """Run a yt-dlp command line in a worker process
+
+        Raises subprocess.CalledProcessError on failure, like the engine.
+        on_progress receives a dict for every yt-dlp progress update and
+        on_message every warning or error message.
+        archive=True checks and records items in the shared download archive.
+        watch is a JobWatch that stops the job when it stalls or overruns,
+        and events a JobProgress that publishes its progress.
+        """
+        job = {'kind': 'run', 'cmd': cmd, 'info_path': info_path, 'archive': archive,
+               'messages': on_message is not None}
+        result = self._submit(job, on_progress, on_message, watch, events)
+        if result['returncode']:
+            raise subprocess.CalledProcessError(result['returncode'], cmd, stderr=result['error'])
+        return subprocess.CompletedProcess(cmd, 0)
+
+    def close(self):
+        """Stop every worker, waiting for jobs that are still running"""
+        self._closed = True
+        for _ in range(self.size):
+            try:
+                self._idle.get(timeout=30).stop()
+            except queue.Empty:
+                break